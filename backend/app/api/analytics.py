@@ -0,0 +1,72 @@
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query  # type: ignore
+from app.core.deps import get_current_active_superuser
+from app.db.session import DbSession, get_db
+from app.models.user import User
+from app.services.sales_rollup_service import AsyncSalesRollupService
+from app.schemas.analytics import CategorySalesResponse, DailySalesResponse, ProductSalesResponse, SalesRollupRebuildResponse
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+# Longest date range served by /sales/daily
+MAX_DAILY_RANGE_DAYS = 366
+
+
+@router.get("/sales/daily", response_model=List[DailySalesResponse])
+async def get_daily_sales(
+    start: Optional[date] = Query(None, description="First day (UTC); defaults to 29 days before end"),
+    end: Optional[date] = Query(None, description="Last day (UTC), inclusive; defaults to today"),
+    current_user: User = Depends(get_current_active_superuser),
+    db: DbSession = Depends(get_db),
+) -> List[DailySalesResponse]:
+    """
+    Get orders, units and revenue per day (admin only).
+    Days without orders are returned as zero. Returns 400 for an invalid or too long range.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days >= MAX_DAILY_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"start must not be after end and the range must be at most {MAX_DAILY_RANGE_DAYS} days")
+
+    service = AsyncSalesRollupService(db)
+    return await service.daily_revenue(start, end)
+
+
+@router.get("/sales/top-products", response_model=List[ProductSalesResponse])
+async def get_top_products(
+    limit: int = Query(10, ge=1, le=100),
+    by: str = Query("units", pattern="^(units|revenue)$"),
+    current_user: User = Depends(get_current_active_superuser),
+    db: DbSession = Depends(get_db),
+) -> List[ProductSalesResponse]:
+    """
+    Get the best-selling products of all time by units or revenue (admin only).
+    """
+    service = AsyncSalesRollupService(db)
+    return await service.top_products(limit, by)
+
+
+@router.get("/sales/categories", response_model=List[CategorySalesResponse])
+async def get_category_sales(
+    current_user: User = Depends(get_current_active_superuser),
+    db: DbSession = Depends(get_db),
+) -> List[CategorySalesResponse]:
+    """
+    Get all-time units and revenue per product category, highest revenue first (admin only).
+    """
+    service = AsyncSalesRollupService(db)
+    return await service.category_sales()
+
+
+@router.post("/sales/rebuild", response_model=SalesRollupRebuildResponse)
+async def rebuild_sales_rollups(
+    current_user: User = Depends(get_current_active_superuser),
+    db: DbSession = Depends(get_db),
+) -> SalesRollupRebuildResponse:
+    """
+    Recompute every sales rollup from the order history (admin only).
+    Scans all orders; prefer the scripts.rebuild_sales_rollups command for large backfills.
+    """
+    service = AsyncSalesRollupService(db)
+    return await service.rebuild()
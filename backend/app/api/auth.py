@@ -1,11 +1,12 @@
 # flake8: noqa
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status  # type: ignore
-from sqlalchemy.orm import Session  # type: ignore
-from app.core.deps import get_db, get_current_user
+from app.core.deps import attach_user, get_db, get_current_user, get_current_user_for_read
+from app.core.hashing import password_hasher
+from app.db.replicas import pin_primary, user_pin
+from app.db.session import DbSession, run_db
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    password_needs_rehash,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
@@ -23,10 +24,10 @@ router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)) -> UserResponse:
+async def register(user_data: UserCreate, db: DbSession = Depends(get_db)) -> UserResponse:
     """Register a new user."""
     # Check if user already exists
-    existing_user = db.query(User).filter((User.email == user_data.email) | (User.username == user_data.username)).first()
+    existing_user = await run_db(db, lambda session: session.query(User).filter((User.email == user_data.email) | (User.username == user_data.username)).first())
 
     if existing_user:
         if existing_user.email == user_data.email:
@@ -34,28 +35,34 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)) -> UserRespon
         else:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken")
 
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user (bcrypt runs on the dedicated hashing pool)
+    hashed_password = await password_hasher.hash(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
         full_name=user_data.full_name,
         hashed_password=hashed_password,
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
 
-    return db_user
+    def save(session) -> UserResponse:
+        session.add(db_user)
+        session.commit()
+        session.refresh(db_user)
+        return UserResponse.model_validate(db_user)
+
+    user = await run_db(db, save)
+    # Reads of the new account must not hit a replica that has not seen it yet
+    pin_primary(user_pin(user.username))
+    return user
 
 
 @router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)) -> Token:
+async def login(login_data: LoginRequest, db: DbSession = Depends(get_db)) -> Token:
     """Login and get access token."""
     # Find user by username
-    user = db.query(User).filter(User.username == login_data.username).first()
+    user = await run_db(db, lambda session: session.query(User).filter(User.username == login_data.username).first())
 
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    if not user or not await password_hasher.verify(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -65,6 +72,11 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)) -> Token:
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
 
+    # Transparently upgrade hashes created with a different bcrypt cost
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await password_hasher.hash(login_data.password)
+        await run_db(db, lambda session: session.commit())
+
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(data={"sub": user.username}, expires_delta=access_token_expires)
@@ -73,65 +85,71 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)) -> Token:
 
 
 @router.post("/logout")
-def logout(current_user: User = Depends(get_current_user)) -> dict[str, str]:
+async def logout(current_user: User = Depends(get_current_user)) -> dict[str, str]:
     """Logout (client should discard the token)."""
     return {"message": "Successfully logged out"}
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)) -> UserResponse:
+async def get_current_user_info(current_user: User = Depends(get_current_user_for_read)) -> UserResponse:
     """Get current user information."""
     return current_user
 
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     password_data: PasswordChangeRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
 ) -> dict[str, str]:
     """Change user password."""
     # Verify current password
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await password_hasher.verify(password_data.current_password, current_user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect current password")
 
     # Update password
-    current_user.hashed_password = get_password_hash(password_data.new_password)
-    db.commit()
+    hashed_password = await password_hasher.hash(password_data.new_password)
+    user = await attach_user(db, current_user)
+    user.hashed_password = hashed_password
+    await run_db(db, lambda session: session.commit())
 
     return {"message": "Password changed successfully"}
 
 
 @router.put("/profile", response_model=UserResponse)
-def update_profile(
+async def update_profile(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
 ) -> UserResponse:
     """Update user profile."""
+    user = await attach_user(db, current_user)
+
     # Check if email is being changed and if it's already taken
-    if user_update.email and user_update.email != current_user.email:
-        existing_user = db.query(User).filter(User.email == user_update.email).first()
+    if user_update.email and user_update.email != user.email:
+        existing_user = await run_db(db, lambda session: session.query(User).filter(User.email == user_update.email).first())
         if existing_user:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-        current_user.email = user_update.email
+        user.email = user_update.email
 
     # Check if username is being changed and if it's already taken
-    if user_update.username and user_update.username != current_user.username:
-        existing_user = db.query(User).filter(User.username == user_update.username).first()
+    if user_update.username and user_update.username != user.username:
+        existing_user = await run_db(db, lambda session: session.query(User).filter(User.username == user_update.username).first())
         if existing_user:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken")
-        current_user.username = user_update.username
+        user.username = user_update.username
 
     # Update full name
     if user_update.full_name is not None:
-        current_user.full_name = user_update.full_name
+        user.full_name = user_update.full_name
 
     # Update password if provided
     if user_update.password:
-        current_user.hashed_password = get_password_hash(user_update.password)
+        user.hashed_password = await password_hasher.hash(user_update.password)
 
-    db.commit()
-    db.refresh(current_user)
+    def save(session) -> UserResponse:
+        session.commit()
+        session.refresh(user)
+        return UserResponse.model_validate(user)
 
-    return current_user
+    return await run_db(db, save)
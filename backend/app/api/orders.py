@@ -1,36 +1,84 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException  # type: ignore
-from sqlalchemy.orm import Session  # type: ignore
-from app.db.session import get_db
-from app.core.deps import get_current_user
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response  # type: ignore
+from app.db.replicas import get_user_read_db
+from app.db.session import DbSession, get_db
+from app.core.deps import get_current_user_for_read
+from app.core.admission import client_key
+from app.core.idempotency import IDEMPOTENCY_KEY_HEADER, run_idempotent
 from app.models.user import User
-from app.services.order_service import OrderService
-from app.schemas.order import OrderCreate, OrderResponse
+from app.services.order_service import AsyncOrderService
+from app.schemas.order import OrderCreate, OrderResponse, OrderSummaryResponse
 
 router = APIRouter(prefix="/api/orders", tags=["orders"])
 
+# Response header carrying the cursor for the next history page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 @router.post("", response_model=OrderResponse)
-def create_order(order_data: OrderCreate, db: Session = Depends(get_db)) -> OrderResponse:
+async def create_order(
+    request: Request,
+    order_data: OrderCreate,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255),
+    db: DbSession = Depends(get_db),
+) -> Response:
     """
     Create a new order.
     Validates items, processes payment, and saves order to database.
     Returns 400 if validation fails or stock is insufficient.
+    With an Idempotency-Key header, the caller's retries return the original order without charging again.
     """
-    service = OrderService(db)
+    service = AsyncOrderService(db)
 
-    try:
-        order = service.create_order(order_data)
-        return order
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    async def handler() -> OrderResponse:
+        try:
+            return await service.create_order(order_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await run_idempotent("orders", client_key(request.scope), idempotency_key, order_data, handler)
 
 
 @router.get("/history", response_model=List[OrderResponse])
-def get_order_history(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> List[OrderResponse]:
+async def get_order_history(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    current_user: User = Depends(get_current_user_for_read),
+    db: DbSession = Depends(get_user_read_db),
+) -> List[OrderResponse]:
+    """
+    Get order history for the current user, newest first.
+    Served from a read replica unless the user placed an order in the last few seconds.
+    Returns one page of orders with items; the next page's cursor is sent in the X-Next-Cursor header.
+    Returns 400 if the cursor is invalid.
+    """
+    return await _history_page(response, current_user, db, limit, cursor, include_items=True)
+
+
+@router.get("/history/summary", response_model=List[OrderSummaryResponse])
+async def get_order_history_summary(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    current_user: User = Depends(get_current_user_for_read),
+    db: DbSession = Depends(get_user_read_db),
+) -> List[OrderSummaryResponse]:
     """
-    Get order history for the current user.
-    Returns list of orders with items.
+    Get order history for the current user without line items.
+    Paginated like /history.
     """
-    service = OrderService(db)
-    return service.get_user_orders(current_user.username)
+    return await _history_page(response, current_user, db, limit, cursor, include_items=False)
+
+
+async def _history_page(response: Response, user: User, db: DbSession, limit: int, cursor: Optional[str], include_items: bool) -> list:
+    service = AsyncOrderService(db)
+
+    try:
+        orders, next_cursor = await service.get_user_orders(user.username, limit=limit, cursor=cursor, include_items=include_items)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return orders
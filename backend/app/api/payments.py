@@ -1,5 +1,9 @@
-from fastapi import APIRouter  # type: ignore
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request, Response  # type: ignore
 from pydantic import BaseModel  # type: ignore
+from app.core.admission import client_key
+from app.core.idempotency import IDEMPOTENCY_KEY_HEADER, run_idempotent
+from app.services.payment_gateway import PaymentDeclined
 from app.services.payment_service import PaymentService
 
 router = APIRouter(prefix="/api/payments", tags=["payments"])
@@ -15,12 +19,23 @@ class CheckoutResponse(BaseModel):
 
 
 @router.post("/checkout", response_model=CheckoutResponse)
-def checkout(request: CheckoutRequest) -> CheckoutResponse:
+async def checkout(
+    http_request: Request,
+    request: CheckoutRequest,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255),
+) -> Response:
     """
-    Process payment checkout (dummy implementation).
-    Always returns success with a dummy transaction ID.
+    Process payment checkout through the configured payment gateway.
+    Returns 400 if the payment is declined and 503 if the gateway is unavailable.
+    With an Idempotency-Key header, the caller's retries return the original transaction.
     """
-    payment_service = PaymentService()
-    result = payment_service.process_payment(request.amount)
 
-    return CheckoutResponse(status=result["status"], transaction_id=result["transaction_id"])
+    async def handler() -> CheckoutResponse:
+        payment_service = PaymentService()
+        try:
+            result = await payment_service.process_payment(request.amount)
+        except PaymentDeclined as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return CheckoutResponse(status=result["status"], transaction_id=result["transaction_id"])
+
+    return await run_idempotent("payments/checkout", client_key(http_request.scope), idempotency_key, request, handler)
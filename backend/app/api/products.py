@@ -1,48 +1,183 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query  # type: ignore
-from sqlalchemy.orm import Session  # type: ignore
-from app.db.session import get_db
-from app.services.product_service import ProductService
-from app.schemas.product import ProductListResponse, ProductResponse, ProductCreate, ProductUpdate
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response  # type: ignore
+from fastapi.responses import StreamingResponse  # type: ignore
+from app.db.replicas import get_catalog_read_db
+from app.db.session import DbSession, get_db
+from app.services.product_filters import ProductFilters
+from app.services.product_service import CATALOG_TAG, PRODUCT_BATCH_MAX_IDS, AsyncProductService, product_tag
+from app.services.product_bulk_service import MEDIA_TYPES, AsyncProductBulkService, export_products
+from app.schemas.product import ProductBatchRequest, ProductBatchResponse, ProductImportResult, ProductListResponse, ProductResponse, ProductCreate, ProductUpdate
 from app.core.deps import get_current_user
+from app.core.cache import product_cache
+from app.core.compression import precompressed_json_response
+from app.core.responses import RawJSONResponse
+from app.core.http_cache import PRODUCT_DETAIL_CACHE_CONTROL, PRODUCT_LIST_CACHE_CONTROL, caching_headers, is_not_modified, make_etag, not_modified
 from app.models.user import User
 
 router = APIRouter(prefix="/api/products", tags=["products"])
 
 
 @router.get("", response_model=ProductListResponse)
-def get_products(
+async def get_products(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     q: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
-) -> ProductListResponse:
+    sort: str = Query("created_at", pattern="^(created_at|price)$"),
+    cursor: Optional[str] = Query(None),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
+    category: Optional[str] = Query(None, max_length=100),
+    min_price: Optional[int] = Query(None, ge=0),
+    max_price: Optional[int] = Query(None, ge=0),
+    in_stock: bool = Query(False),
+    facets: bool = Query(False),
+    db: DbSession = Depends(get_catalog_read_db),
+) -> Response:
     """
     Get paginated list of products.
+    q runs a relevance-ranked search over name, description and category.
+    category, min_price, max_price and in_stock filter the listing or search in the database.
+    facets=true adds product counts per category under the other filters, served from a cached aggregate.
+    Pass next_cursor from a previous response as cursor for keyset pagination (page is then ignored).
+    Use count=estimated or count=none to avoid a full COUNT on large catalogs (filtered listings are counted exactly).
+    Supports conditional GET: the ETag is derived from the query and the catalog version.
+    The body is sent pre-encoded from the product cache without re-validation, and compressed
+    copies are cached per catalog version for clients accepting br or gzip.
     """
-    service = ProductService(db)
-    return service.get_products(page=page, page_size=page_size, search_query=q)
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="min_price must not exceed max_price")
+
+    filters = ProductFilters(category=category, min_price=min_price, max_price=max_price, in_stock=in_stock)
+    service = AsyncProductService(db)
+
+    last_modified, revision = await service.get_catalog_version()
+    etag = make_etag("products", page, page_size, q, sort, cursor, count, *filters.cache_key(), facets, last_modified, revision)
+    headers = caching_headers(etag, last_modified, PRODUCT_LIST_CACHE_CONTROL)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(headers)
+
+    try:
+        payload = await service.get_products_json(page=page, page_size=page_size, search_query=q, sort=sort, cursor=cursor, count=count, filters=filters, facets=facets)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # The ETag carries the catalog version, which every product write changes along with CATALOG_TAG
+    return precompressed_json_response(request, payload, headers, product_cache, [CATALOG_TAG])
+
+
+@router.get("/export")
+async def export_catalog(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Stream every product as NDJSON or CSV (admin only).
+    Rows are read through a server-side cursor, so memory use does not grow with the catalog.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to export products")
+
+    return StreamingResponse(
+        export_products(fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="products.{fmt}"'},
+    )
+
+
+@router.post("/import", response_model=ProductImportResult)
+async def import_catalog(
+    request: Request,
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    db: DbSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> ProductImportResult:
+    """
+    Upsert products keyed on sku from a streamed NDJSON or CSV request body (admin only).
+    CSV needs a header row. Rows are committed in batches; invalid rows are skipped
+    and reported with their line number.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to import products")
+
+    service = AsyncProductBulkService(db)
+    return await service.import_products(request.stream(), fmt)
+
+
+def _batch_ids(ids: List[int]) -> List[int]:
+    """Deduplicate ids in request order and enforce PRODUCT_BATCH_MAX_IDS."""
+    unique = list(dict.fromkeys(ids))
+    if len(unique) > PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {PRODUCT_BATCH_MAX_IDS} product ids can be requested at once")
+    return unique
+
+
+@router.get("/batch", response_model=ProductBatchResponse)
+async def get_products_batch(
+    request: Request,
+    ids: Optional[List[str]] = Query(None, description="Comma-separated product ids; the parameter may also be repeated"),
+    db: DbSession = Depends(get_catalog_read_db),
+) -> Response:
+    """
+    Get several products by ID in one request (cart and checkout rendering).
+    Items are keyed by id; ids with no product are listed in not_found instead of failing the request.
+    Cached products are reused and the rest are read with a single query.
+    Supports conditional GET via an ETag derived from the ids and their updated_at.
+    """
+    try:
+        product_ids = _batch_ids([int(value) for part in ids or [] for value in part.split(",") if value.strip()])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not product_ids:
+        raise HTTPException(status_code=400, detail="ids must not be empty")
+
+    service = AsyncProductService(db)
+    payload, updated = await service.get_products_batch_json(product_ids)
+
+    last_modified = max(updated.values(), default=None)
+    etag = make_etag("products_batch", *(f"{product_id}:{updated[product_id].isoformat() if product_id in updated else ''}" for product_id in product_ids))
+    headers = caching_headers(etag, last_modified, PRODUCT_DETAIL_CACHE_CONTROL)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(headers)
+
+    return precompressed_json_response(request, payload, headers, product_cache, [product_tag(product_id) for product_id in product_ids])
+
+
+@router.post("/batch", response_model=ProductBatchResponse)
+async def post_products_batch(batch: ProductBatchRequest, db: DbSession = Depends(get_catalog_read_db)) -> Response:
+    """
+    Same lookup as GET /batch with the ids in a JSON body, for carts too large for a query string.
+    """
+    service = AsyncProductService(db)
+    payload, _ = await service.get_products_batch_json(_batch_ids(batch.ids))
+    return RawJSONResponse(payload)
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product_by_id(product_id: int, db: Session = Depends(get_db)) -> ProductResponse:
+async def get_product_by_id(product_id: int, request: Request, db: DbSession = Depends(get_catalog_read_db)) -> Response:
     """
     Get a single product by ID.
     Returns 404 if product not found.
+    Supports conditional GET via ETag / Last-Modified derived from updated_at.
     """
-    service = ProductService(db)
-    product = service.get_product_by_id(product_id)
+    service = AsyncProductService(db)
+    cached = await service.get_product_json(product_id)
 
-    if not product:
+    if not cached:
         raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found")
 
-    return product
+    payload, updated_at = cached
+    etag = make_etag("product", product_id, updated_at.isoformat())
+    headers = caching_headers(etag, updated_at, PRODUCT_DETAIL_CACHE_CONTROL)
+    if is_not_modified(request, etag, updated_at):
+        return not_modified(headers)
+
+    return precompressed_json_response(request, payload, headers, product_cache, [product_tag(product_id)])
 
 
 @router.post("", response_model=ProductResponse)
-def create_product(
+async def create_product(
     product_data: ProductCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> ProductResponse:
     """
@@ -51,15 +186,15 @@ def create_product(
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized to create products")
 
-    service = ProductService(db)
-    return service.create_product(product_data)
+    service = AsyncProductService(db)
+    return await service.create_product(product_data)
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
-def update_product(
+async def update_product(
     product_id: int,
     product_data: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> ProductResponse:
     """
@@ -68,8 +203,8 @@ def update_product(
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized to update products")
 
-    service = ProductService(db)
-    product = service.update_product(product_id, product_data)
+    service = AsyncProductService(db)
+    product = await service.update_product(product_id, product_data)
 
     if not product:
         raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found")
@@ -78,9 +213,9 @@ def update_product(
 
 
 @router.delete("/{product_id}")
-def delete_product(
+async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -89,8 +224,8 @@ def delete_product(
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized to delete products")
 
-    service = ProductService(db)
-    success = service.delete_product(product_id)
+    service = AsyncProductService(db)
+    success = await service.delete_product(product_id)
 
     if not success:
         raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found")
@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Depends  # type: ignore
+from app.core.admission import admission_controller
+from app.core.deps import get_current_active_superuser
+from app.core.cache import idempotency_store, product_cache
+from app.core.hashing import password_hasher
+from app.db.cache_bus import cache_bus
+from app.db.pool import pool_stats
+from app.db.replicas import replica_set
+from app.services.payment_gateway import payment_gateway
+from app.services.product_service import set_product_cache
+from app.db.session import engine
+from app.models.user import User
+from app.schemas.system import PoolStatsResponse, CacheStatsResponse, CacheSettingsUpdate, PasswordHashPoolStatsResponse, PaymentGatewayStatsResponse, ReplicaSetStatsResponse, AdmissionStatsResponse, CacheBusStatsResponse
+
+router = APIRouter(prefix="/api/system", tags=["system"])
+
+
+@router.get("/pool", response_model=PoolStatsResponse)
+async def get_pool_stats(current_user: User = Depends(get_current_active_superuser)) -> PoolStatsResponse:
+    """
+    Get database connection pool statistics (admin only).
+    Reports current occupancy and cumulative checkout wait times and timeouts.
+    """
+    return PoolStatsResponse(**pool_stats.snapshot(engine.pool))
+
+
+@router.get("/cache", response_model=CacheStatsResponse)
+async def get_cache_stats(current_user: User = Depends(get_current_active_superuser)) -> CacheStatsResponse:
+    """
+    Get product cache statistics (admin only).
+    """
+    return CacheStatsResponse(**product_cache.stats())
+
+
+@router.put("/cache", response_model=CacheStatsResponse)
+async def update_cache_settings(settings: CacheSettingsUpdate, current_user: User = Depends(get_current_active_superuser)) -> CacheStatsResponse:
+    """
+    Enable or disable the product cache on every worker (admin only).
+    Disabling also drops every cached entry; other workers follow over the cache bus.
+    """
+    set_product_cache(settings.enabled)
+    return CacheStatsResponse(**product_cache.stats())
+
+
+@router.delete("/cache", response_model=CacheStatsResponse)
+async def clear_cache(current_user: User = Depends(get_current_active_superuser)) -> CacheStatsResponse:
+    """
+    Drop every cached product entry on every worker (admin only).
+    """
+    set_product_cache()
+    return CacheStatsResponse(**product_cache.stats())
+
+
+@router.get("/password-hashing", response_model=PasswordHashPoolStatsResponse)
+async def get_password_hash_pool_stats(current_user: User = Depends(get_current_active_superuser)) -> PasswordHashPoolStatsResponse:
+    """
+    Get password hashing pool statistics (admin only).
+    """
+    return PasswordHashPoolStatsResponse(**password_hasher.stats())
+
+
+@router.get("/idempotency", response_model=CacheStatsResponse)
+async def get_idempotency_stats(current_user: User = Depends(get_current_active_superuser)) -> CacheStatsResponse:
+    """
+    Get statistics of this worker's in-process idempotency fast path (admin only).
+    hits counts responses replayed without a database lookup and coalesced counts duplicates
+    that waited on an in-flight request; keys themselves are kept in the idempotency_keys table.
+    """
+    return CacheStatsResponse(**idempotency_store.stats())
+
+
+@router.get("/payment-gateway", response_model=PaymentGatewayStatsResponse)
+async def get_payment_gateway_stats(current_user: User = Depends(get_current_active_superuser)) -> PaymentGatewayStatsResponse:
+    """
+    Get payment gateway client statistics and circuit breaker state (admin only).
+    """
+    return PaymentGatewayStatsResponse(**payment_gateway.stats())
+
+
+@router.get("/replicas", response_model=ReplicaSetStatsResponse)
+async def get_replica_stats(current_user: User = Depends(get_current_active_superuser)) -> ReplicaSetStatsResponse:
+    """
+    Get read replica health and routing statistics (admin only).
+    primary_reads counts read-only requests sent to the primary because of a recent write or no healthy replica.
+    primary_fills counts product cache fills moved from a replica to the primary after a catalog invalidation.
+    """
+    return ReplicaSetStatsResponse(**replica_set.stats())
+
+
+@router.get("/admission", response_model=AdmissionStatsResponse)
+async def get_admission_stats(current_user: User = Depends(get_current_active_superuser)) -> AdmissionStatsResponse:
+    """
+    Get admission control limits and live counters per route class (admin only).
+    rate_limited, queue_full and deadline_exceeded count requests shed with 429 or 503.
+    """
+    return AdmissionStatsResponse(**admission_controller.stats())
+
+
+@router.get("/cache-bus", response_model=CacheBusStatsResponse)
+async def get_cache_bus_stats(current_user: User = Depends(get_current_active_superuser)) -> CacheBusStatsResponse:
+    """
+    Get cross-worker cache invalidation bus statistics (admin only).
+    Lag is the time from another worker publishing an event to this worker receiving it.
+    """
+    return CacheBusStatsResponse(**cache_bus.stats())
@@ -0,0 +1,276 @@
+# flake8: noqa: E501
+import asyncio
+import ipaddress
+import math
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any, Optional
+from fastapi.responses import JSONResponse  # type: ignore
+from app.core.metrics import admission_rejections, current_request_metrics
+from app.core.security import decode_access_token
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+# Token buckets kept per class; the least recently used client's bucket is dropped beyond this
+ADMISSION_MAX_BUCKETS = int(os.getenv("ADMISSION_MAX_BUCKETS", "100000"))
+# Peers (addresses or CIDR ranges) whose X-Forwarded-For is believed, e.g. the Next.js server or a load balancer
+TRUSTED_PROXIES = [ipaddress.ip_network(entry.strip(), strict=False) for entry in os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if entry.strip()]
+# Trusted proxies in front of the API, each appending one X-Forwarded-For entry; the client is that many entries from the right
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
+
+# Requests sorted into admission classes by method and path; anything else is not limited
+ROUTE_CLASSES = (
+    ("POST", re.compile(r"^/api/auth/(login|register|change-password)$"), "auth"),
+    ("POST", re.compile(r"^/api/(orders|payments/checkout)$"), "checkout"),
+    ("GET", re.compile(r"^/api/products(/\d+|/batch)?$"), "catalog"),
+    ("POST", re.compile(r"^/api/products/batch$"), "catalog"),
+)
+
+# Per-class defaults, each overridable with ADMISSION_<CLASS>_<SETTING> (e.g. ADMISSION_AUTH_CONCURRENCY):
+# concurrency (0 = unlimited), queue (waiting requests beyond which new ones are rejected),
+# queue_timeout (seconds a request may wait for a slot), rate (requests/sec per client_key, 0 = off) and burst
+CLASS_DEFAULTS = {
+    "auth": {"concurrency": 8, "queue": 32, "queue_timeout": 2.0, "rate": 5.0, "burst": 10},
+    "checkout": {"concurrency": 32, "queue": 128, "queue_timeout": 3.0, "rate": 2.0, "burst": 10},
+    "catalog": {"concurrency": 64, "queue": 256, "queue_timeout": 1.0, "rate": 0.0, "burst": 0},
+}
+
+
+class AdmissionRejected(Exception):
+    """A request was shed before reaching its route."""
+
+    def __init__(self, message: str, status_code: int, reason: str, retry_after: float = 1) -> None:
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class TokenBuckets:
+    """Per-key token buckets refilled at `rate` tokens per second up to `burst`."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_keys = max_keys
+        # key -> (tokens, last refill time), least recently used first
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """Take one token for key. Returns 0 when allowed, otherwise seconds until a token is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            wait = (1 - tokens) / self.rate
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+class AdmissionClass:
+    """
+    Concurrency limit with a bounded FIFO queue and per-client rate limit for one class of routes.
+    Used only from the event loop, so no locking is needed. A finishing request hands its
+    slot directly to the oldest waiter, so queued requests cannot be overtaken by new arrivals.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue: int, queue_timeout: float, rate: float, burst: int) -> None:
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = queue
+        self.queue_timeout = queue_timeout
+        self.buckets = TokenBuckets(rate, burst, ADMISSION_MAX_BUCKETS) if rate > 0 else None
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.queue_wait_seconds = 0.0
+        self.rejected = {"rate_limited": 0, "queue_full": 0, "deadline_exceeded": 0}
+
+    async def admit(self, client_key: str) -> float:
+        """Wait for a slot and return the seconds spent queued; raises AdmissionRejected."""
+        if self.buckets is not None:
+            wait = self.buckets.take(client_key)
+            if wait:
+                self._reject("rate_limited")
+                raise AdmissionRejected("Too many requests, please slow down", 429, "rate_limited", wait)
+
+        if self.concurrency <= 0 or (self.active < self.concurrency and not self._waiters):
+            self.active += 1
+            self.admitted += 1
+            return 0.0
+
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full")
+            raise AdmissionRejected("Server is busy, please retry shortly", 503, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Waited past the deadline; the client has likely given up, so doing the work would be wasted
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            self._reject("deadline_exceeded")
+            raise AdmissionRejected("Server is busy, please retry shortly", 503, "deadline_exceeded")
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before cancellation; pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        finally:
+            self.queue_wait_seconds += time.perf_counter() - started
+
+        self.admitted += 1
+        return time.perf_counter() - started
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot moves to the waiter, so active stays the same
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _reject(self, reason: str) -> None:
+        self.rejected[reason] += 1
+        admission_rejections.inc((self.name, reason))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "rate": self.buckets.rate if self.buckets is not None else 0.0,
+            "burst": self.buckets.burst if self.buckets is not None else 0,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "queue_wait_seconds": round(self.queue_wait_seconds, 3),
+            **self.rejected,
+        }
+
+
+def _class_setting(name: str, setting: str, default: Any) -> Any:
+    return type(default)(os.getenv(f"ADMISSION_{name.upper()}_{setting.upper()}", str(default)))
+
+
+class AdmissionController:
+    """Routes requests to their admission class."""
+
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.classes = {
+            name: AdmissionClass(name, **{setting: _class_setting(name, setting, default) for setting, default in defaults.items()})
+            for name, defaults in CLASS_DEFAULTS.items()
+        }
+
+    def classify(self, method: str, path: str) -> Optional[AdmissionClass]:
+        for route_method, pattern, name in ROUTE_CLASSES:
+            if method == route_method and pattern.match(path):
+                return self.classes[name]
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        return {"enabled": self.enabled, "classes": [admission.stats() for admission in self.classes.values()]}
+
+
+admission_controller = AdmissionController(ADMISSION_ENABLED)
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_address(scope: dict[str, Any]) -> str:
+    """
+    Address of the caller. When the connecting peer is a trusted proxy, the address is taken
+    from X-Forwarded-For, TRUSTED_PROXY_HOPS entries from the right (the entries further left
+    were written by the client and cannot be believed); otherwise it is the peer itself.
+    """
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if TRUSTED_PROXY_HOPS <= 0 or not _is_trusted_proxy(peer):
+        return peer
+    forwarded = [value.decode("latin-1") for name, value in scope["headers"] if name == b"x-forwarded-for"]
+    hops = [entry.strip() for entry in ",".join(forwarded).split(",") if entry.strip()]
+    if not hops:
+        return peer
+    return hops[-min(TRUSTED_PROXY_HOPS, len(hops))]
+
+
+def client_key(scope: dict[str, Any]) -> str:
+    """Per-caller key for rate limits and idempotency: the user of a valid bearer token, otherwise the client address."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                username = decode_access_token(token)
+                if username is not None:
+                    return f"user:{username}"
+            break
+    return f"client:{client_address(scope)}"
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that sheds load per route class before the request reaches the threadpool or DB pool.
+    Rate-limited clients get 429; requests finding the queue full or waiting past its deadline get 503.
+    Time spent queued appears as the "queue" phase in Server-Timing.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        admission = admission_controller.classify(scope["method"], scope["path"]) if scope["type"] == "http" and admission_controller.enabled else None
+        if admission is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            waited = await admission.admit(client_key(scope))
+        except AdmissionRejected as e:
+            response = JSONResponse(status_code=e.status_code, content={"detail": str(e)}, headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+            await response(scope, receive, send)
+            return
+
+        metrics = current_request_metrics.get()
+        if metrics is not None and waited:
+            metrics.add_phase("queue", waited)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release()
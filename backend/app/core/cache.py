@@ -0,0 +1,217 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+
+class LRUCache:
+    """
+    Bounded in-process LRU cache with per-entry TTL and tag-based invalidation.
+
+    Values are stored as-is; callers store serialized payloads so cached data can
+    never be mutated through a returned object. get_or_load provides single-flight
+    loading: concurrent misses on the same key within the event loop await one loader.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, enabled: bool = True) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any, frozenset[str]]] = OrderedDict()
+        self._tags: dict[str, set[Hashable]] = {}
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        # Bumped on every invalidation so a load that raced with a write is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or when the cache is disabled."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = (), ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries beyond max_entries.
+        ttl_seconds can shorten (never extend) the cache-wide TTL for this entry.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            entry_tags = frozenset(tags)
+            ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+            self._entries[key] = (time.monotonic() + ttl, value, entry_tags)
+            for tag in entry_tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Optional[tuple[Any, Iterable[str]]]]]) -> Optional[Any]:
+        """
+        Return the cached value or load it once.
+        loader returns (value, tags) or None when there is nothing to cache.
+        Concurrent callers missing on the same key share the first caller's load.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            loaded = await loader()
+            if loaded is not None:
+                value, tags = loaded
+                if generation == self._generation:
+                    self.set(key, value, tags)
+            else:
+                value = None
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved so an un-awaited future does not log a warning
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def get_or_load_many(self, keys: Iterable[Hashable], loader: Callable[[list[Hashable]], Awaitable[dict[Hashable, tuple[Any, Iterable[str]]]]]) -> dict[Hashable, Any]:
+        """
+        Return the cached values for keys, loading every miss with one loader call.
+        loader receives the missing keys and returns {key: (value, tags)} for those it found;
+        keys it leaves out are absent from the result. Batch loads are not coalesced with
+        concurrent get_or_load calls, so a key may occasionally be loaded twice.
+        """
+        found: dict[Hashable, Any] = {}
+        missing: list[Hashable] = []
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+        if not missing:
+            return found
+
+        generation = self._generation
+        loaded = await loader(missing)
+        for key, (value, tags) in loaded.items():
+            if generation == self._generation:
+                self.set(key, value, tags)
+            found[key] = value
+        return found
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_tag(self, tag: str) -> None:
+        """Drop every entry stored with the given tag."""
+        with self._lock:
+            self._generation += 1
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "coalesced": self.coalesced,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, entry_tags = self._entries.pop(key)
+        for tag in entry_tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+# Product read cache (PRODUCT_CACHE_ENABLED=false is the kill switch)
+product_cache = LRUCache(
+    max_entries=int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "60")),
+    enabled=_env_flag("PRODUCT_CACHE_ENABLED", "true"),
+)
+
+# Verified JWTs keyed by token digest; entries never outlive the token's exp claim
+token_cache = LRUCache(
+    max_entries=int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300")),
+    enabled=_env_flag("TOKEN_CACHE_ENABLED", "true"),
+)
+
+# Authenticated user principals keyed by username; dropped when a user row is committed
+user_cache = LRUCache(
+    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "30")),
+    enabled=_env_flag("USER_CACHE_ENABLED", "true"),
+)
+
+# Fast path for idempotent POSTs keyed by (endpoint, caller, Idempotency-Key); the idempotency_keys table is authoritative
+idempotency_store = LRUCache(
+    max_entries=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "100000")),
+    ttl_seconds=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400")),
+)
@@ -0,0 +1,137 @@
+# flake8: noqa: E501
+import gzip
+import os
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+import brotli  # type: ignore
+from fastapi import Request, Response  # type: ignore
+from starlette.datastructures import MutableHeaders  # type: ignore
+from app.core.cache import LRUCache
+from app.core.metrics import timed_phase
+from app.core.responses import RawJSONResponse
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+# Bodies smaller than this (bytes) are sent as-is; compressing them costs more than it saves
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+# Preferred first when the client accepts both with the same quality
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+@lru_cache(maxsize=256)
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick a content coding from an Accept-Encoding header (RFC 9110 section 12.5.3); None means identity."""
+    if not accept_encoding:
+        return None
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    with timed_phase("compress"):
+        if encoding == "br":
+            return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def weak_etag(etag: str) -> str:
+    # A compressed body is not byte-identical to the uncompressed one, so its validator is weak
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary")
+    if vary is None:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+def precompressed_json_response(request: Request, payload: bytes, headers: dict[str, str], cache: LRUCache, tags: Iterable[str]) -> Response:
+    """
+    RawJSONResponse for a cacheable payload, compressed for the client with bytes kept in cache.
+    Compressed bodies are keyed by the response ETag and encoding, so each version of a
+    payload is compressed once per encoding rather than once per request. tags should
+    cover the cached payload, so a write evicts the compressed copies along with it.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding")) if COMPRESSION_ENABLED else None
+    if encoding is None or len(payload) < COMPRESSION_MIN_SIZE:
+        return RawJSONResponse(payload, headers=headers)
+
+    key = ("compressed", headers["ETag"], encoding)
+    body = cache.get(key)
+    if body is None:
+        body = compress(payload, encoding)
+        cache.set(key, body, tags)
+    return RawJSONResponse(body, headers={**headers, "ETag": weak_etag(headers["ETag"]), "Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON and text responses with brotli or gzip per Accept-Encoding.
+    Only complete bodies of at least COMPRESSION_MIN_SIZE bytes are compressed; streamed
+    responses (export) and bodies that already carry a Content-Encoding pass through unchanged.
+    Time spent compressing appears as the "compress" phase in Server-Timing.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept-encoding"), None)
+        encoding = negotiate_encoding(accept_encoding)
+        start: Optional[dict[str, Any]] = None
+
+        async def send_compressed(message: dict[str, Any]) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held back until the first body message shows whether the whole body is available
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=list(start["headers"]))
+            body = message.get("body", b"")
+            eligible = "content-encoding" not in headers and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES) and not message.get("more_body", False)
+            if eligible or start["status"] == 304:
+                _add_vary(headers)
+            if eligible and encoding is not None and len(body) >= COMPRESSION_MIN_SIZE:
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                if "etag" in headers:
+                    headers["ETag"] = weak_etag(headers["etag"])
+                message = {**message, "body": body}
+
+            await send({**start, "headers": headers.raw})
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -1,26 +1,100 @@
-from typing import Generator, Optional
+from typing import Any, Optional
 from fastapi import Depends, HTTPException, status  # type: ignore
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials  # type: ignore
-from sqlalchemy.orm import Session  # type: ignore
-from app.db.session import SessionLocal
+from sqlalchemy import event, inspect  # type: ignore
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session  # type: ignore
+from app.core.cache import user_cache
+from app.db.cache_bus import cache_bus
+from app.db.replicas import get_user_read_db, primary_pins, user_pin
+from app.db.session import DbSession, get_db, run_db
 from app.core.security import decode_access_token
 from app.models.user import User
 
 security = HTTPBearer()
 
+USER_COLUMNS = [column.key for column in User.__table__.columns]
 
-def get_db() -> Generator:
-    """Get database session."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Cache bus topic for user invalidations
+USERS_TOPIC = "users"
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)) -> User:
+@event.listens_for(User, "after_update")
+def _track_updated_user(mapper: Any, connection: Any, target: User) -> None:
+    """Remember usernames touched in this transaction (old and new, in case of a rename)."""
+    session = object_session(target)
+    if session is not None:
+        history = inspect(target).attrs.username.history
+        session.info.setdefault("updated_usernames", set()).update({target.username, *history.deleted})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_updated_users(session: Session) -> None:
+    """
+    Drop cached principals once password, profile or is_active changes are committed,
+    and keep the user's reads on the primary until the change has replicated.
+    Other workers do the same when the event reaches them over the cache bus.
+    """
+    usernames = sorted(session.info.pop("updated_usernames", ()))
+    if usernames:
+        _evict_users(usernames)
+        cache_bus.publish(USERS_TOPIC, usernames=usernames)
+
+
+def _evict_users(usernames: list[str]) -> None:
+    for username in usernames:
+        user_cache.invalidate(username)
+        primary_pins.pin(user_pin(username))
+
+
+cache_bus.subscribe(USERS_TOPIC, lambda event: _evict_users(event["usernames"]), resync=user_cache.clear)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_updated_users(session: Session) -> None:
+    session.info.pop("updated_usernames", None)
+
+
+async def load_user(db: DbSession, username: str) -> Optional[User]:
+    """
+    Load a user by username, served from user_cache when possible.
+    Returns a detached User; call attach_user before modifying it.
+    """
+
+    async def load() -> Optional[tuple[dict[str, Any], list[str]]]:
+        user = await run_db(db, lambda session: session.query(User).filter(User.username == username).first())
+        if user is None:
+            return None
+        return {column: getattr(user, column) for column in USER_COLUMNS}, []
+
+    values = await user_cache.get_or_load(username, load)
+    if values is None:
+        return None
+
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+async def attach_user(db: DbSession, user: User) -> User:
+    """Attach a (possibly cached) user to the request session without issuing a SELECT."""
+    return await run_db(db, lambda session: session.merge(user, load=False))
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: DbSession = Depends(get_db)) -> User:
     """Get current authenticated user."""
-    token = credentials.credentials
+    return await authenticate(credentials.credentials, db)
+
+
+async def get_current_user_for_read(credentials: HTTPAuthorizationCredentials = Depends(security), db: DbSession = Depends(get_user_read_db)) -> User:
+    """
+    Get current authenticated user for read-only routes.
+    Shares the route's read session, so the lookup can be served by a replica.
+    """
+    return await authenticate(credentials.credentials, db)
+
+
+async def authenticate(token: str, db: DbSession) -> User:
+    """Resolve a bearer token to an active user, raising 401 or 400 otherwise."""
     username = decode_access_token(token)
 
     if username is None:
@@ -30,7 +104,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await load_user(db, username)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,7 +118,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     return user
 
 
-def get_current_active_superuser(
+async def get_current_active_superuser(
     current_user: User = Depends(get_current_user),
 ) -> User:
     """Get current active superuser."""
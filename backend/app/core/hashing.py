@@ -0,0 +1,84 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+from app.core.metrics import timed_phase
+from app.core.security import get_password_hash, verify_password
+
+T = TypeVar("T")
+
+# Dedicated bcrypt workers so password hashing never occupies the shared request threadpool
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Maximum hashes queued or running before new requests are rejected with 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+# "process" (default, sidesteps the GIL) or "thread"
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+
+
+class PasswordHashPoolSaturated(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+class PasswordHashPool:
+    """Size-limited executor for bcrypt with queue-depth backpressure."""
+
+    def __init__(self, workers: int, max_pending: int, use_processes: bool = True) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing the app never forks; spawn avoids forking a threaded server
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHashPoolSaturated("Too many authentication requests in progress, please retry shortly")
+
+        self.pending += 1
+        try:
+            with timed_phase("bcrypt"):
+                result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+            self.completed += 1
+            return result
+        finally:
+            self.pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "executor": "process" if self.use_processes else "thread",
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHashPool(
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+    use_processes=PASSWORD_HASH_EXECUTOR == "process",
+)
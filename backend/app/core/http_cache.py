@@ -0,0 +1,57 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+from fastapi import Request, Response  # type: ignore
+
+# Cache-Control policies for catalog responses
+PRODUCT_LIST_CACHE_CONTROL = os.getenv("PRODUCT_LIST_CACHE_CONTROL", "public, max-age=0, must-revalidate")
+PRODUCT_DETAIL_CACHE_CONTROL = os.getenv("PRODUCT_DETAIL_CACHE_CONTROL", "public, max-age=0, must-revalidate")
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the values that determine a representation."""
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps are written with datetime.utcnow(), so naive values are UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def caching_headers(etag: str, last_modified: Optional[datetime], cache_control: str) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since for a GET request (RFC 9110 section 13.2.2).
+    If-None-Match takes precedence and uses weak comparison.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have second precision
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+
+    return False
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    """304 response carrying the validators, with no body."""
+    return Response(status_code=304, headers=headers)
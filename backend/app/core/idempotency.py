@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+from fastapi import HTTPException, Response  # type: ignore
+from pydantic import BaseModel  # type: ignore
+from app.core.cache import idempotency_store
+from app.core.responses import RawJSONResponse
+from app.db.session import USE_ASYNC, SessionLocal, run_db
+from app.services.idempotency_service import IdempotencyService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+# Set on responses served from the store instead of running the handler
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+async def _in_store_session(fn: Callable[[IdempotencyService], T]) -> T:
+    """Run fn in its own short transaction, independent of the request session the handler uses."""
+    if USE_ASYNC:
+        async with SessionLocal() as db:
+            return await run_db(db, lambda session: fn(IdempotencyService(session)))
+    with SessionLocal() as db:
+        return await run_db(db, lambda session: fn(IdempotencyService(session)))
+
+
+async def run_idempotent(scope: str, principal: str, key: Optional[str], request_body: BaseModel, handler: Callable[[], Awaitable[BaseModel]]) -> Response:
+    """
+    Run a non-idempotent POST handler at most once per Idempotency-Key.
+
+    Keys belong to scope (the endpoint) and principal (the caller: the authenticated user, or
+    the client address a trusted proxy forwarded; see admission.client_key),
+    so a key reused by someone else never replays their response. The first request with
+    a key claims it in the idempotency_keys table and stores its encoded response for
+    IDEMPOTENCY_TTL_SECONDS; retries on any worker replay it. A duplicate arriving while
+    the first is still running on another worker gets 409; duplicates on the same worker
+    wait for its outcome instead (idempotency_store also keeps completed responses, saving
+    the database round trip for retries that land on the same worker). Failures are not
+    stored: the handlers roll back on error, so a later retry can safely run again.
+    Reusing a key with a different request body is rejected with 422.
+    """
+    if key is None:
+        return RawJSONResponse((await handler()).model_dump_json().encode())
+
+    fingerprint = hashlib.blake2b(request_body.model_dump_json().encode(), digest_size=16).hexdigest()
+    executed = False
+
+    async def load() -> tuple[tuple[str, bytes], tuple[str, ...]]:
+        nonlocal executed
+        claimed_at = datetime.utcnow()
+        stored = await _in_store_session(lambda store: store.claim(scope, principal, key, fingerprint, claimed_at))
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                _reject_reused_key()
+            if stored.response is None:
+                raise HTTPException(status_code=409, detail=f"A request with this {IDEMPOTENCY_KEY_HEADER} is still in progress", headers={"Retry-After": "1"})
+            return (stored.fingerprint, stored.response), ()
+
+        executed = True
+        try:
+            payload = (await handler()).model_dump_json().encode()
+        except BaseException:
+            # Shielded so a cancelled request still frees its key for the client's retry
+            await _settle(asyncio.shield(_in_store_session(lambda store: store.discard(scope, principal, key, claimed_at))), "release")
+            raise
+        await _settle(_in_store_session(lambda store: store.complete(scope, principal, key, claimed_at, payload)), "store the response of")
+        return (fingerprint, payload), ()
+
+    stored_fingerprint, payload = await idempotency_store.get_or_load((scope, principal, key), load)
+    if stored_fingerprint != fingerprint:
+        _reject_reused_key()
+
+    return RawJSONResponse(payload, headers={} if executed else {REPLAYED_HEADER: "true"})
+
+
+def _reject_reused_key() -> None:
+    raise HTTPException(status_code=422, detail=f"{IDEMPOTENCY_KEY_HEADER} was already used with a different request")
+
+
+async def _settle(write: Awaitable[Any], action: str) -> None:
+    # The handler's outcome stands either way; an unsettled claim is taken over after IDEMPOTENCY_LOCK_SECONDS
+    try:
+        await write
+    except Exception:
+        logger.exception("Failed to %s an idempotency key", action)
@@ -0,0 +1,241 @@
+# flake8: noqa: E501
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional, Sequence
+from sqlalchemy import event  # type: ignore
+from sqlalchemy.engine import Engine  # type: ignore
+from sqlalchemy.orm import Mapper  # type: ignore
+from app.core.query_diagnostics import QUERY_DIAGNOSTICS_ENABLED, record_statement, report_repeated_queries
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class RequestMetrics:
+    """
+    Work attributed to one HTTP request; shared with threadpool and greenlet calls through a ContextVar.
+    A request's run_db and threadpool calls may run concurrently on several threads, so every update takes _lock.
+    """
+
+    __slots__ = ("started", "db_seconds", "statements", "rows", "phases", "fingerprints", "_lock")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.statements = 0
+        self.rows = 0
+        # Named non-DB phases such as bcrypt or the payment gateway
+        self.phases: dict[str, float] = {}
+        # Statement fingerprint -> executions, for N+1 detection
+        self.fingerprints: dict[str, int] = {}
+
+    def add_statement(self, seconds: float, rows: int) -> None:
+        with self._lock:
+            self.db_seconds += seconds
+            self.statements += 1
+            self.rows += rows
+
+    def add_rows(self, rows: int) -> None:
+        with self._lock:
+            self.rows += rows
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count_fingerprint(self, key: str) -> int:
+        """Count one execution of a statement fingerprint; returns its executions so far."""
+        with self._lock:
+            count = self.fingerprints[key] = self.fingerprints.get(key, 0) + 1
+            return count
+
+    def snapshot(self) -> tuple[float, int, int, dict[str, float], dict[str, int]]:
+        """(db_seconds, statements, rows, phases, fingerprints), consistent even while a straggling thread still updates them."""
+        with self._lock:
+            return self.db_seconds, self.statements, self.rows, dict(self.phases), dict(self.fingerprints)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (durations in milliseconds)."""
+        db_seconds, statements, _, phases, _ = self.snapshot()
+        entries = [f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}", f'db;dur={db_seconds * 1000:.1f};desc="{statements} queries"']
+        entries.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in phases.items())
+        return ", ".join(entries)
+
+
+current_request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request_metrics", default=None)
+
+
+@contextmanager
+def timed_phase(name: str) -> Iterator[None]:
+    """Attribute the wall time of the block to a named phase of the current request."""
+    metrics = current_request_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_phase(name, time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Count statements, DB time and rows for the current request via cursor execution events,
+    and pass every statement to the slow-query log and N+1 detector.
+    Rows are ORM instances loaded plus rows affected by writes; drivers disagree on rowcount for SELECT.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        if QUERY_DIAGNOSTICS_ENABLED or current_request_metrics.get() is not None:
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        if not conn.info.get("query_started"):
+            return
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        metrics = current_request_metrics.get()
+        if metrics is not None:
+            metrics.add_statement(elapsed, cursor.rowcount if cursor.description is None and cursor.rowcount > 0 else 0)
+        record_statement(conn, statement, parameters, executemany, elapsed, metrics.count_fingerprint if metrics is not None else None)
+
+    if not event.contains(Mapper, "load", _count_loaded_row):
+        event.listen(Mapper, "load", _count_loaded_row)
+
+
+def _count_loaded_row(target: Any, context: Any) -> None:
+    metrics = current_request_metrics.get()
+    if metrics is not None:
+        metrics.add_rows(1)
+
+
+class Histogram:
+    """Prometheus histogram keyed by label values; observed and rendered on the event loop only."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> (per-bucket counts, sum, count)
+        self._series: dict[tuple[str, ...], list[Any]] = {}
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, labels: tuple[str, ...], amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            lines.append(f"{self.name}{{{label_text}}} {value:g}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_duration = Histogram("http_request_duration_seconds", "Request wall time by route.", ("method", "route", "status"), LATENCY_BUCKETS)
+request_db_duration = Histogram("http_request_db_duration_seconds", "Time spent executing SQL per request by route.", ("method", "route"), LATENCY_BUCKETS)
+request_db_statements = Histogram("http_request_db_statements", "SQL statements executed per request by route.", ("method", "route"), STATEMENT_BUCKETS)
+request_db_rows = Counter("http_request_db_rows_total", "ORM rows loaded plus rows affected by writes, by route.", ("method", "route"))
+request_phase_duration = Counter("http_request_phase_seconds_total", "Time spent in named non-DB phases (e.g. bcrypt, payment) by route.", ("method", "route", "phase"))
+request_repeated_queries = Counter("http_request_repeated_queries_total", "Statement fingerprints executed more than REPEATED_QUERY_THRESHOLD times in one request (N+1 suspects), by route.", ("method", "route"))
+admission_rejections = Counter("http_admission_rejections_total", "Requests shed by admission control, by route class and reason (rate_limited, queue_full, deadline_exceeded).", ("class", "reason"))
+
+REGISTRY = (request_duration, request_db_duration, request_db_statements, request_db_rows, request_phase_duration, request_repeated_queries, admission_rejections)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware that measures each HTTP request.
+    Adds a Server-Timing header and records per-route histograms for /metrics.
+    Routes are labelled by their path template, so path parameters do not create new series.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = current_request_metrics.set(metrics)
+        status = 500
+
+        async def send_with_timing(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    message.setdefault("headers", []).append((b"server-timing", metrics.server_timing().encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_metrics.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"))
+            db_seconds, statements, rows, phases, fingerprints = metrics.snapshot()
+            request_duration.observe((*labels, str(status)), time.perf_counter() - metrics.started)
+            request_db_duration.observe(labels, db_seconds)
+            request_db_statements.observe(labels, statements)
+            request_db_rows.inc(labels, rows)
+            for name, seconds in phases.items():
+                request_phase_duration.inc((*labels, name), seconds)
+            flagged = report_repeated_queries(*labels, fingerprints)
+            if flagged:
+                request_repeated_queries.inc(labels, flagged)
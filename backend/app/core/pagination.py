@@ -0,0 +1,32 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+
+def encode_cursor(sort: str, row: Any) -> str:
+    """Build an opaque keyset cursor pointing just past row, keyed on (row.<sort>, row.id)."""
+    value = getattr(row, sort)
+    payload: dict[str, Any] = {"s": sort, "v": value, "id": row.id}
+    if isinstance(value, datetime):
+        payload.update(v=value.isoformat(), t="dt")
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[Any, int]:
+    """
+    Decode a cursor produced by encode_cursor into (sort value, id).
+    Raises ValueError if the cursor is malformed or was issued for another sort order.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, last_id = payload["v"], int(payload["id"])
+        if payload.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if payload.get("s") != sort:
+        raise ValueError("Cursor does not match the requested sort order")
+
+    return value, last_id
@@ -0,0 +1,149 @@
+# flake8: noqa: E501
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+QUERY_DIAGNOSTICS_ENABLED = os.getenv("QUERY_DIAGNOSTICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Statements slower than this are logged with their plan; 0 disables the slow-query log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+# A statement fingerprint executed more than this many times in one request is an N+1 suspect
+REPEATED_QUERY_THRESHOLD = int(os.getenv("REPEATED_QUERY_THRESHOLD", "10"))
+# Raise RepeatedQueryError instead of logging, so test suites fail on new N+1 patterns
+QUERY_DIAGNOSTICS_STRICT = os.getenv("QUERY_DIAGNOSTICS_STRICT", "false").lower() in ("1", "true", "yes")
+# The same slow query or N+1 suspect is logged (and explained) at most once per interval
+QUERY_LOG_INTERVAL_SECONDS = float(os.getenv("QUERY_LOG_INTERVAL_SECONDS", "60"))
+
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN ", "mysql": "EXPLAIN "}
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+# Bind parameters in every DBAPI paramstyle: %(name)s, %s, $1, :name, ?
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RepeatedQueryError(Exception):
+    """Raised in strict mode when one request executes the same statement fingerprint too often."""
+
+
+_repeats_expected: ContextVar[bool] = ContextVar("repeats_expected", default=False)
+
+
+@contextmanager
+def expected_repeated_queries() -> Iterator[None]:
+    """
+    Exempt a block that repeats a statement on purpose (batched writes, per-row locking)
+    from N+1 detection. Slow statements in the block are still logged.
+    """
+    token = _repeats_expected.set(True)
+    try:
+        yield
+    finally:
+        _repeats_expected.reset(token)
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a statement so executions that differ only in literals, bind parameters
+    or IN-list length share one fingerprint.
+    """
+    text = _STRING_LITERAL.sub("?", statement)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("(...)", text)
+    text = _REPEATED_LIST.sub("(...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class _LogThrottle:
+    """Remembers when each key was last logged so hot paths cannot flood the log."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last: dict[Any, float] = {}
+
+    def should_log(self, key: Any) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last.get(key, float("-inf")) < self.interval:
+                return False
+            self._last[key] = now
+            return True
+
+
+_slow_log_throttle = _LogThrottle(QUERY_LOG_INTERVAL_SECONDS)
+_repeat_log_throttle = _LogThrottle(QUERY_LOG_INTERVAL_SECONDS)
+
+
+def record_statement(conn: Any, statement: str, parameters: Any, executemany: bool, elapsed: float, count_fingerprint: Optional[Callable[[str], int]]) -> None:
+    """
+    Called after every cursor execution.
+    Counts the fingerprint for the current request with count_fingerprint (None outside requests),
+    which returns the executions so far, and logs slow statements with their plan.
+    """
+    if not QUERY_DIAGNOSTICS_ENABLED:
+        return
+
+    if count_fingerprint is not None and not _repeats_expected.get():
+        key = fingerprint(statement)
+        count = count_fingerprint(key)
+        if QUERY_DIAGNOSTICS_STRICT and count == REPEATED_QUERY_THRESHOLD + 1:
+            raise RepeatedQueryError(f"Statement executed more than {REPEATED_QUERY_THRESHOLD} times in one request (N+1 suspect): {key}")
+
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        key = fingerprint(statement)
+        if _slow_log_throttle.should_log(key):
+            plan = _explain(conn, statement, parameters) if SLOW_QUERY_EXPLAIN and not executemany else None
+            logger.warning("Slow query (%.1f ms): %s%s", elapsed * 1000, key, f"\nPlan:\n{plan}" if plan else "")
+
+
+def report_repeated_queries(method: str, route: str, fingerprints: dict[str, int]) -> int:
+    """Log the N+1 suspects of a finished request and return how many fingerprints were flagged."""
+    flagged = 0
+    for key, count in fingerprints.items():
+        if count > REPEATED_QUERY_THRESHOLD:
+            flagged += 1
+            if _repeat_log_throttle.should_log((method, route, key)):
+                logger.warning("Repeated query on %s %s (N+1 suspect): executed %d times: %s", method, route, count, key)
+    return flagged
+
+
+def _explain(conn: Any, statement: str, parameters: Any) -> Optional[str]:
+    """
+    Plan of a slow SELECT, fetched on a separate raw cursor so the caller's result is untouched.
+    Runs inside a savepoint on PostgreSQL so a failing EXPLAIN cannot abort the request's transaction.
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or statement.split(None, 1)[0].upper() not in ("SELECT", "WITH"):
+        return None
+
+    savepoint = conn.dialect.name == "postgresql"
+    cursor = conn.connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(" ".join(str(value) for value in row) for row in cursor.fetchall())
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT query_explain")
+            return plan
+        except Exception as e:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_explain")
+            return f"(EXPLAIN failed: {e})"
+    finally:
+        cursor.close()
@@ -0,0 +1,13 @@
+from fastapi.responses import ORJSONResponse, Response  # type: ignore
+
+__all__ = ["ORJSONResponse", "RawJSONResponse"]
+
+
+class RawJSONResponse(Response):
+    """
+    Response for a body that is already encoded JSON.
+    Returning it from a route bypasses response_model validation and re-encoding,
+    so only use it for payloads produced from the declared response schema.
+    """
+
+    media_type = "application/json"
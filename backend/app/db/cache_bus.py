@@ -0,0 +1,158 @@
+# flake8: noqa: E501
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Callable, Optional
+import asyncpg  # type: ignore
+from sqlalchemy.engine import make_url  # type: ignore
+from app.db.session import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# Cross-worker invalidation over PostgreSQL LISTEN/NOTIFY; other databases keep caches process-local
+CACHE_BUS_ENABLED = os.getenv("CACHE_BUS_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_BUS_CHANNEL = os.getenv("CACHE_BUS_CHANNEL", "cache_invalidation")
+# Idle connections are probed this often so a dead listener is noticed and replaced
+CACHE_BUS_KEEPALIVE_SECONDS = float(os.getenv("CACHE_BUS_KEEPALIVE_SECONDS", "5"))
+CACHE_BUS_RECONNECT_SECONDS = float(os.getenv("CACHE_BUS_RECONNECT_SECONDS", "1"))
+
+# Keeps NOTIFY payloads well under PostgreSQL's 8000-byte limit
+MAX_IDS_PER_EVENT = 500
+
+
+class CacheBus:
+    """
+    Broadcasts cache invalidations between workers sharing one PostgreSQL database.
+
+    Writers evict their own entries and publish an event; every other worker's listener
+    applies the same eviction as soon as the NOTIFY arrives. One dedicated asyncpg
+    connection per worker both listens and publishes. After the connection is lost, events
+    may have been missed, so every subscriber's cache is cleared on reconnect.
+    """
+
+    def __init__(self, database_url: str, channel: str, enabled: bool) -> None:
+        url = make_url(database_url)
+        self.enabled = enabled and url.get_backend_name() == "postgresql"
+        self.channel = channel
+        self._dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        # Identifies this worker's own events, which were already applied locally
+        self.origin = uuid.uuid4().hex
+        self._handlers: dict[str, Callable[[dict[str, Any]], None]] = {}
+        self._resyncs: list[Callable[[], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+        self.last_lag_ms: Optional[float] = None
+        self.max_lag_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def subscribe(self, topic: str, handler: Callable[[dict[str, Any]], None], resync: Callable[[], None]) -> None:
+        """Apply other workers' events on topic with handler; resync drops everything the topic covers."""
+        self._handlers[topic] = handler
+        self._resyncs.append(resync)
+
+    def publish(self, topic: str, **fields: Any) -> None:
+        """Queue an event for the other workers. Safe to call from any thread; a no-op while the bus is not running."""
+        loop, queue = self._loop, self._queue
+        if loop is None or queue is None:
+            return
+        payload = json.dumps({"origin": self.origin, "topic": topic, "sent_at": time.time(), **fields}, separators=(",", ":"))
+        loop.call_soon_threadsafe(queue.put_nowait, payload)
+
+    def start(self) -> None:
+        """Start the listener (called from the application lifespan)."""
+        if self.enabled and self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+        self._queue = None
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        retry: Optional[str] = None
+        missed_events = False
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self._dsn)
+                await conn.add_listener(self.channel, self._on_notification)
+                self.connected = True
+                if missed_events:
+                    self.reconnects += 1
+                    self._resync()
+                    missed_events = False
+
+                while True:
+                    if retry is None:
+                        try:
+                            retry = await asyncio.wait_for(self._queue.get(), CACHE_BUS_KEEPALIVE_SECONDS)
+                        except asyncio.TimeoutError:
+                            await conn.execute("SELECT 1")
+                            continue
+                    await conn.execute("SELECT pg_notify($1, $2)", self.channel, retry)
+                    retry = None
+                    self.published += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                missed_events = True
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("Cache invalidation bus disconnected, reconnecting: %s", e)
+                await asyncio.sleep(CACHE_BUS_RECONNECT_SECONDS)
+            finally:
+                self.connected = False
+                if conn is not None:
+                    conn.terminate()
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        event = json.loads(payload)
+        if event["origin"] == self.origin:
+            return
+        self.received += 1
+        lag_ms = (time.time() - event["sent_at"]) * 1000
+        self.last_lag_ms = round(lag_ms, 2)
+        self.max_lag_ms = round(max(lag_ms, self.max_lag_ms or 0.0), 2)
+        handler = self._handlers.get(event["topic"])
+        if handler is not None:
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Failed to apply cache invalidation event %s", payload)
+
+    def _resync(self) -> None:
+        logger.warning("Cache invalidation events may have been missed; clearing subscribed caches")
+        for resync in self._resyncs:
+            resync()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "connected": self.connected,
+            "channel": self.channel,
+            "published": self.published,
+            "received": self.received,
+            "reconnects": self.reconnects,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms,
+            "last_error": self.last_error,
+        }
+
+
+cache_bus = CacheBus(DATABASE_URL, CACHE_BUS_CHANNEL, CACHE_BUS_ENABLED)
@@ -0,0 +1,294 @@
+# flake8: noqa: E501
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncGenerator, Callable, Generator, Optional, TypeVar
+from fastapi import Request  # type: ignore
+from sqlalchemy import create_engine, text  # type: ignore
+from sqlalchemy.engine import make_url  # type: ignore
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError  # type: ignore
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # type: ignore
+from sqlalchemy.orm import sessionmaker  # type: ignore
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool  # type: ignore
+from starlette.concurrency import run_in_threadpool  # type: ignore
+from app.core.metrics import instrument_engine
+from app.core.security import decode_access_token
+from app.db.cache_bus import cache_bus
+from app.db.session import USE_ASYNC, DbSession, SessionLocal, pool_options, run_db
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Comma-separated read replica URLs using the same driver as DATABASE_URL; unset sends every read to the primary
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", "5"))
+REPLICA_HEALTH_CHECK_TIMEOUT = float(os.getenv("REPLICA_HEALTH_CHECK_TIMEOUT", "2"))
+# How long reads stay on the primary after a write they must observe (covers replication lag)
+REPLICA_PIN_SECONDS = float(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
+# Pin key for catalog reads after an admin product write (stock changes from checkout do not pin)
+CATALOG_PIN = "catalog"
+# Pin key for product cache fills, set by every catalog invalidation including checkout's
+CATALOG_FILL_PIN = "catalog:fill"
+
+# Cache bus topic for pins that every worker must apply
+PINS_TOPIC = "pins"
+
+
+def user_pin(username: str) -> str:
+    return f"user:{username}"
+
+
+class PrimaryPins:
+    """
+    Keys whose reads must go to the primary until a recent write has replicated.
+    Process-local; pin_primary also sends the pin to the other workers over the cache bus.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self._lock = threading.Lock()
+        self._expires: dict[str, float] = {}
+
+    def pin(self, *keys: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._expires) > 10000:
+                self._expires = {key: expires for key, expires in self._expires.items() if expires > now}
+            for key in keys:
+                self._expires[key] = now + self.seconds
+
+    def is_pinned(self, *keys: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            return any(self._expires.get(key, 0.0) > now for key in keys)
+
+    def active(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for expires in self._expires.values() if expires > now)
+
+
+class Replica:
+    """
+    One read replica: its engine, session factory and health.
+    Pools use the primary's DB_POOL_* settings but are not counted in /api/system/pool.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.name = make_url(url).render_as_string(hide_password=True)
+        if USE_ASYNC:
+            self.async_engine: Any = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, **pool_options)
+            self.engine = self.async_engine.sync_engine
+            self.session_factory: Callable[[], Any] = async_sessionmaker(bind=self.async_engine, autoflush=False, expire_on_commit=False)
+        else:
+            self.async_engine = None
+            self.engine = create_engine(url, poolclass=QueuePool, **pool_options)
+            self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        instrument_engine(self.engine)
+        self.healthy = True
+        self.selected = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    async def ping(self) -> None:
+        if self.async_engine is not None:
+            async with self.async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        else:
+            await run_in_threadpool(self._ping_sync)
+
+    def _ping_sync(self) -> None:
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    def mark_down(self, error: BaseException) -> None:
+        if self.healthy:
+            logger.warning("Read replica %s marked unhealthy: %s", self.name, error)
+        self.healthy = False
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def mark_up(self) -> None:
+        if not self.healthy:
+            logger.warning("Read replica %s is healthy again", self.name)
+        self.healthy = True
+
+    def stats(self) -> dict[str, Any]:
+        return {"name": self.name, "healthy": self.healthy, "selected": self.selected, "failures": self.failures, "last_error": self.last_error}
+
+
+class ReplicaSet:
+    """
+    Round-robin selection over healthy replicas.
+    A replica is taken out of rotation when a health check or a request on it hits a
+    connection error, and put back by the next successful health check.
+    """
+
+    def __init__(self, urls: list[str], pins: PrimaryPins) -> None:
+        self.replicas = [Replica(url) for url in urls]
+        self.pins = pins
+        self.primary_reads = 0
+        self.primary_fills = 0
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self, *pin_keys: str) -> Optional[Replica]:
+        """Next healthy replica, or None when the read must (or can only) go to the primary."""
+        if not self.replicas:
+            return None
+        pinned = self.pins.is_pinned(*pin_keys)
+        with self._lock:
+            if pinned:
+                self.primary_reads += 1
+                return None
+            healthy = [replica for replica in self.replicas if replica.healthy]
+            if not healthy:
+                self.primary_reads += 1
+                return None
+            replica = healthy[next(self._counter) % len(healthy)]
+            replica.selected += 1
+            return replica
+
+    async def check_health(self) -> None:
+        for replica in self.replicas:
+            try:
+                await asyncio.wait_for(replica.ping(), REPLICA_HEALTH_CHECK_TIMEOUT)
+            except Exception as e:
+                replica.mark_down(e)
+            else:
+                replica.mark_up()
+
+    def start(self) -> None:
+        """Start the background health checks (called from the application lifespan)."""
+        if self.replicas and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run_health_checks())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+            else:
+                replica.engine.dispose()
+
+    async def _run_health_checks(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(REPLICA_HEALTH_CHECK_INTERVAL)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "replicas": [replica.stats() for replica in self.replicas],
+            "primary_reads": self.primary_reads,
+            "primary_fills": self.primary_fills,
+            "pinned_keys": self.pins.active(),
+            "pin_seconds": self.pins.seconds,
+        }
+
+
+primary_pins = PrimaryPins(REPLICA_PIN_SECONDS)
+replica_set = ReplicaSet(DATABASE_REPLICA_URLS, primary_pins)
+
+
+def pin_primary(*keys: str) -> None:
+    """Pin keys in this worker and every other one, so the writer's next request sees its write wherever it lands."""
+    primary_pins.pin(*keys)
+    cache_bus.publish(PINS_TOPIC, keys=list(keys))
+
+
+# Pins missed while disconnected have no cache to drop; they expire within REPLICA_PIN_SECONDS anyway
+cache_bus.subscribe(PINS_TOPIC, lambda event: primary_pins.pin(*event["keys"]), resync=lambda: None)
+
+
+def _catalog_pin_keys(request: Request) -> list[str]:
+    return [CATALOG_PIN]
+
+
+def _user_pin_keys(request: Request) -> list[str]:
+    """Pin of the user the bearer token belongs to, if any."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        username = decode_access_token(token)
+        if username is not None:
+            return [user_pin(username)]
+    return []
+
+
+def _is_connection_error(error: BaseException) -> bool:
+    return isinstance(error, (OperationalError, InterfaceError)) or (isinstance(error, DBAPIError) and error.connection_invalidated)
+
+
+def _read_db_dependency(pin_keys: Callable[[Request], list[str]]) -> Callable[..., Any]:
+    """
+    Build a request-scoped session dependency for read-only routes.
+    The session uses a healthy replica unless one of the request's pin keys was written recently.
+    """
+
+    def _get_sync_read_db(request: Request) -> Generator:
+        replica = replica_set.choose(*pin_keys(request))
+        db = (replica.session_factory if replica else SessionLocal)()
+        try:
+            yield db
+        except Exception as e:
+            if replica is not None and _is_connection_error(e):
+                replica.mark_down(e)
+            raise
+        finally:
+            db.close()
+
+    async def _get_async_read_db(request: Request) -> AsyncGenerator:
+        replica = replica_set.choose(*pin_keys(request))
+        async with (replica.session_factory if replica else SessionLocal)() as db:
+            try:
+                yield db
+            except Exception as e:
+                if replica is not None and _is_connection_error(e):
+                    replica.mark_down(e)
+                raise
+
+    return _get_async_read_db if USE_ASYNC else _get_sync_read_db
+
+
+# Catalog reads stay on the primary for a while after any product write
+get_catalog_read_db = _read_db_dependency(_catalog_pin_keys)
+# Per-user reads (profile, order history) stay on the primary after that user's own writes
+get_user_read_db = _read_db_dependency(_user_pin_keys)
+
+
+def is_replica_session(db: DbSession) -> bool:
+    return any(db.bind is replica.engine or db.bind is replica.async_engine for replica in replica_set.replicas)
+
+
+async def run_catalog_fill(db: DbSession, fn: Callable[..., T]) -> T:
+    """
+    run_db for a load that fills the shared product cache.
+    While CATALOG_FILL_PIN is set, a replica may not have replicated the write that evicted
+    the entry yet, and its rows would stay cached for the whole TTL; such loads run in a
+    short primary session instead of the request's replica session.
+    """
+    if not (primary_pins.is_pinned(CATALOG_FILL_PIN) and is_replica_session(db)):
+        return await run_db(db, fn)
+    replica_set.primary_fills += 1
+    if USE_ASYNC:
+        async with SessionLocal() as primary:
+            return await run_db(primary, fn)
+    with SessionLocal() as primary:
+        return await run_db(primary, fn)
+
+
+def catalog_read_session_factory() -> Callable[[], Any]:
+    """Session factory for catalog reads outside a request dependency, e.g. streaming exports."""
+    replica = replica_set.choose(CATALOG_PIN)
+    return replica.session_factory if replica else SessionLocal
@@ -0,0 +1,45 @@
+"""
+Full-text search schema for the products table.
+
+Postgres: a generated, weighted tsvector column with a GIN index plus a pg_trgm
+index on name for typo-tolerant matching (also created by infra/db/init.sql).
+SQLite: an external-content FTS5 table kept in sync by triggers.
+"""
+from sqlalchemy import DDL, Table, event  # type: ignore
+
+TEXT_SEARCH_CONFIG = "english"
+
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(description, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops)",
+]
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(name, description, category, content='products', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category) VALUES (new.id, new.name, new.description, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category) VALUES ('delete', old.id, old.name, old.description, old.category);
+    END""",
+    # Only the indexed columns; stock and price updates at checkout leave the FTS row alone
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, category ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category) VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO products_fts(rowid, name, description, category) VALUES (new.id, new.name, new.description, new.category);
+    END""",
+]
+
+
+def install_search_ddl(table: Table) -> None:
+    """Create the search objects whenever the products table is created through SQLAlchemy metadata."""
+    for statement in POSTGRES_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in SQLITE_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(table, "after_drop", DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"))
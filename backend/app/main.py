@@ -1,9 +1,42 @@
+import math
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from fastapi import FastAPI, Request  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
-from fastapi.responses import JSONResponse  # type: ignore
-from app.api import products, payments, orders, auth
+from fastapi.responses import JSONResponse, PlainTextResponse  # type: ignore
+from app.api import products, payments, orders, auth, system, analytics
+from app.core.admission import AdmissionControlMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import METRICS_ENABLED, RequestMetricsMiddleware, render_metrics
+from app.core.hashing import PasswordHashPoolSaturated, password_hasher
+from app.core.responses import ORJSONResponse
+from app.db.cache_bus import cache_bus
+from app.db.replicas import replica_set
+from app.services.order_service import reservation_reaper
+from app.services.payment_gateway import PaymentGatewayUnavailable, payment_gateway
 
-app = FastAPI(title="E-Commerce Mock API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    replica_set.start()
+    cache_bus.start()
+    reservation_reaper.start()
+    yield
+    await reservation_reaper.stop()
+    password_hasher.shutdown()
+    await payment_gateway.aclose()
+    await replica_set.stop()
+    await cache_bus.stop()
+
+
+# Model responses are encoded with orjson; hot product reads bypass this with RawJSONResponse
+app = FastAPI(title="E-Commerce Mock API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# Innermost, so compression runs within the request's admission slot and its time is in the metrics
+app.add_middleware(CompressionMiddleware)
+
+# Added before CORS so it runs inside CORS (rejections still carry CORS headers) and inside metrics (shed requests are counted)
+app.add_middleware(AdmissionControlMiddleware)
 
 # Configure CORS middleware
 app.add_middleware(
@@ -12,8 +45,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed", "Server-Timing", "Retry-After"],
 )
 
+# Added last so it wraps CORS and the HTTPException handlers; unhandled errors are recorded as 500
+app.add_middleware(RequestMetricsMiddleware)
+
+
+# Backpressure from the password hashing pool
+@app.exception_handler(PasswordHashPoolSaturated)
+async def password_hash_pool_saturated_handler(request: Request, exc: PasswordHashPoolSaturated):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+# Payment gateway timed out, kept failing, or its circuit breaker is open
+@app.exception_handler(PaymentGatewayUnavailable)
+async def payment_gateway_unavailable_handler(request: Request, exc: PaymentGatewayUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))})
+
 
 # Global exception handler for standard JSON error format
 @app.exception_handler(Exception)
@@ -26,3 +75,15 @@ app.include_router(auth.router)
 app.include_router(products.router)
 app.include_router(payments.router)
 app.include_router(orders.router)
+app.include_router(system.router)
+app.include_router(analytics.router)
+
+
+if METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> PlainTextResponse:
+        """
+        Per-route request latency, SQL time and statement count histograms in the Prometheus text format.
+        """
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -3,5 +3,11 @@ from app.models.product import Product
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.user import User
+from app.models.daily_sales import DailySales
+from app.models.product_sales import ProductSales
+from app.models.category_sales import CategorySales
+from app.models.stock_reservation import StockReservation
+from app.models.catalog_version import CatalogVersion
+from app.models.idempotency_key import IdempotencyKey
 
-__all__ = ["Product", "Order", "OrderItem", "User"]
+__all__ = ["Product", "Order", "OrderItem", "User", "DailySales", "ProductSales", "CategorySales", "StockReservation", "CatalogVersion", "IdempotencyKey"]
@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, DateTime, Integer  # type: ignore
+from app.db.base import Base
+
+
+class CatalogVersion(Base):
+    """
+    Single row (id 1) bumped whenever products are added or removed.
+    Together with max(products.updated_at) it versions the catalog for conditional GET
+    without counting the products table.
+    """
+
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    revision = Column(BigInteger, nullable=False, default=0)
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
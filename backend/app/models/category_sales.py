@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Column, Integer, String  # type: ignore
+from app.db.base import Base
+
+
+class CategorySales(Base):
+    """All-time sales rollup per product category, maintained in the order transaction."""
+
+    __tablename__ = "category_sales"
+
+    # Empty string for products without a category (primary keys cannot be NULL)
+    category = Column(String(100), primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(BigInteger, nullable=False, default=0)
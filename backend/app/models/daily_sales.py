@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Column, Date, Integer  # type: ignore
+from app.db.base import Base
+
+
+class DailySales(Base):
+    """Revenue rollup per UTC day, maintained in the order transaction."""
+
+    __tablename__ = "daily_sales"
+
+    day = Column(Date, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(BigInteger, nullable=False, default=0)
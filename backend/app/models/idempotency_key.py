@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Index, Integer, LargeBinary, String, UniqueConstraint  # type: ignore
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    An Idempotency-Key seen by a non-idempotent POST, shared by every worker.
+    Keys are unique per endpoint and caller, so one client cannot replay another's response.
+    response is NULL while the first request is still running.
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("scope", "principal", "key", name="uq_idempotency_keys_scope_principal_key"),
+        Index("idx_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # Endpoint, e.g. "orders"
+    scope = Column(String(64), nullable=False)
+    # Caller the key belongs to: "user:<username>" or "client:<address>"
+    principal = Column(String(255), nullable=False)
+    key = Column(String(255), nullable=False)
+    # Digest of the request body the key was first used with
+    fingerprint = Column(String(32), nullable=False)
+    response = Column(LargeBinary)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime  # type: ignore
+from sqlalchemy import Column, Integer, String, DateTime, Index  # type: ignore
 from sqlalchemy.orm import relationship  # type: ignore
 from datetime import datetime
 from app.db.base import Base
@@ -6,6 +6,10 @@ from app.db.base import Base
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Serves the per-user history query: filter by user, newest first
+        Index("idx_orders_user_id_created_at", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String(100), nullable=False)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, ForeignKey  # type: ignore
+from sqlalchemy import Column, Integer, ForeignKey, Index  # type: ignore
 from sqlalchemy.orm import relationship  # type: ignore
 from app.db.base import Base
 
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        # Used by selectinload(Order.items) when loading a page of order history
+        Index("idx_order_items_order_id", "order_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
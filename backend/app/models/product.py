@@ -1,12 +1,24 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime  # type: ignore
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index  # type: ignore
 from datetime import datetime
 from app.db.base import Base
+from app.db.search import install_search_ddl
 
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination indexes for the (sort, id) orderings
+        Index("idx_products_created_at_id", "created_at", "id"),
+        Index("idx_products_price_id", "price", "id"),
+        # Category filter, also ordered for keyset pagination within a category
+        Index("idx_products_category_created_at_id", "category", "created_at", "id"),
+        # Catalog version (max updated_at) for conditional GET
+        Index("idx_products_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    # Supplier natural key used by bulk import upserts; optional for hand-entered products
+    sku = Column(String(64), unique=True)
     name = Column(String(255), nullable=False)
     description = Column(Text)
     price = Column(Integer, nullable=False)
@@ -20,3 +32,6 @@ class Product(Base):
         default=datetime.utcnow,
         onupdate=datetime.utcnow
     )
+
+
+install_search_ddl(Product.__table__)
@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer  # type: ignore
+from app.db.base import Base
+
+
+class ProductSales(Base):
+    """All-time sales rollup per product, maintained in the order transaction."""
+
+    __tablename__ = "product_sales"
+    __table_args__ = (
+        # Top sellers by units or by revenue without sorting the whole table
+        Index("idx_product_sales_units", "units", "product_id"),
+        Index("idx_product_sales_revenue", "revenue", "product_id"),
+    )
+
+    # No foreign key: rollups are derived data and must not block product deletes
+    product_id = Column(Integer, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(BigInteger, nullable=False, default=0)
+    last_sold_at = Column(DateTime)
@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import JSON, Column, DateTime, Index, Integer  # type: ignore
+from app.db.base import Base
+
+
+class StockReservation(Base):
+    """
+    Stock decremented for an order that is not yet paid for.
+    Deleted in the transaction that records the order or returns the stock; rows past
+    expires_at belong to checkouts that never finished and are released by the reaper.
+    """
+
+    __tablename__ = "stock_reservations"
+    __table_args__ = (Index("idx_stock_reservations_expires_at", "expires_at"),)
+
+    id = Column(Integer, primary_key=True)
+    # [{"product_id": ..., "quantity": ...}] per distinct product
+    lines = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
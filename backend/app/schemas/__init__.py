@@ -1,12 +1,19 @@
 from .product import (
     ProductBase,
     ProductResponse,
+    CategoryFacet,
     ProductListResponse,
+    ProductBatchRequest,
+    ProductBatchResponse,
+    ProductImportRow,
+    ProductImportError,
+    ProductImportResult,
 )
 from .order import (
     OrderItemCreate,
     OrderCreate,
     OrderItemResponse,
+    OrderSummaryResponse,
     OrderResponse,
 )
 from .user import (
@@ -19,14 +26,23 @@ from .user import (
     LoginRequest,
     PasswordChangeRequest,
 )
+from .analytics import DailySalesResponse, ProductSalesResponse, CategorySalesResponse, SalesRollupRebuildResponse
+from .system import PoolStatsResponse, CacheStatsResponse, CacheSettingsUpdate, PasswordHashPoolStatsResponse, CircuitBreakerStatsResponse, PaymentGatewayStatsResponse, ReplicaStatsResponse, ReplicaSetStatsResponse, AdmissionClassStatsResponse, AdmissionStatsResponse, CacheBusStatsResponse
 
 __all__ = [
     "ProductBase",
     "ProductResponse",
+    "CategoryFacet",
     "ProductListResponse",
+    "ProductBatchRequest",
+    "ProductBatchResponse",
+    "ProductImportRow",
+    "ProductImportError",
+    "ProductImportResult",
     "OrderItemCreate",
     "OrderCreate",
     "OrderItemResponse",
+    "OrderSummaryResponse",
     "OrderResponse",
     "UserBase",
     "UserCreate",
@@ -36,4 +52,19 @@ __all__ = [
     "TokenData",
     "LoginRequest",
     "PasswordChangeRequest",
+    "DailySalesResponse",
+    "ProductSalesResponse",
+    "CategorySalesResponse",
+    "SalesRollupRebuildResponse",
+    "PoolStatsResponse",
+    "CacheStatsResponse",
+    "CacheSettingsUpdate",
+    "PasswordHashPoolStatsResponse",
+    "CircuitBreakerStatsResponse",
+    "PaymentGatewayStatsResponse",
+    "ReplicaStatsResponse",
+    "ReplicaSetStatsResponse",
+    "AdmissionClassStatsResponse",
+    "AdmissionStatsResponse",
+    "CacheBusStatsResponse",
 ]
@@ -0,0 +1,34 @@
+from pydantic import BaseModel  # type: ignore
+from typing import Optional
+from datetime import date, datetime
+
+
+class DailySalesResponse(BaseModel):
+    day: date
+    orders: int
+    units: int
+    revenue: int
+
+    class Config:
+        from_attributes = True
+
+
+class ProductSalesResponse(BaseModel):
+    product_id: int
+    name: Optional[str] = None
+    orders: int
+    units: int
+    revenue: int
+    last_sold_at: Optional[datetime] = None
+
+
+class CategorySalesResponse(BaseModel):
+    category: Optional[str] = None
+    units: int
+    revenue: int
+
+
+class SalesRollupRebuildResponse(BaseModel):
+    days: int
+    products: int
+    categories: int
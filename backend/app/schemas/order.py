@@ -23,12 +23,18 @@ class OrderItemResponse(BaseModel):
         from_attributes = True
 
 
-class OrderResponse(BaseModel):
+class OrderSummaryResponse(BaseModel):
     id: int
     user_id: str
     total_amount: int
     status: str
     created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class OrderResponse(OrderSummaryResponse):
     items: List[OrderItemResponse]
 
     class Config:
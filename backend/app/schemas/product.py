@@ -1,9 +1,10 @@
-from pydantic import BaseModel  # type: ignore
-from typing import Optional, List
+from pydantic import BaseModel, Field  # type: ignore
+from typing import Dict, Optional, List
 from datetime import datetime
 
 
 class ProductBase(BaseModel):
+    sku: Optional[str] = None
     name: str
     description: Optional[str] = None
     price: int
@@ -21,11 +22,30 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+class CategoryFacet(BaseModel):
+    category: Optional[str] = None
+    count: int
+
+
 class ProductListResponse(BaseModel):
     items: List[ProductResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    total_estimated: bool = False
+    page: Optional[int] = None
     page_size: int
+    next_cursor: Optional[str] = None
+    # Only present when requested with facets=true
+    facets: Optional[List[CategoryFacet]] = None
+
+
+class ProductBatchRequest(BaseModel):
+    ids: List[int] = Field(min_length=1)
+
+
+class ProductBatchResponse(BaseModel):
+    # Keyed by product id, in request order
+    items: Dict[int, ProductResponse]
+    not_found: List[int]
 
 
 class ProductCreate(BaseModel):
@@ -42,3 +62,28 @@ class ProductUpdate(BaseModel):
     price: Optional[int] = None
     stock: Optional[int] = None
     image_url: Optional[str] = None
+
+
+class ProductImportRow(BaseModel):
+    """One NDJSON line or CSV record of a bulk import; unknown fields (e.g. id) are ignored."""
+    sku: str = Field(min_length=1, max_length=64)
+    name: str = Field(min_length=1, max_length=255)
+    description: Optional[str] = None
+    price: int = Field(ge=0)
+    stock: int = Field(ge=0)
+    image_url: Optional[str] = Field(None, max_length=512)
+    category: Optional[str] = Field(None, max_length=100)
+
+
+class ProductImportError(BaseModel):
+    line: int
+    sku: Optional[str] = None
+    error: str
+
+
+class ProductImportResult(BaseModel):
+    processed: int
+    upserted: int
+    failed: int
+    errors: List[ProductImportError]
+    errors_truncated: bool = False
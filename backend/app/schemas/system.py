@@ -0,0 +1,107 @@
+from pydantic import BaseModel  # type: ignore
+from typing import List, Optional
+
+
+class PoolStatsResponse(BaseModel):
+    pool_class: str
+    size: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    checked_in: Optional[int] = None
+    checkouts: int
+    timeouts: int
+    wait_ms_avg: float
+    wait_ms_max: float
+
+
+class CacheStatsResponse(BaseModel):
+    enabled: bool
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    coalesced: int
+
+
+class CacheSettingsUpdate(BaseModel):
+    enabled: bool
+
+
+class PasswordHashPoolStatsResponse(BaseModel):
+    executor: str
+    workers: int
+    max_pending: int
+    pending: int
+    completed: int
+    rejected: int
+
+
+class CircuitBreakerStatsResponse(BaseModel):
+    state: str
+    consecutive_failures: int
+    failure_threshold: int
+    reset_seconds: float
+    opened: int
+    rejected: int
+
+
+class PaymentGatewayStatsResponse(BaseModel):
+    gateway: str
+    requests: int
+    retries: int
+    failures: int
+    breaker: Optional[CircuitBreakerStatsResponse] = None
+
+
+class ReplicaStatsResponse(BaseModel):
+    name: str
+    healthy: bool
+    selected: int
+    failures: int
+    last_error: Optional[str] = None
+
+
+class ReplicaSetStatsResponse(BaseModel):
+    replicas: List[ReplicaStatsResponse]
+    primary_reads: int
+    primary_fills: int
+    pinned_keys: int
+    pin_seconds: float
+
+
+class AdmissionClassStatsResponse(BaseModel):
+    name: str
+    concurrency: int
+    max_queue: int
+    queue_timeout: float
+    rate: float
+    burst: int
+    active: int
+    waiting: int
+    admitted: int
+    queued: int
+    queue_wait_seconds: float
+    rate_limited: int
+    queue_full: int
+    deadline_exceeded: int
+
+
+class AdmissionStatsResponse(BaseModel):
+    enabled: bool
+    classes: List[AdmissionClassStatsResponse]
+
+
+class CacheBusStatsResponse(BaseModel):
+    enabled: bool
+    connected: bool
+    channel: str
+    published: int
+    received: int
+    reconnects: int
+    last_lag_ms: Optional[float] = None
+    max_lag_ms: Optional[float] = None
+    last_error: Optional[str] = None
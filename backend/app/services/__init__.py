@@ -1,6 +1,10 @@
 # Business logic services package
-from app.services.product_service import ProductService
+from app.services.search_service import ProductSearchService
+from app.services.product_service import ProductService, AsyncProductService
+from app.services.product_bulk_service import ProductBulkService, AsyncProductBulkService
 from app.services.payment_service import PaymentService
-from app.services.order_service import OrderService
+from app.services.payment_gateway import PaymentDeclined, PaymentGatewayUnavailable
+from app.services.stock_service import StockService, InsufficientStockError
+from app.services.order_service import OrderService, AsyncOrderService
 
-__all__ = ["ProductService", "PaymentService", "OrderService"]
+__all__ = ["ProductService", "ProductSearchService", "PaymentService", "PaymentDeclined", "PaymentGatewayUnavailable", "StockService", "InsufficientStockError", "OrderService", "AsyncProductService", "AsyncOrderService", "ProductBulkService", "AsyncProductBulkService"]
@@ -0,0 +1,93 @@
+# flake8: noqa: E501
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete, select, update  # type: ignore
+from sqlalchemy.exc import IntegrityError  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+from app.models.idempotency_key import IdempotencyKey
+
+# How long a completed response is replayed
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# A key claimed this long ago without a response belongs to a request that died; the next retry takes it over
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+
+
+@dataclass(frozen=True)
+class StoredRequest:
+    """A key already claimed by an earlier request; response is None while that request is running."""
+
+    fingerprint: str
+    response: Optional[bytes]
+
+
+class IdempotencyService:
+    """Database side of Idempotency-Key handling; every method runs and commits its own short transaction."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def claim(self, scope: str, principal: str, key: str, fingerprint: str, now: datetime) -> Optional[StoredRequest]:
+        """
+        Claim key for a new request at time now, which then identifies the claim in complete and discard.
+        Returns None when the caller now owns the key and must run the request, otherwise the
+        earlier request's fingerprint and (possibly pending) response.
+        Expired keys and keys abandoned by a crashed request are taken over.
+        """
+        try:
+            self.db.add(IdempotencyKey(scope=scope, principal=principal, key=key, fingerprint=fingerprint, created_at=now, expires_at=now + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)))
+            self.db.commit()
+            return None
+        except IntegrityError:
+            self.db.rollback()
+
+        row = self.db.execute(
+            select(IdempotencyKey.id, IdempotencyKey.fingerprint, IdempotencyKey.response, IdempotencyKey.created_at, IdempotencyKey.expires_at).where(
+                IdempotencyKey.scope == scope, IdempotencyKey.principal == principal, IdempotencyKey.key == key
+            )
+        ).one_or_none()
+        abandoned = row is not None and row.response is None and row.created_at <= now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+        if row is not None and row.expires_at > now and not abandoned:
+            return StoredRequest(fingerprint=row.fingerprint, response=row.response)
+
+        if row is None:
+            # Discarded between our INSERT and SELECT; the earlier request failed, so run this one
+            return self.claim(scope, principal, key, fingerprint, now)
+
+        # Compare-and-set on created_at so only one of several concurrent retries takes the key over
+        result = self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == row.id, IdempotencyKey.created_at == row.created_at)
+            .values(fingerprint=fingerprint, response=None, created_at=now, expires_at=now + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        if result.rowcount == 1:
+            return None
+        return StoredRequest(fingerprint=fingerprint, response=None)
+
+    def complete(self, scope: str, principal: str, key: str, claimed_at: datetime, response: bytes) -> None:
+        """Store the response of the request that claimed key at claimed_at (unless its claim was taken over)."""
+        self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.scope == scope, IdempotencyKey.principal == principal, IdempotencyKey.key == key, IdempotencyKey.created_at == claimed_at)
+            .values(response=response)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+
+    def discard(self, scope: str, principal: str, key: str, claimed_at: datetime) -> None:
+        """Release a claim whose request failed, so a retry with the same key runs again."""
+        self.db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.scope == scope, IdempotencyKey.principal == principal, IdempotencyKey.key == key, IdempotencyKey.created_at == claimed_at)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """Delete keys past their expiry; returns how many were removed."""
+        result = self.db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= (now or datetime.utcnow())).execution_options(synchronize_session=False))
+        self.db.commit()
+        return result.rowcount
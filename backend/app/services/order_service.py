@@ -1,27 +1,79 @@
 # flake8: noqa: E501
+import asyncio
+import logging
+import os
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from typing import Optional, Any
-from sqlalchemy.orm import Session  # type: ignore
+from sqlalchemy import delete, insert, select, tuple_  # type: ignore
+from sqlalchemy.orm import Session, selectinload  # type: ignore
+from app.core.pagination import decode_cursor, encode_cursor
+from app.db.replicas import pin_primary, user_pin
+from app.db.session import USE_ASYNC, DbSession, SessionLocal, run_db
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.product import Product
-from app.schemas.order import OrderCreate, OrderResponse, OrderItemCreate
+from app.models.stock_reservation import StockReservation
+from app.schemas.order import OrderCreate, OrderResponse, OrderItemCreate, OrderSummaryResponse
+from app.services.payment_gateway import PaymentDeclined, PaymentGatewayUnavailable
 from app.services.payment_service import PaymentService
+from app.services.product_service import invalidate_product_cache
+from app.services.sales_rollup_service import SalesRollupService
+from app.services.stock_service import InsufficientStockError, StockService
+
+logger = logging.getLogger(__name__)
+
+# Reserved stock not paid for within this many seconds is returned by the reaper.
+# Must exceed the longest checkout: the payment deadline plus saving the order.
+STOCK_RESERVATION_TTL_SECONDS = float(os.getenv("STOCK_RESERVATION_TTL_SECONDS", "120"))
+RESERVATION_REAPER_INTERVAL_SECONDS = float(os.getenv("RESERVATION_REAPER_INTERVAL_SECONDS", "30"))
+# Expired reservations released per reaper transaction
+RESERVATION_REAPER_BATCH_SIZE = int(os.getenv("RESERVATION_REAPER_BATCH_SIZE", "100"))
+
+
+class ReservationExpiredError(Exception):
+    """The reservation was released (by the reaper) before the order could be saved."""
+
+
+@dataclass(frozen=True)
+class OrderReservation:
+    """Priced order lines whose stock has been reserved but not yet paid for."""
+
+    reservation_id: int
+    total_amount: int
+    items: list[dict[str, int]]
+    # Category of each product at pricing time, for the sales rollups
+    categories: dict[int, Optional[str]] = field(default_factory=dict)
 
 
 class OrderService:
     def __init__(self, db: Session) -> None:
         self.db = db
-        self.payment_service = PaymentService()
+        self.stock_service = StockService(db)
 
-    def validate_order_items(self, items: list[OrderItemCreate]) -> Optional[str]:
+    def get_products_by_ids(self, product_ids: list[int]) -> dict[int, Product]:
         """
-        Validate order items.
-        BUG-BE-001: Intentionally omits stock check - orders succeed even when stock is zero.
+        Fetch all products referenced by an order in a single query.
+        Returns a mapping of product ID to product.
+        """
+        if not product_ids:
+            return {}
+
+        products = self.db.query(Product).filter(Product.id.in_(set(product_ids))).all()
+
+        return {product.id: product for product in products}
+
+    def validate_order_items(self, items: list[OrderItemCreate], products: dict[int, Product]) -> Optional[str]:
+        """
+        Validate order items against the products fetched by get_products_by_ids.
+        BUG-BE-001: Intentionally omits stock check here; stock is enforced atomically by StockService.reserve.
         Returns error message if validation fails, None if valid.
         """
         for item in items:
             # Check if product exists
-            product = self.db.query(Product).filter(Product.id == item.product_id).first()
+            product = products.get(item.product_id)
 
             if not product:
                 return f"Product with ID {item.product_id} not found"
@@ -36,45 +88,119 @@ class OrderService:
 
         return None
 
-    def create_order(self, order_data: OrderCreate) -> OrderResponse:
+    def reserve_order(self, order_data: OrderCreate) -> OrderReservation:
         """
-        Create a new order with transaction handling.
-        Validates items, processes payment, and saves order to database.
+        Validate and price an order, then reserve its stock and commit.
+        The reservation is committed before payment so no row locks are held during the gateway call;
+        call release_reservation if the order is not completed. A StockReservation row is written
+        in the same transaction, so stock left reserved by a crashed worker is returned by the reaper.
+        Raises InsufficientStockError listing every oversold line.
         """
+        # Fetch every referenced product once; shared by validation and pricing
+        products = self.get_products_by_ids([item.product_id for item in order_data.items])
+
         # Validate order items
-        validation_error = self.validate_order_items(order_data.items)
+        validation_error = self.validate_order_items(order_data.items, products)
         if validation_error:
             raise ValueError(validation_error)
 
         # Calculate total amount
         total_amount = 0
         order_items_data = []
+        # Read before the commit below expires the loaded products
+        categories: dict[int, Optional[str]] = {}
 
         for item in order_data.items:
-            product = self.db.query(Product).filter(Product.id == item.product_id).first()
+            product = products[item.product_id]
 
             item_total = product.price * item.quantity
             total_amount += item_total
 
             order_items_data.append({"product_id": item.product_id, "quantity": item.quantity, "unit_price": product.price})
+            categories[item.product_id] = product.category
+
+        quantities: dict[int, int] = defaultdict(int)
+        for item in order_data.items:
+            quantities[item.product_id] += item.quantity
+
+        try:
+            self.stock_service.reserve(order_data.items)
+            reservation = StockReservation(
+                lines=[{"product_id": product_id, "quantity": quantity} for product_id, quantity in quantities.items()],
+                expires_at=datetime.utcnow() + timedelta(seconds=STOCK_RESERVATION_TTL_SECONDS),
+            )
+            self.db.add(reservation)
+            self.db.flush()
+            reservation_id = reservation.id
+            self.db.commit()
+        except InsufficientStockError:
+            self.db.rollback()
+            raise
 
-        # Process payment
-        payment_result = self.payment_service.process_payment(total_amount)
+        return OrderReservation(reservation_id=reservation_id, total_amount=total_amount, items=order_items_data, categories=categories)
 
-        if payment_result["status"] != "authorized":
-            raise ValueError("Payment processing failed")
+    def _claim_reservation(self, reservation_id: int) -> bool:
+        """
+        Delete a reservation row inside the current transaction.
+        Returns False when it is already gone (completed, released, or reaped), so whoever
+        deletes the row is the only one to act on its stock.
+        """
+        result = self.db.execute(delete(StockReservation).where(StockReservation.id == reservation_id).execution_options(synchronize_session=False))
+        return result.rowcount == 1
 
-        # Create order in transaction
+    def release_reservation(self, reservation_id: int, items: list[OrderItemCreate]) -> bool:
+        """
+        Give back the stock reserved by reserve_order.
+        Returns False (and changes nothing) when the reservation was already released by the reaper.
+        """
+        if not self._claim_reservation(reservation_id):
+            self.db.rollback()
+            return False
+        self.stock_service.release(items)
+        self.db.commit()
+        return True
+
+    def release_expired_reservations(self, now: Optional[datetime] = None, limit: int = RESERVATION_REAPER_BATCH_SIZE) -> list[int]:
+        """
+        Return the stock of up to limit reservations that expired before now, in one transaction.
+        Returns the IDs of the products whose stock changed.
+        """
+        now = now or datetime.utcnow()
+        expired = select(StockReservation.id).where(StockReservation.expires_at < now).order_by(StockReservation.expires_at).limit(limit)
+        # One DELETE claims the batch; rows completed concurrently are not returned, so never released twice
+        claimed = self.db.execute(
+            delete(StockReservation).where(StockReservation.id.in_(expired)).returning(StockReservation.lines).execution_options(synchronize_session=False)
+        ).scalars().all()
+
+        items = [OrderItemCreate(product_id=line["product_id"], quantity=line["quantity"]) for lines in claimed for line in lines]
+        if not items:
+            self.db.rollback()
+            return []
+        self.stock_service.release(items)
+        self.db.commit()
+        logger.warning("Released %d expired stock reservations", len(claimed))
+        return sorted({item.product_id for item in items})
+
+    def complete_order(self, order_data: OrderCreate, reservation: OrderReservation) -> OrderResponse:
+        """
+        Save a paid order and its items in one transaction, together with the sales rollups.
+        The reservation row is deleted in the same transaction; if the reaper already returned
+        its stock, nothing is saved and ValueError is raised.
+        """
         try:
+            if not self._claim_reservation(reservation.reservation_id):
+                raise ReservationExpiredError(f"stock reservation {reservation.reservation_id} expired")
+
             # Create order
-            order = Order(user_id=order_data.user_id, total_amount=total_amount, status="paid")
+            order = Order(user_id=order_data.user_id, total_amount=reservation.total_amount, status="paid")
             self.db.add(order)
             self.db.flush()  # Get order ID
 
-            # Create order items
-            for item_data in order_items_data:
-                order_item = OrderItem(order_id=order.id, **item_data)
-                self.db.add(order_item)
+            # Create order items in a single bulk INSERT
+            if reservation.items:
+                self.db.execute(insert(OrderItem), [{"order_id": order.id, **item_data} for item_data in reservation.items])
+
+            SalesRollupService(self.db).record_order(order.created_at, reservation.items, reservation.categories)
 
             # Commit transaction
             self.db.commit()
@@ -86,11 +212,159 @@ class OrderService:
             self.db.rollback()
             raise ValueError(f"Failed to create order: {str(e)}")
 
-    def get_user_orders(self, user_id: str) -> list[OrderResponse]:
+    def get_user_orders(self, user_id: str, limit: int = 50, cursor: Optional[str] = None, include_items: bool = True) -> tuple[list[OrderResponse] | list[OrderSummaryResponse], Optional[str]]:
         """
-        Get all orders for a specific user.
-        Returns list of orders with items, ordered by creation date (newest first).
+        Get one page of orders for a specific user, ordered by creation date (newest first).
+        Items for the whole page are loaded with one extra IN query instead of one query per order.
+        Pass the returned cursor back to fetch the next page; it is None on the last page.
+        Returns (orders, next_cursor). Raises ValueError for a malformed cursor.
         """
-        orders = self.db.query(Order).filter(Order.user_id == user_id).order_by(Order.created_at.desc()).all()
+        query = self.db.query(Order).filter(Order.user_id == user_id)
+
+        if cursor is not None:
+            last_created_at, last_id = decode_cursor(cursor, "created_at")
+            query = query.filter(tuple_(Order.created_at, Order.id) < tuple_(last_created_at, last_id))
+
+        if include_items:
+            query = query.options(selectinload(Order.items))
+
+        # id breaks ties between orders created in the same instant
+        orders = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+        next_cursor = encode_cursor("created_at", orders[limit - 1]) if len(orders) > limit else None
+
+        schema = OrderResponse if include_items else OrderSummaryResponse
+        return [schema.model_validate(order) for order in orders[:limit]], next_cursor
+
+
+class AsyncOrderService:
+    """
+    Awaitable counterpart of OrderService for async route handlers.
+    Works with both AsyncSession and Session; the sync implementation runs via run_db.
+    """
+
+    def __init__(self, db: DbSession, payment_service: Optional[PaymentService] = None) -> None:
+        self.db = db
+        self.payment_service = payment_service or PaymentService()
+
+    async def create_order(self, order_data: OrderCreate) -> OrderResponse:
+        """
+        Create a new order: reserve stock, authorize payment, then save the order.
+        The gateway call runs between two short transactions rather than inside one,
+        so a slow gateway never holds product row locks or a pooled connection.
+        If payment or saving fails for any reason, including cancellation, the reserved stock
+        is released and any authorization that may exist is voided. If the worker dies in
+        between, the reaper returns the stock once the reservation expires.
+        Raises InsufficientStockError, PaymentDeclined (both ValueError) or PaymentGatewayUnavailable.
+        """
+        product_ids = [item.product_id for item in order_data.items]
+        reservation = await run_db(self.db, lambda session: OrderService(session).reserve_order(order_data))
+        # Stock was decremented, so cached product payloads are stale
+        invalidate_product_cache(product_ids, stock_changed=True, pin_catalog=False)
+
+        # Sent with the authorization so an answer that never arrived can still be voided
+        payment_key = str(uuid.uuid4())
+        try:
+            payment = await self.payment_service.process_payment(reservation.total_amount, payment_key)
+        except PaymentDeclined:
+            await self._release(order_data, reservation, product_ids)
+            raise
+        except BaseException as e:
+            # Timeouts, cancellation and unexpected errors: the gateway may have authorized the payment
+            await self._release(order_data, reservation, product_ids)
+            if not isinstance(e, PaymentGatewayUnavailable) or e.outcome_unknown:
+                await self._void_unknown(payment_key)
+            raise
+
+        try:
+            order = await run_db(self.db, lambda session: OrderService(session).complete_order(order_data, reservation))
+        except BaseException:
+            # A cancelled threadpool save may still commit; the reservation row then is gone and the payment is kept
+            if await self._release(order_data, reservation, product_ids):
+                await self._void(payment["transaction_id"])
+            raise
+
+        # The user's next history reads must see this order on any worker, so keep them off the replicas for a while
+        pin_primary(user_pin(order_data.user_id))
+        return order
+
+    async def _release(self, order_data: OrderCreate, reservation: OrderReservation, product_ids: list[int]) -> bool:
+        """
+        Return the reserved stock; on failure the reaper does it when the reservation expires.
+        Returns True only when this call released it, which means the order was not saved.
+        """
+        try:
+            # Shielded so a cancelled request still finishes giving the stock back
+            released = await asyncio.shield(run_db(self.db, lambda session: OrderService(session).release_reservation(reservation.reservation_id, order_data.items)))
+        except Exception:
+            logger.exception("Failed to release stock reservation %s", reservation.reservation_id)
+            return False
+        if released:
+            invalidate_product_cache(product_ids, stock_changed=True, pin_catalog=False)
+        return released
+
+    async def _void(self, transaction_id: str) -> None:
+        try:
+            await asyncio.shield(self.payment_service.void_payment(transaction_id))
+        except Exception:
+            # Unused authorizations expire at the gateway
+            logger.warning("Failed to void payment %s", transaction_id)
+
+    async def _void_unknown(self, payment_key: str) -> None:
+        try:
+            await asyncio.shield(self.payment_service.void_unknown_payment(payment_key))
+        except Exception:
+            logger.warning("Failed to void payment with idempotency key %s", payment_key)
+
+    async def get_user_orders(self, user_id: str, limit: int = 50, cursor: Optional[str] = None, include_items: bool = True) -> tuple[list[OrderResponse] | list[OrderSummaryResponse], Optional[str]]:
+        return await run_db(self.db, lambda session: OrderService(session).get_user_orders(user_id, limit=limit, cursor=cursor, include_items=include_items))
+
+
+class ReservationReaper:
+    """
+    Background task returning the stock of reservations whose checkout never finished,
+    e.g. because the worker crashed between reserving stock and saving the order.
+    Every worker runs one; claiming rows with DELETE keeps them from releasing a reservation twice.
+    """
+
+    def __init__(self, interval: float = RESERVATION_REAPER_INTERVAL_SECONDS) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the reaper loop (called from the application lifespan)."""
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def reap(self) -> list[int]:
+        """Release one batch of expired reservations; returns the IDs of the products restocked."""
+        if USE_ASYNC:
+            async with SessionLocal() as db:
+                product_ids = await run_db(db, lambda session: OrderService(session).release_expired_reservations())
+        else:
+            with SessionLocal() as db:
+                product_ids = await run_db(db, lambda session: OrderService(session).release_expired_reservations())
+        if product_ids:
+            invalidate_product_cache(product_ids, stock_changed=True, pin_catalog=False)
+        return product_ids
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Drain a backlog in batches before sleeping again
+                while await self.reap():
+                    pass
+            except Exception:
+                logger.exception("Stock reservation reaper failed")
+
 
-        return [OrderResponse.model_validate(order) for order in orders]
+reservation_reaper = ReservationReaper()
@@ -0,0 +1,199 @@
+# flake8: noqa: E501
+import asyncio
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, Optional, Protocol
+import httpx  # type: ignore
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Remote gateway base URL; unset keeps the in-process stub that authorizes everything
+PAYMENT_GATEWAY_URL = os.getenv("PAYMENT_GATEWAY_URL", "")
+# Timeout for one HTTP attempt, and the overall deadline for a call including retries and backoff
+PAYMENT_GATEWAY_TIMEOUT = float(os.getenv("PAYMENT_GATEWAY_TIMEOUT", "2"))
+PAYMENT_GATEWAY_DEADLINE = float(os.getenv("PAYMENT_GATEWAY_DEADLINE", "5"))
+PAYMENT_GATEWAY_MAX_RETRIES = int(os.getenv("PAYMENT_GATEWAY_MAX_RETRIES", "2"))
+PAYMENT_GATEWAY_BACKOFF_SECONDS = float(os.getenv("PAYMENT_GATEWAY_BACKOFF_SECONDS", "0.1"))
+# Pooled keep-alive connections to the gateway
+PAYMENT_GATEWAY_MAX_CONNECTIONS = int(os.getenv("PAYMENT_GATEWAY_MAX_CONNECTIONS", "100"))
+PAYMENT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("PAYMENT_BREAKER_FAILURE_THRESHOLD", "5"))
+PAYMENT_BREAKER_RESET_SECONDS = float(os.getenv("PAYMENT_BREAKER_RESET_SECONDS", "30"))
+
+
+class PaymentError(Exception):
+    """Base class for payment failures; the order is not recorded when one is raised."""
+
+
+class PaymentDeclined(PaymentError, ValueError):
+    """The gateway rejected the payment."""
+
+
+class PaymentGatewayUnavailable(PaymentError):
+    """
+    The gateway timed out, kept failing, or its circuit is open.
+    outcome_unknown is set when a request may have reached the gateway without a usable
+    answer coming back (timeouts mid-request, 5xx), so the payment may have been authorized.
+    """
+
+    def __init__(self, message: str, retry_after: float = 1, outcome_unknown: bool = False) -> None:
+        self.retry_after = retry_after
+        self.outcome_unknown = outcome_unknown
+        super().__init__(message)
+
+
+class PaymentGateway(Protocol):
+    async def authorize(self, amount: int, idempotency_key: Optional[str] = None) -> Dict[str, str]: ...
+
+    async def void(self, transaction_id: str) -> None: ...
+
+    async def void_by_key(self, idempotency_key: str) -> None: ...
+
+    async def aclose(self) -> None: ...
+
+    def stats(self) -> dict[str, Any]: ...
+
+
+class StubPaymentGateway:
+    """In-process gateway that authorizes every payment with a dummy transaction ID."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+
+    async def authorize(self, amount: int, idempotency_key: Optional[str] = None) -> Dict[str, str]:
+        self.requests += 1
+        return {"status": "authorized", "transaction_id": f"dummy-{uuid.uuid4()}"}
+
+    async def void(self, transaction_id: str) -> None:
+        return None
+
+    async def void_by_key(self, idempotency_key: str) -> None:
+        return None
+
+    async def aclose(self) -> None:
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        return {"gateway": "stub", "requests": self.requests, "retries": 0, "failures": 0, "breaker": None}
+
+
+class HTTPPaymentGateway:
+    """
+    Client for a remote payment gateway over a pooled keep-alive HTTP connection.
+
+    Every call has a deadline covering all attempts. Timeouts, transport errors, 429 and 5xx
+    responses are retried with full-jitter exponential backoff, reusing one Idempotency-Key
+    so the gateway charges at most once. Failed attempts feed a circuit breaker; while it is
+    open, calls fail fast with PaymentGatewayUnavailable instead of waiting on the gateway.
+    The underlying client belongs to the event loop that first uses it.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = PAYMENT_GATEWAY_TIMEOUT,
+        deadline: float = PAYMENT_GATEWAY_DEADLINE,
+        max_retries: int = PAYMENT_GATEWAY_MAX_RETRIES,
+        backoff_seconds: float = PAYMENT_GATEWAY_BACKOFF_SECONDS,
+        max_connections: int = PAYMENT_GATEWAY_MAX_CONNECTIONS,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.breaker = breaker or CircuitBreaker(PAYMENT_BREAKER_FAILURE_THRESHOLD, PAYMENT_BREAKER_RESET_SECONDS)
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def authorize(self, amount: int, idempotency_key: Optional[str] = None) -> Dict[str, str]:
+        """
+        Authorize amount. Sending the same idempotency_key again returns the original
+        authorization instead of charging twice; a fresh key is used when none is given.
+        """
+        response = await self._post("/authorize", {"amount": amount}, idempotency_key)
+        if response.status_code >= 400:
+            raise PaymentDeclined("Payment processing failed")
+
+        body = response.json()
+        if body.get("status") != "authorized":
+            raise PaymentDeclined("Payment processing failed")
+        return {"status": body["status"], "transaction_id": body["transaction_id"]}
+
+    async def void(self, transaction_id: str) -> None:
+        await self._post(f"/transactions/{transaction_id}/void", None)
+
+    async def void_by_key(self, idempotency_key: str) -> None:
+        """
+        Void whatever authorization was made with idempotency_key, if any (404 when none was).
+        The gateway also refuses later authorizations with the key, so an authorize still in
+        flight when this arrives cannot leave a hold behind. Never creates a new authorization.
+        """
+        await self._post(f"/authorizations/{idempotency_key}/void", None)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        return {"gateway": "http", "requests": self.requests, "retries": self.retries, "failures": self.failures, "breaker": self.breaker.stats()}
+
+    async def _post(self, path: str, payload: Optional[dict[str, Any]], idempotency_key: Optional[str] = None) -> httpx.Response:
+        deadline = time.monotonic() + self.deadline
+        headers = {"Idempotency-Key": idempotency_key or str(uuid.uuid4())}
+        error = "deadline exceeded"
+        # Set once an attempt may have been processed by the gateway without us seeing the result
+        outcome_unknown = False
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError as e:
+                raise PaymentGatewayUnavailable("Payment gateway unavailable, please retry shortly", retry_after=e.retry_after) from e
+
+            if attempt:
+                self.retries += 1
+            self.requests += 1
+            try:
+                response = await self.client.post(path, json=payload, headers=headers, timeout=min(self.timeout, remaining))
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+                # Failing to connect means the request never left; anything later may have been processed
+                outcome_unknown = outcome_unknown or not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+            except BaseException:
+                # Cancelled mid-call: still settle the attempt so a half-open trial slot is never leaked
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code < 500 and response.status_code != 429:
+                    # Declines still prove the gateway is healthy
+                    self.breaker.record_success()
+                    return response
+                error = f"HTTP {response.status_code}"
+                outcome_unknown = outcome_unknown or response.status_code >= 500
+
+            self.failures += 1
+            self.breaker.record_failure()
+
+            # Full jitter: a random delay up to an exponentially growing cap, never past the deadline
+            delay = random.uniform(0, self.backoff_seconds * 2**attempt)
+            if attempt == self.max_retries or time.monotonic() + delay >= deadline:
+                break
+            await asyncio.sleep(delay)
+
+        raise PaymentGatewayUnavailable(f"Payment gateway unavailable ({error})", outcome_unknown=outcome_unknown)
+
+
+def build_payment_gateway() -> PaymentGateway:
+    return HTTPPaymentGateway(PAYMENT_GATEWAY_URL) if PAYMENT_GATEWAY_URL else StubPaymentGateway()
+
+
+payment_gateway = build_payment_gateway()
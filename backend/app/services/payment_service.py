@@ -1,17 +1,31 @@
-import uuid
-from typing import Dict
+from typing import Dict, Optional
+from app.core.metrics import timed_phase
+from app.services.payment_gateway import PaymentGateway, payment_gateway
 
 
 class PaymentService:
-    def process_payment(self, amount: int) -> Dict[str, str]:
+    def __init__(self, gateway: Optional[PaymentGateway] = None) -> None:
+        self.gateway = gateway or payment_gateway
+
+    async def process_payment(self, amount: int, idempotency_key: Optional[str] = None) -> Dict[str, str]:
         """
-        Dummy payment processing that always returns success.
+        Authorize a payment with the configured gateway (the in-process stub unless PAYMENT_GATEWAY_URL is set).
+        Pass idempotency_key to be able to settle the payment with void_unknown_payment if no answer arrives.
         Returns a dictionary with status and transaction_id.
+        Raises PaymentDeclined or PaymentGatewayUnavailable.
+        """
+        with timed_phase("payment"):
+            return await self.gateway.authorize(amount, idempotency_key)
+
+    async def void_payment(self, transaction_id: str) -> None:
+        """Release an authorization that will not be used."""
+        await self.gateway.void(transaction_id)
+
+    async def void_unknown_payment(self, idempotency_key: str) -> None:
+        """
+        Release an authorization whose outcome is unknown (timeout, cancellation, unreadable reply).
+        The gateway voids it by the idempotency key it was requested with; nothing new is
+        authorized, so a failure here can never leave a second hold behind.
         """
-        # Generate a dummy transaction ID
-        transaction_id = f"dummy-{uuid.uuid4()}"
-        
-        return {
-            "status": "authorized",
-            "transaction_id": transaction_id
-        }
+        with timed_phase("payment"):
+            await self.gateway.void_by_key(idempotency_key)
@@ -0,0 +1,254 @@
+# flake8: noqa: E501
+import codecs
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterator, Sequence, Union
+from pydantic import ValidationError  # type: ignore
+from sqlalchemy import insert, select, update  # type: ignore
+from sqlalchemy.dialects import postgresql, sqlite  # type: ignore
+from sqlalchemy.engine import Row  # type: ignore
+from sqlalchemy.exc import DBAPIError  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+from starlette.concurrency import iterate_in_threadpool  # type: ignore
+from app.core.query_diagnostics import expected_repeated_queries
+from app.db.replicas import catalog_read_session_factory
+from app.db.session import USE_ASYNC, DbSession, run_db
+from app.models.product import Product
+from app.schemas.product import ProductImportError, ProductImportResult, ProductImportRow
+from app.services.product_service import bump_catalog_version, invalidate_product_cache
+
+# Rows per upsert statement / transaction and per export fetch
+IMPORT_BATCH_SIZE = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "1000"))
+EXPORT_BATCH_SIZE = int(os.getenv("PRODUCT_EXPORT_BATCH_SIZE", "1000"))
+# Row errors returned in the import result; later errors are only counted
+IMPORT_MAX_ERRORS = int(os.getenv("PRODUCT_IMPORT_MAX_ERRORS", "1000"))
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_FIELDS = ("id", "sku", "name", "description", "price", "stock", "image_url", "category", "created_at", "updated_at")
+UPSERT_FIELDS = ("name", "description", "price", "stock", "image_url", "category", "updated_at")
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+ParsedRecord = tuple[int, Union[dict[str, Any], ValueError]]
+
+
+class ProductBulkService:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def upsert_batch(self, rows: list[tuple[int, ProductImportRow]]) -> tuple[list[int], list[ProductImportError]]:
+        """
+        Insert or update a batch of validated rows keyed on SKU, then commit.
+        If the database rejects the batch, rows are retried one by one in savepoints so
+        only the offending rows are reported. Returns (affected product IDs, row errors).
+        A SKU repeated within the batch is written once, from its last line; the earlier
+        lines are reported as errors so they are not counted as upserted.
+        """
+        # A single upsert cannot touch the same row twice, so the last line for a SKU wins
+        latest = {row.sku: (line, row) for line, row in rows}
+        superseded = [ProductImportError(line=line, sku=row.sku, error=f"Duplicate sku, superseded by line {latest[row.sku][0]}") for line, row in rows if latest[row.sku][0] != line]
+        now = datetime.utcnow()
+
+        try:
+            product_ids = self._upsert([{**row.model_dump(), "created_at": now, "updated_at": now} for _, row in latest.values()])
+            bump_catalog_version(self.db)
+            self.db.commit()
+            return product_ids, superseded
+        except DBAPIError:
+            self.db.rollback()
+
+        product_ids, errors = [], superseded
+        for line, row in latest.values():
+            try:
+                with self.db.begin_nested():
+                    product_ids.extend(self._upsert([{**row.model_dump(), "created_at": now, "updated_at": now}]))
+            except DBAPIError as e:
+                errors.append(ProductImportError(line=line, sku=row.sku, error=str(e.orig)))
+        if product_ids:
+            bump_catalog_version(self.db)
+        self.db.commit()
+        return product_ids, errors
+
+    def _upsert(self, params: list[dict[str, Any]]) -> list[int]:
+        dialect_insert = UPSERT_INSERTS.get(self.db.get_bind().dialect.name)
+        if dialect_insert is not None:
+            stmt = dialect_insert(Product)
+            stmt = stmt.on_conflict_do_update(index_elements=[Product.sku], set_={field: stmt.excluded[field] for field in UPSERT_FIELDS})
+            return list(self.db.scalars(stmt.returning(Product.id), params))
+
+        # Portable fallback: look up existing SKUs, then update and insert separately
+        existing = dict(self.db.execute(select(Product.sku, Product.id).where(Product.sku.in_([p["sku"] for p in params]))).all())
+        for p in params:
+            if p["sku"] in existing:
+                self.db.execute(update(Product).where(Product.id == existing[p["sku"]]).values({field: p[field] for field in UPSERT_FIELDS}))
+        new_rows = [p for p in params if p["sku"] not in existing]
+        inserted = list(self.db.scalars(insert(Product).returning(Product.id), new_rows)) if new_rows else []
+        return list(existing.values()) + inserted
+
+    def iter_export_batches(self) -> Iterator[Sequence[Row]]:
+        """Stream every product in ID order through a server-side cursor, EXPORT_BATCH_SIZE rows at a time."""
+        result = self.db.execute(export_query().execution_options(yield_per=EXPORT_BATCH_SIZE))
+        yield from result.partitions()
+
+
+class AsyncProductBulkService:
+    """Streaming bulk import for async route handlers; parsing runs on the event loop, upserts via run_db."""
+
+    def __init__(self, db: DbSession) -> None:
+        self.db = db
+
+    async def import_products(self, chunks: AsyncIterator[bytes], fmt: str) -> ProductImportResult:
+        """
+        Upsert products from an NDJSON or CSV byte stream.
+        Only one batch is held in memory at a time and each batch commits on its own,
+        so rows before a failing line are kept. Invalid rows are reported by line number.
+        """
+        result = ProductImportResult(processed=0, upserted=0, failed=0, errors=[])
+        batch: list[tuple[int, ProductImportRow]] = []
+
+        async for line, record in PARSERS[fmt](_iter_lines(chunks)):
+            result.processed += 1
+            try:
+                if isinstance(record, ValueError):
+                    raise record
+                batch.append((line, ProductImportRow.model_validate(record)))
+            except ValueError as e:
+                sku = record.get("sku") if isinstance(record, dict) else None
+                _add_error(result, ProductImportError(line=line, sku=sku if isinstance(sku, str) else None, error=_describe(e)))
+                continue
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await self._flush(batch, result)
+                batch = []
+
+        if batch:
+            await self._flush(batch, result)
+        return result
+
+    async def _flush(self, batch: list[tuple[int, ProductImportRow]], result: ProductImportResult) -> None:
+        # One upsert per batch (or per row after a batch failure) is the intended access pattern
+        with expected_repeated_queries():
+            product_ids, errors = await run_db(self.db, lambda session: ProductBulkService(session).upsert_batch(batch))
+        # The batch is committed, so evict now rather than holding every ID until the end
+        invalidate_product_cache(product_ids, listing_changed=True, sort_keys_changed=True, search_fields_changed=True, stock_changed=True)
+        result.upserted += len(batch) - len(errors)
+        for error in errors:
+            _add_error(result, error)
+
+
+async def export_products(fmt: str) -> AsyncIterator[bytes]:
+    """
+    Yield the whole catalog as NDJSON or CSV.
+    The response keeps streaming after the route handler returns, so the export
+    uses its own session instead of the request-scoped one, on a replica when available.
+    """
+    session_factory = catalog_read_session_factory()
+    if fmt == "csv":
+        yield _encode_csv([EXPORT_FIELDS])
+
+    if USE_ASYNC:
+        async with session_factory() as session:
+            result = await session.stream(export_query().execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for rows in result.partitions():
+                yield _encode_rows(rows, fmt)
+    else:
+        with session_factory() as session:
+            async for rows in iterate_in_threadpool(ProductBulkService(session).iter_export_batches()):
+                yield _encode_rows(rows, fmt)
+
+
+def export_query() -> Any:
+    return select(*(Product.__table__.c[field] for field in EXPORT_FIELDS)).order_by(Product.id)
+
+
+def _encode_rows(rows: Sequence[Row], fmt: str) -> bytes:
+    if fmt == "csv":
+        return _encode_csv([["" if value is None else _plain(value) for value in row] for row in rows])
+    return "".join(json.dumps(dict(zip(EXPORT_FIELDS, map(_plain, row))), ensure_ascii=False) + "\n" for row in rows).encode()
+
+
+def _encode_csv(rows: Any) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _plain(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """Split a byte stream into (line number, text) without buffering more than one partial line."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    line_number = 0
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for text in lines:
+            line_number += 1
+            yield line_number, text.rstrip("\r")
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield line_number + 1, pending.rstrip("\r")
+
+
+async def _parse_ndjson(lines: AsyncIterator[tuple[int, str]]) -> AsyncIterator[ParsedRecord]:
+    async for line, text in lines:
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            yield line, ValueError(f"invalid JSON: {e}")
+            continue
+        yield line, record if isinstance(record, dict) else ValueError("expected a JSON object")
+
+
+async def _parse_csv(lines: AsyncIterator[tuple[int, str]]) -> AsyncIterator[ParsedRecord]:
+    """Parse CSV with a header row; quoted fields may span lines. Empty cells become null."""
+    header: list[str] = []
+    record, start = "", 0
+    async for line, text in lines:
+        if not record:
+            start = line
+        record = f"{record}\n{text}" if record else text
+        # An odd number of quotes means a quoted field continues on the next line
+        if record.count('"') % 2:
+            continue
+
+        complete, record = record, ""
+        if not complete.strip():
+            continue
+        values = next(csv.reader([complete]))
+        if not header:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield start, ValueError(f"expected {len(header)} fields, got {len(values)}")
+        else:
+            yield start, {name: value if value != "" else None for name, value in zip(header, values)}
+
+    if record:
+        yield start, ValueError("unterminated quoted field")
+
+
+PARSERS = {"ndjson": _parse_ndjson, "csv": _parse_csv}
+
+
+def _describe(error: ValueError) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors())
+    return str(error)
+
+
+def _add_error(result: ProductImportResult, error: ProductImportError) -> None:
+    result.failed += 1
+    if len(result.errors) < IMPORT_MAX_ERRORS:
+        result.errors.append(error)
+    else:
+        result.errors_truncated = True
@@ -0,0 +1,38 @@
+from dataclasses import dataclass
+from typing import Any, Optional
+from app.models.product import Product
+
+
+@dataclass(frozen=True)
+class ProductFilters:
+    """Catalog filters applied in SQL to listings, searches and facet counts."""
+
+    category: Optional[str] = None
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    in_stock: bool = False
+
+    def apply(self, query: Any, include_category: bool = True) -> Any:
+        """
+        Add the filters to a Product query.
+        include_category=False leaves out the category filter, as facet counts need.
+        """
+        if include_category and self.category is not None:
+            query = query.filter(Product.category == self.category)
+        if self.min_price is not None:
+            query = query.filter(Product.price >= self.min_price)
+        if self.max_price is not None:
+            query = query.filter(Product.price <= self.max_price)
+        if self.in_stock:
+            query = query.filter(Product.stock > 0)
+        return query
+
+    @property
+    def filters_price(self) -> bool:
+        return self.min_price is not None or self.max_price is not None
+
+    def cache_key(self) -> tuple[Optional[str], Optional[int], Optional[int], bool]:
+        return self.category, self.min_price, self.max_price, self.in_stock
+
+
+NO_FILTERS = ProductFilters()
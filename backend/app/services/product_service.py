@@ -1,51 +1,228 @@
 # flake8: noqa: E501
+import os
+from dataclasses import dataclass
+from datetime import datetime
+import orjson  # type: ignore
+from sqlalchemy import func, select, text, tuple_, update  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
+from app.core.cache import product_cache
+from app.core.pagination import decode_cursor, encode_cursor
+from app.db.cache_bus import MAX_IDS_PER_EVENT, cache_bus
+from app.db.replicas import CATALOG_FILL_PIN, CATALOG_PIN, primary_pins, run_catalog_fill
+from app.db.session import DbSession, run_db
+from app.models.catalog_version import CatalogVersion
 from app.models.product import Product
-from app.schemas.product import ProductListResponse, ProductResponse, ProductCreate, ProductUpdate
-from typing import Optional
+from app.services.product_filters import NO_FILTERS, ProductFilters
+from app.services.search_service import ProductSearchService
+from app.schemas.product import CategoryFacet, ProductListResponse, ProductResponse, ProductCreate, ProductUpdate
+from typing import Any, Iterable, Optional
+
+
+# Cache tags shared by listing entries
+LISTS_TAG = "lists"
+PRICE_LISTS_TAG = "lists:price"
+SEARCH_LISTS_TAG = "lists:search"
+IN_STOCK_LISTS_TAG = "lists:in_stock"
+CATALOG_TAG = "catalog"
+
+# Most ids one batch lookup may request (cart and checkout rendering)
+PRODUCT_BATCH_MAX_IDS = int(os.getenv("PRODUCT_BATCH_MAX_IDS", "100"))
+
+# Cache bus topics for product invalidations and for admin cache toggles and clears
+PRODUCTS_TOPIC = "products"
+PRODUCT_CACHE_TOPIC = "product_cache"
+
+# Stable sort keys for listing; each is paired with Product.id as a tiebreaker
+SORT_COLUMNS = {"created_at": Product.created_at, "price": Product.price}
+
+# Attributes serialized for each product; mirrors ProductResponse
+PRODUCT_FIELDS = tuple(ProductResponse.model_fields)
+
+
+def product_to_dict(product: Product) -> dict[str, Any]:
+    # Read loaded values from the instance dict; instrumented attribute access is far slower
+    loaded = product.__dict__
+    return {field: loaded[field] if field in loaded else getattr(product, field) for field in PRODUCT_FIELDS}
+
+
+@dataclass(frozen=True)
+class ProductPage:
+    """One listing page of ORM rows plus the ProductListResponse metadata."""
+
+    products: list[Product]
+    total: Optional[int]
+    total_estimated: bool
+    page: Optional[int]
+    page_size: int
+    next_cursor: Optional[str]
+
+    def to_response(self) -> ProductListResponse:
+        return ProductListResponse(
+            items=[ProductResponse.model_validate(p) for p in self.products],
+            total=self.total,
+            total_estimated=self.total_estimated,
+            page=self.page,
+            page_size=self.page_size,
+            next_cursor=self.next_cursor,
+        )
+
+    def to_json(self) -> bytes:
+        """Encode straight from the ORM rows; the columns already have the response types, so nothing is validated."""
+        return orjson.dumps(
+            {
+                "items": [product_to_dict(p) for p in self.products],
+                "total": self.total,
+                "total_estimated": self.total_estimated,
+                "page": self.page,
+                "page_size": self.page_size,
+                "next_cursor": self.next_cursor,
+            }
+        )
 
 
 class ProductService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_products(self, page: int = 1, page_size: int = 20, search_query: Optional[str] = None) -> ProductListResponse:
+    def list_products(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        search_query: Optional[str] = None,
+        sort: str = "created_at",
+        cursor: Optional[str] = None,
+        count: str = "exact",
+        filters: ProductFilters = NO_FILTERS,
+    ) -> ProductPage:
         """
-        Retrieve paginated products.
+        Retrieve paginated products ordered by (sort, id), or relevance-ranked search results when search_query is given.
+        Uses keyset pagination when a cursor from a previous response is given, offset pagination by page otherwise.
+        count selects how total is computed: "exact", "estimated" (planner statistics) or "none".
+        filters (category, price range, in stock) are applied in SQL to listings and searches alike.
         BUG-BE-004: Products with stock=0 are displayed in the list (should filter them out)
         """
-        # Fixed: Correct offset calculation
-        offset = (page - 1) * page_size
+        if search_query:
+            # Search results are ordered by relevance, so only page-based pagination applies
+            if cursor is not None:
+                raise ValueError("Cursor pagination is not supported for search queries")
+            products, total = ProductSearchService(self.db).search_rows(search_query, page=page, page_size=page_size, count=count, filters=filters)
+            return ProductPage(products=products, total=total, total_estimated=False, page=page, page_size=page_size, next_cursor=None)
 
-        query = self.db.query(Product)
+        sort_column = SORT_COLUMNS[sort]
 
-        if search_query:
-            query = query.filter(Product.name.ilike(f"%{search_query}%"))
+        query = self.db.query(Product)
 
         # BUG-BE-004: Missing filter for out-of-stock products
         # Should add: query = query.filter(Product.stock > 0)
 
-        total = query.count()
-        products = query.offset(offset).limit(page_size).all()
+        query = filters.apply(query)
 
-        return ProductListResponse(items=[ProductResponse.model_validate(p) for p in products], total=total, page=page, page_size=page_size)
+        # Planner statistics describe the whole table, so filtered listings are always counted exactly
+        total, total_estimated = self._count_products(query, count if filters == NO_FILTERS or count == "none" else "exact")
 
-    def get_product_by_id(self, product_id: int) -> Optional[ProductResponse]:
+        query = query.order_by(sort_column, Product.id)
+
+        if cursor is not None:
+            # Keyset pagination: seek past the last row of the previous page using the (sort, id) index
+            last_value, last_id = decode_cursor(cursor, sort)
+            query = query.filter(tuple_(sort_column, Product.id) > tuple_(last_value, last_id))
+            current_page = None
+        else:
+            # Fixed: Correct offset calculation
+            offset = (page - 1) * page_size
+            query = query.offset(offset)
+            current_page = page
+
+        # Fetch one extra row to learn whether another page exists
+        products = query.limit(page_size + 1).all()
+        next_cursor = encode_cursor(sort, products[page_size - 1]) if len(products) > page_size else None
+
+        return ProductPage(
+            products=products[:page_size],
+            total=total,
+            total_estimated=total_estimated,
+            page=current_page,
+            page_size=page_size,
+            next_cursor=next_cursor,
+        )
+
+    def _count_products(self, query: Any, count: str) -> tuple[Optional[int], bool]:
         """
-        Retrieve a single product by ID with error handling.
-        Returns None if product not found.
+        Compute the listing total according to the requested count mode.
+        Returns (total, is_estimate). Estimates fall back to an exact count when
+        planner statistics are unavailable.
+        """
+        if count == "none":
+            return None, False
+
+        if count == "estimated" and self.db.get_bind().dialect.name == "postgresql":
+            estimate = self.db.execute(text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'products'::regclass")).scalar()
+            # reltuples is -1 until the table has been vacuumed or analyzed
+            if estimate is not None and estimate >= 0:
+                return int(estimate), True
+
+        return query.count(), False
+
+    def get_category_facets(self, search_query: Optional[str] = None, filters: ProductFilters = NO_FILTERS) -> list[CategoryFacet]:
+        """
+        Product counts per category for the listing or search, most populated first.
+        Every filter except category applies, so the counts show what selecting each category would return.
+        """
+        if search_query:
+            query = ProductSearchService(self.db).build_query(search_query)
+            if query is None:
+                return []
+            query = query.order_by(None)
+        else:
+            query = self.db.query(Product)
+
+        product_count = func.count(Product.id)
+        rows = (
+            filters.apply(query, include_category=False)
+            .with_entities(Product.category, product_count)
+            .group_by(Product.category)
+            .order_by(product_count.desc(), Product.category)
+            .all()
+        )
+        return [CategoryFacet(category=category, count=total) for category, total in rows]
+
+    def get_catalog_version(self) -> tuple[Optional[datetime], int]:
+        """
+        Return (last modified, revision) for the catalog in one indexed lookup.
+        Updates move max(updated_at); inserts and deletes bump the catalog_version row,
+        whose changed_at also counts as a modification so a delete is never answered with 304.
+        """
+        revision = select(CatalogVersion.revision).where(CatalogVersion.id == 1).scalar_subquery()
+        changed_at = select(CatalogVersion.changed_at).where(CatalogVersion.id == 1).scalar_subquery()
+        updated_at, revision, changed_at = self.db.query(func.max(Product.updated_at), revision, changed_at).one()
+        last_modified = max((value for value in (updated_at, changed_at) if value is not None), default=None)
+        return last_modified, revision or 0
+
+    def get_product_json(self, product_id: int) -> Optional[tuple[bytes, datetime]]:
+        """
+        Retrieve a single product encoded as JSON straight from the ORM row.
+        Returns (payload, updated_at), or None if product not found.
         """
         product = self.db.query(Product).filter(Product.id == product_id).first()
 
         if not product:
             return None
 
-        return ProductResponse.model_validate(product)
+        return orjson.dumps(product_to_dict(product)), product.updated_at
+
+    def get_products_json_by_ids(self, product_ids: list[int]) -> dict[int, tuple[bytes, datetime]]:
+        """
+        Retrieve several products with one primary-key IN query, encoded like get_product_json.
+        Ids with no product are left out of the result.
+        """
+        products = self.db.query(Product).filter(Product.id.in_(product_ids)).all()
+        return {product.id: (orjson.dumps(product_to_dict(product)), product.updated_at) for product in products}
 
     def check_stock(self, product_id: int, quantity: int) -> bool:
         """
         Check if sufficient stock is available for a product.
         Returns True if stock is sufficient, False otherwise.
+        Advisory only; checkout reserves stock atomically via StockService.reserve.
         """
         product = self.db.query(Product).filter(Product.id == product_id).first()
 
@@ -66,6 +243,7 @@ class ProductService:
             image_url=product_data.image_url,
         )
         self.db.add(product)
+        bump_catalog_version(self.db)
         self.db.commit()
         self.db.refresh(product)
         return ProductResponse.model_validate(product)
@@ -106,5 +284,226 @@ class ProductService:
             return False
 
         self.db.delete(product)
+        bump_catalog_version(self.db)
         self.db.commit()
         return True
+
+
+def bump_catalog_version(db: Session) -> None:
+    """Record that products were added or removed; runs inside the caller's transaction."""
+    now = datetime.utcnow()
+    result = db.execute(update(CatalogVersion).where(CatalogVersion.id == 1).values(revision=CatalogVersion.revision + 1, changed_at=now))
+    if result.rowcount == 0:
+        # Databases created with create_all rather than init.sql start without the row
+        db.add(CatalogVersion(id=1, revision=1, changed_at=now))
+
+
+def product_tag(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+def invalidate_product_cache(
+    product_ids: Iterable[int],
+    listing_changed: bool = False,
+    sort_keys_changed: bool = False,
+    search_fields_changed: bool = False,
+    stock_changed: bool = False,
+    pin_catalog: bool = True,
+) -> None:
+    """
+    Evict cached entries affected by a product write.
+    Detail entries and listings containing the products are always dropped. listing_changed
+    drops every listing and facet count (rows added or removed, categories changed),
+    sort_keys_changed every price-sorted or price-filtered one, search_fields_changed every
+    search result, and stock_changed every in-stock-filtered one. The catalog version is always dropped.
+    With pin_catalog, catalog reads go to the primary until replicas catch up, so an admin sees
+    their own write; checkout passes False, since slightly stale stock on a replica is harmless
+    (reserve checks it on the primary) and pinning on every order would route all catalog reads there.
+    Either way the evicted entries are refilled from the primary for REPLICA_PIN_SECONDS (see run_catalog_fill).
+    Other workers evict the same entries when the event reaches them over the cache bus.
+    """
+    product_ids = list(product_ids)
+    _evict_products(product_ids, listing_changed, sort_keys_changed, search_fields_changed, stock_changed, pin_catalog)
+    flags = {"listing": listing_changed, "sort_keys": sort_keys_changed, "search_fields": search_fields_changed, "stock": stock_changed, "pin": pin_catalog}
+    for start in range(0, max(len(product_ids), 1), MAX_IDS_PER_EVENT):
+        cache_bus.publish(PRODUCTS_TOPIC, ids=product_ids[start : start + MAX_IDS_PER_EVENT], **flags)
+
+
+def _evict_products(product_ids: list[int], listing_changed: bool, sort_keys_changed: bool, search_fields_changed: bool, stock_changed: bool, pin_catalog: bool) -> None:
+    primary_pins.pin(*((CATALOG_PIN, CATALOG_FILL_PIN) if pin_catalog else (CATALOG_FILL_PIN,)))
+    product_cache.invalidate_tag(CATALOG_TAG)
+    for product_id in product_ids:
+        product_cache.invalidate_tag(product_tag(product_id))
+    if listing_changed:
+        product_cache.invalidate_tag(LISTS_TAG)
+    if sort_keys_changed:
+        product_cache.invalidate_tag(PRICE_LISTS_TAG)
+    if search_fields_changed:
+        product_cache.invalidate_tag(SEARCH_LISTS_TAG)
+    if stock_changed:
+        product_cache.invalidate_tag(IN_STOCK_LISTS_TAG)
+
+
+def _apply_product_event(event: dict[str, Any]) -> None:
+    _evict_products(event["ids"], event["listing"], event["sort_keys"], event["search_fields"], event["stock"], event.get("pin", True))
+
+
+cache_bus.subscribe(PRODUCTS_TOPIC, _apply_product_event, resync=product_cache.clear)
+
+
+def set_product_cache(enabled: Optional[bool] = None) -> None:
+    """
+    Enable or disable the product cache on every worker, or with enabled=None just clear it everywhere.
+    Disabling also clears it. Workers started later take PRODUCT_CACHE_ENABLED from their environment.
+    """
+    _apply_cache_settings(enabled)
+    cache_bus.publish(PRODUCT_CACHE_TOPIC, enabled=enabled)
+
+
+def _apply_cache_settings(enabled: Optional[bool]) -> None:
+    if enabled is not None:
+        product_cache.enabled = enabled
+    if not enabled:
+        product_cache.clear()
+
+
+def _apply_cache_settings_event(event: dict[str, Any]) -> None:
+    _apply_cache_settings(event["enabled"])
+
+
+cache_bus.subscribe(PRODUCT_CACHE_TOPIC, _apply_cache_settings_event, resync=product_cache.clear)
+
+
+def listing_tags(search_query: Optional[str], sort: str, filters: ProductFilters) -> list[str]:
+    """Tags for a cached listing or facet count, besides those of the products it contains."""
+    tags = [LISTS_TAG]
+    if search_query:
+        tags.append(SEARCH_LISTS_TAG)
+    if sort == "price" or filters.filters_price:
+        tags.append(PRICE_LISTS_TAG)
+    if filters.in_stock:
+        tags.append(IN_STOCK_LISTS_TAG)
+    return tags
+
+
+class AsyncProductService:
+    """
+    Awaitable counterpart of ProductService for async route handlers.
+    Works with both AsyncSession and Session; the sync implementation runs via run_db.
+    Reads are served from product_cache and writes invalidate the affected entries.
+    """
+
+    def __init__(self, db: DbSession):
+        self.db = db
+
+    async def get_products_json(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        search_query: Optional[str] = None,
+        sort: str = "created_at",
+        cursor: Optional[str] = None,
+        count: str = "exact",
+        filters: ProductFilters = NO_FILTERS,
+        facets: bool = False,
+    ) -> bytes:
+        """
+        Listing page as encoded ProductListResponse JSON, ready to send as a response body.
+        With facets, the separately cached category counts are spliced into the payload.
+        """
+
+        def fetch(session: Session) -> tuple[bytes, list[int]]:
+            listing = ProductService(session).list_products(page=page, page_size=page_size, search_query=search_query, sort=sort, cursor=cursor, count=count, filters=filters)
+            return listing.to_json(), [p.id for p in listing.products]
+
+        async def load() -> tuple[bytes, list[str]]:
+            payload, product_ids = await run_catalog_fill(self.db, fetch)
+            return payload, listing_tags(search_query, sort, filters) + [product_tag(product_id) for product_id in product_ids]
+
+        key = ("list", page, page_size, search_query, sort, cursor, count, filters.cache_key())
+        payload = await product_cache.get_or_load(key, load)
+        if not facets:
+            return payload
+        # The listing payload is a JSON object, so the facets go in before its closing brace
+        return payload[:-1] + b',"facets":' + await self.get_category_facets_json(search_query, filters) + b"}"
+
+    async def get_category_facets_json(self, search_query: Optional[str] = None, filters: ProductFilters = NO_FILTERS) -> bytes:
+        """
+        Encoded category counts, cached per search and non-category filters.
+        Every listing page and category selection shares one entry, so the GROUP BY runs only after a product write evicts it.
+        """
+
+        async def load() -> tuple[bytes, list[str]]:
+            facets = await run_catalog_fill(self.db, lambda session: ProductService(session).get_category_facets(search_query, filters))
+            return orjson.dumps([facet.model_dump() for facet in facets]), listing_tags(search_query, "created_at", filters)
+
+        key = ("category_facets", search_query, filters.min_price, filters.max_price, filters.in_stock)
+        return await product_cache.get_or_load(key, load)
+
+    async def get_catalog_version(self) -> tuple[Optional[datetime], int]:
+        async def load() -> tuple[tuple[Optional[datetime], int], list[str]]:
+            version = await run_catalog_fill(self.db, lambda session: ProductService(session).get_catalog_version())
+            return version, [CATALOG_TAG]
+
+        return await product_cache.get_or_load(("catalog_version",), load)
+
+    async def get_product_json(self, product_id: int) -> Optional[tuple[bytes, datetime]]:
+        """Encoded ProductResponse JSON and updated_at (for validators), or None if product not found."""
+
+        async def load() -> Optional[tuple[tuple[bytes, datetime], list[str]]]:
+            cached = await run_catalog_fill(self.db, lambda session: ProductService(session).get_product_json(product_id))
+            if cached is None:
+                return None
+            return cached, [product_tag(product_id)]
+
+        return await product_cache.get_or_load(("product", product_id), load)
+
+    async def get_products_json_by_ids(self, product_ids: list[int]) -> dict[int, tuple[bytes, datetime]]:
+        """
+        Batch form of get_product_json sharing its cache entries.
+        Cached products are served from product_cache and the rest are read with one query and cached.
+        Ids with no product are left out of the result.
+        """
+
+        async def load(keys: list[tuple[str, int]]) -> dict[tuple[str, int], tuple[tuple[bytes, datetime], list[str]]]:
+            found = await run_catalog_fill(self.db, lambda session: ProductService(session).get_products_json_by_ids([product_id for _, product_id in keys]))
+            return {("product", product_id): (cached, [product_tag(product_id)]) for product_id, cached in found.items()}
+
+        cached = await product_cache.get_or_load_many([("product", product_id) for product_id in product_ids], load)
+        return {product_id: value for (_, product_id), value in cached.items()}
+
+    async def get_products_batch_json(self, product_ids: list[int]) -> tuple[bytes, dict[int, datetime]]:
+        """
+        Encoded ProductBatchResponse for the given (deduplicated) ids, plus updated_at by id
+        for every product found (for validators). Items are keyed by id in request order.
+        """
+        found = await self.get_products_json_by_ids(product_ids)
+        items = b",".join(b'"%d":%s' % (product_id, found[product_id][0]) for product_id in product_ids if product_id in found)
+        not_found = [product_id for product_id in product_ids if product_id not in found]
+        payload = b'{"items":{' + items + b'},"not_found":' + orjson.dumps(not_found) + b"}"
+        return payload, {product_id: updated_at for product_id, (_, updated_at) in found.items()}
+
+    async def check_stock(self, product_id: int, quantity: int) -> bool:
+        return await run_db(self.db, lambda session: ProductService(session).check_stock(product_id, quantity))
+
+    async def create_product(self, product_data: ProductCreate) -> ProductResponse:
+        product = await run_db(self.db, lambda session: ProductService(session).create_product(product_data))
+        invalidate_product_cache([], listing_changed=True)
+        return product
+
+    async def update_product(self, product_id: int, product_data: ProductUpdate) -> Optional[ProductResponse]:
+        product = await run_db(self.db, lambda session: ProductService(session).update_product(product_id, product_data))
+        if product is not None:
+            invalidate_product_cache(
+                [product_id],
+                sort_keys_changed=product_data.price is not None,
+                search_fields_changed=product_data.name is not None or product_data.description is not None,
+                stock_changed=product_data.stock is not None,
+            )
+        return product
+
+    async def delete_product(self, product_id: int) -> bool:
+        deleted = await run_db(self.db, lambda session: ProductService(session).delete_product(product_id))
+        if deleted:
+            invalidate_product_cache([product_id], listing_changed=True)
+        return deleted
@@ -0,0 +1,189 @@
+# flake8: noqa: E501
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+from sqlalchemy import delete, func, insert, select, text, update  # type: ignore
+from sqlalchemy.dialects import postgresql, sqlite  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+from app.db.session import DbSession, run_db
+from app.models.category_sales import CategorySales
+from app.models.daily_sales import DailySales
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.product_sales import ProductSales
+from app.schemas.analytics import CategorySalesResponse, DailySalesResponse, ProductSalesResponse, SalesRollupRebuildResponse
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Orderings accepted by top_products
+TOP_PRODUCT_ORDERINGS = {"units": ProductSales.units, "revenue": ProductSales.revenue}
+
+
+class SalesRollupService:
+    """
+    Sales analytics rollups: daily revenue, per-product and per-category totals.
+
+    record_order adds one order to every rollup inside the caller's transaction, so the
+    rollups commit or roll back together with the order. Reads touch only the rollup
+    tables and cost the same however long the order history grows. rebuild recomputes
+    everything from orders and order_items for backfills and repairs.
+    """
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def record_order(self, ordered_at: datetime, items: list[dict[str, int]], categories: dict[int, Optional[str]]) -> None:
+        """
+        Add one order's lines to the rollups (does not commit).
+        Rows are upserted in a fixed order (products by ID, categories by name, then the day)
+        so concurrent orders touching the same rows cannot deadlock.
+        """
+        if not items:
+            return
+
+        units: dict[int, int] = defaultdict(int)
+        revenue: dict[int, int] = defaultdict(int)
+        for item in items:
+            units[item["product_id"]] += item["quantity"]
+            revenue[item["product_id"]] += item["quantity"] * item["unit_price"]
+
+        category_units: dict[str, int] = defaultdict(int)
+        category_revenue: dict[str, int] = defaultdict(int)
+        for product_id in units:
+            category = categories.get(product_id) or ""
+            category_units[category] += units[product_id]
+            category_revenue[category] += revenue[product_id]
+
+        self._increment(
+            ProductSales,
+            ProductSales.product_id,
+            [{"product_id": product_id, "orders": 1, "units": units[product_id], "revenue": revenue[product_id], "last_sold_at": ordered_at} for product_id in sorted(units)],
+            ("orders", "units", "revenue"),
+            latest=("last_sold_at",),
+        )
+        self._increment(
+            CategorySales,
+            CategorySales.category,
+            [{"category": category, "units": category_units[category], "revenue": category_revenue[category]} for category in sorted(category_units)],
+            ("units", "revenue"),
+        )
+        self._increment(
+            DailySales,
+            DailySales.day,
+            [{"day": ordered_at.date(), "orders": 1, "units": sum(units.values()), "revenue": sum(revenue.values())}],
+            ("orders", "units", "revenue"),
+        )
+
+    def _increment(self, model: Any, key: Any, rows: list[dict[str, Any]], counters: tuple[str, ...], latest: tuple[str, ...] = ()) -> None:
+        """Add rows' counters to existing rollup rows, inserting rows that do not exist yet."""
+        table = model.__table__
+        make_insert = UPSERT_INSERTS.get(self.db.get_bind().dialect.name)
+        if make_insert is not None:
+            stmt = make_insert(table)
+            set_ = {name: table.c[name] + stmt.excluded[name] for name in counters}
+            set_.update({name: stmt.excluded[name] for name in latest})
+            self.db.execute(stmt.on_conflict_do_update(index_elements=[key], set_=set_), rows)
+            return
+
+        # Portable fallback: increment in place, insert whatever did not exist
+        for row in rows:
+            values = {name: table.c[name] + row[name] for name in counters}
+            values.update({name: row[name] for name in latest})
+            result = self.db.execute(update(table).where(table.c[key.key] == row[key.key]).values(values))
+            if result.rowcount == 0:
+                self.db.execute(insert(table).values(row))
+
+    def rebuild(self) -> SalesRollupRebuildResponse:
+        """
+        Recompute every rollup from the order history and commit.
+        On PostgreSQL the rollup tables are locked for the duration, so orders placed
+        meanwhile wait and are then added on top of the rebuilt totals instead of being lost.
+        Categories are taken from the products' current category.
+        """
+        try:
+            if self.db.get_bind().dialect.name == "postgresql":
+                self.db.execute(text("LOCK TABLE daily_sales, product_sales, category_sales IN EXCLUSIVE MODE"))
+
+            for model in (DailySales, ProductSales, CategorySales):
+                self.db.execute(delete(model))
+
+            line_revenue = func.sum(OrderItem.quantity * OrderItem.unit_price)
+            day = func.date(Order.created_at)
+            self.db.execute(
+                insert(DailySales).from_select(
+                    ["day", "orders", "units", "revenue"],
+                    select(day, func.count(func.distinct(Order.id)), func.sum(OrderItem.quantity), line_revenue).join(OrderItem, OrderItem.order_id == Order.id).group_by(day),
+                )
+            )
+            self.db.execute(
+                insert(ProductSales).from_select(
+                    ["product_id", "orders", "units", "revenue", "last_sold_at"],
+                    select(OrderItem.product_id, func.count(func.distinct(OrderItem.order_id)), func.sum(OrderItem.quantity), line_revenue, func.max(Order.created_at))
+                    .join(Order, Order.id == OrderItem.order_id)
+                    .group_by(OrderItem.product_id),
+                )
+            )
+            category = func.coalesce(Product.category, "")
+            self.db.execute(
+                insert(CategorySales).from_select(
+                    ["category", "units", "revenue"],
+                    select(category, func.sum(OrderItem.quantity), line_revenue).join(Product, Product.id == OrderItem.product_id).group_by(category),
+                )
+            )
+
+            counts = SalesRollupRebuildResponse(
+                days=self.db.scalar(select(func.count()).select_from(DailySales)),
+                products=self.db.scalar(select(func.count()).select_from(ProductSales)),
+                categories=self.db.scalar(select(func.count()).select_from(CategorySales)),
+            )
+            self.db.commit()
+            return counts
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def daily_revenue(self, start: date, end: date) -> list[DailySalesResponse]:
+        """One entry per day from start to end inclusive; days without orders are zero."""
+        rows = {row.day: row for row in self.db.query(DailySales).filter(DailySales.day >= start, DailySales.day <= end)}
+        days = (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+        return [DailySalesResponse.model_validate(rows[day]) if day in rows else DailySalesResponse(day=day, orders=0, units=0, revenue=0) for day in days]
+
+    def top_products(self, limit: int = 10, by: str = "units") -> list[ProductSalesResponse]:
+        """Best sellers by units or revenue, read from the rollup index."""
+        ordering = TOP_PRODUCT_ORDERINGS[by]
+        rows = (
+            self.db.query(ProductSales, Product.name)
+            .outerjoin(Product, Product.id == ProductSales.product_id)
+            .order_by(ordering.desc(), ProductSales.product_id.desc())
+            .limit(limit)
+            .all()
+        )
+        return [
+            ProductSalesResponse(product_id=sales.product_id, name=name, orders=sales.orders, units=sales.units, revenue=sales.revenue, last_sold_at=sales.last_sold_at)
+            for sales, name in rows
+        ]
+
+    def category_sales(self) -> list[CategorySalesResponse]:
+        rows = self.db.query(CategorySales).order_by(CategorySales.revenue.desc()).all()
+        return [CategorySalesResponse(category=row.category or None, units=row.units, revenue=row.revenue) for row in rows]
+
+
+class AsyncSalesRollupService:
+    """Awaitable counterpart of SalesRollupService for async route handlers."""
+
+    def __init__(self, db: DbSession) -> None:
+        self.db = db
+
+    async def daily_revenue(self, start: date, end: date) -> list[DailySalesResponse]:
+        return await run_db(self.db, lambda session: SalesRollupService(session).daily_revenue(start, end))
+
+    async def top_products(self, limit: int = 10, by: str = "units") -> list[ProductSalesResponse]:
+        return await run_db(self.db, lambda session: SalesRollupService(session).top_products(limit, by))
+
+    async def category_sales(self) -> list[CategorySalesResponse]:
+        return await run_db(self.db, lambda session: SalesRollupService(session).category_sales())
+
+    async def rebuild(self) -> SalesRollupRebuildResponse:
+        return await run_db(self.db, lambda session: SalesRollupService(session).rebuild())
@@ -0,0 +1,83 @@
+# flake8: noqa: E501
+import re
+from typing import Any, Optional
+from sqlalchemy import column, func, literal_column, or_, table, text  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+from app.db.search import TEXT_SEARCH_CONFIG
+from app.models.product import Product
+from app.services.product_filters import NO_FILTERS, ProductFilters
+
+products_fts = table("products_fts", column("rowid"))
+
+# bm25 column weights for products_fts(name, description, category)
+FTS5_WEIGHTS = (10.0, 1.0, 5.0)
+
+
+class ProductSearchService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search_rows(self, search_query: str, page: int = 1, page_size: int = 20, count: str = "exact", filters: ProductFilters = NO_FILTERS) -> tuple[list[Product], Optional[int]]:
+        """
+        Relevance-ranked product search over name, description and category.
+        Postgres uses the tsvector GIN index plus pg_trgm similarity on name for typo tolerance,
+        SQLite uses FTS5 with bm25 ranking, and other databases fall back to ILIKE on name.
+        Returns (ORM rows for the page, total or None).
+        BUG-BE-004: Products with stock=0 are included in the results (should filter them out)
+        """
+        query = self.build_query(search_query)
+
+        if query is None:
+            return [], 0 if count != "none" else None
+
+        query = filters.apply(query)
+        total = query.order_by(None).count() if count != "none" else None
+        products = query.offset((page - 1) * page_size).limit(page_size).all()
+
+        return products, total
+
+    def build_query(self, search_query: str) -> Optional[Any]:
+        """Relevance-ordered Product query for the dialect, or None when the text has nothing to match."""
+        dialect = self.db.get_bind().dialect.name
+
+        if dialect == "postgresql":
+            return self._postgres_query(search_query)
+        if dialect == "sqlite":
+            return self._sqlite_query(search_query)
+        return self.db.query(Product).filter(Product.name.ilike(f"%{search_query}%")).order_by(Product.id)
+
+    def _postgres_query(self, search_query: str) -> Any:
+        tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, search_query)
+        search_vector = literal_column("products.search_vector")
+        rank = func.ts_rank_cd(search_vector, tsquery) + func.similarity(Product.name, search_query)
+
+        # Either a full-text hit or a trigram match on name ("%" uses the gin_trgm_ops index)
+        return (
+            self.db.query(Product)
+            .filter(or_(search_vector.bool_op("@@")(tsquery), Product.name.bool_op("%")(search_query)))
+            .order_by(rank.desc(), Product.id)
+        )
+
+    def _sqlite_query(self, search_query: str) -> Optional[Any]:
+        match = build_fts5_match(search_query)
+        if match is None:
+            return None
+
+        weights = ", ".join(str(weight) for weight in FTS5_WEIGHTS)
+        return (
+            self.db.query(Product)
+            .join(products_fts, products_fts.c.rowid == Product.id)
+            .filter(text("products_fts MATCH :match").bindparams(match=match))
+            .order_by(text(f"bm25(products_fts, {weights})"), Product.id)
+        )
+
+
+def build_fts5_match(search_query: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+    Every word becomes a quoted prefix term, so user input can never inject FTS5 syntax.
+    """
+    tokens = re.findall(r"\w+", search_query)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
@@ -0,0 +1,99 @@
+# flake8: noqa: E501
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+from sqlalchemy import Integer, column, literal, select, union_all, update, values  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+from app.models.product import Product
+from app.schemas.order import OrderItemCreate
+
+
+@dataclass(frozen=True)
+class OversoldLine:
+    product_id: int
+    requested: int
+    available: int
+
+
+class InsufficientStockError(ValueError):
+    """Raised when one or more order lines cannot be reserved."""
+
+    def __init__(self, lines: list[OversoldLine]) -> None:
+        self.lines = lines
+        details = "; ".join(f"product ID {line.product_id} (requested {line.requested}, available {line.available})" for line in lines)
+        super().__init__(f"Insufficient stock for {details}")
+
+
+class StockService:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def reserve(self, items: list[OrderItemCreate]) -> None:
+        """
+        Atomically decrement stock for every order line in two statements, whatever the cart size.
+        The rows are first locked in ascending product ID order, so concurrent carts always
+        acquire row locks in the same order and cannot deadlock; one guarded UPDATE then
+        decrements every line that has enough stock and returns the IDs it changed.
+        Runs inside the caller's transaction; the caller must roll back when
+        InsufficientStockError is raised.
+        """
+        quantities = _quantities(items)
+        available = self._lock(quantities)
+
+        cart = self._quantities_table(quantities)
+        result = self.db.execute(
+            update(Product)
+            .where(Product.id == cart.c.product_id, Product.stock >= cart.c.quantity)
+            .values(stock=Product.stock - cart.c.quantity)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+        reserved = set(result.scalars())
+
+        oversold = [product_id for product_id in sorted(quantities) if product_id not in reserved]
+        if oversold:
+            # Rows are still locked, so the stock read by _lock is what the UPDATE saw; report every oversold line in one response
+            raise InsufficientStockError(
+                [OversoldLine(product_id=product_id, requested=quantities[product_id], available=available.get(product_id, 0)) for product_id in oversold]
+            )
+
+    def release(self, items: list[OrderItemCreate]) -> None:
+        """
+        Return reserved stock for order lines whose order will not be recorded, in one UPDATE.
+        Takes row locks in the same ascending product ID order as reserve. Runs inside the caller's transaction.
+        """
+        quantities = _quantities(items)
+        self._lock(quantities)
+
+        cart = self._quantities_table(quantities)
+        self.db.execute(
+            update(Product)
+            .where(Product.id == cart.c.product_id)
+            .values(stock=Product.stock + cart.c.quantity)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _lock(self, quantities: dict[int, int]) -> dict[int, int]:
+        """Lock the cart's product rows in ascending ID order (FOR UPDATE; a no-op on SQLite) and return their stock."""
+        rows = self.db.execute(select(Product.id, Product.stock).where(Product.id.in_(quantities.keys())).order_by(Product.id).with_for_update())
+        return {row.id: row.stock for row in rows}
+
+    def _quantities_table(self, quantities: dict[int, int]) -> Any:
+        """
+        (product_id, quantity) rows to join the UPDATE against: a VALUES list, or a UNION ALL
+        derived table where VALUES columns cannot be aliased (SQLite). Not a CTE: pysqlite only
+        opens a transaction for statements starting with UPDATE, so a WITH prefix would autocommit.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            return values(column("product_id", Integer), column("quantity", Integer), name="cart").data(list(quantities.items()))
+        return union_all(
+            *(select(literal(product_id, Integer).label("product_id"), literal(quantity, Integer).label("quantity")) for product_id, quantity in quantities.items())
+        ).subquery("cart")
+
+
+def _quantities(items: list[OrderItemCreate]) -> dict[int, int]:
+    """Total quantity per distinct product."""
+    quantities: dict[int, int] = defaultdict(int)
+    for item in items:
+        quantities[item.product_id] += item.quantity
+    return dict(quantities)
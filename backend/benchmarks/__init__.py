@@ -0,0 +1,5 @@
+# Benchmark scripts package
+import os
+
+# Point the application engine at the benchmark database before any app module is imported
+os.environ.setdefault("DATABASE_URL", os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench.db"))
@@ -0,0 +1,71 @@
+# flake8: noqa: E501
+"""
+Compare sync (threadpool) and async (AsyncSession) database modes at high concurrency.
+
+Starts one uvicorn server per mode against the same seeded database and drives
+GET /api/products and GET /api/products/{id} with a fixed number of in-flight requests.
+
+Usage:
+    python -m benchmarks.async_vs_sync --concurrency 200 --requests 5000
+"""
+import argparse
+import asyncio
+import random
+import time
+import httpx  # type: ignore
+from benchmarks.common import BENCH_DATABASE_URL, make_engine, make_session_factory, percentile, report, reset_schema, seed_products, serve_app, to_async_url
+
+
+async def drive(base_url: str, concurrency: int, total: int, product_count: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        async def worker() -> None:
+            nonlocal errors
+            for _ in remaining:
+                if random.random() < 0.5:
+                    path = f"/api/products?page={random.randint(1, 10)}&page_size=20"
+                else:
+                    path = f"/api/products/{random.randint(1, product_count)}"
+                started = time.perf_counter()
+                response = await client.get(base_url + path)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    reset_schema(engine)
+    with make_session_factory(engine)() as db:
+        seed_products(db, args.products)
+    engine.dispose()
+
+    for mode, url in (("sync", BENCH_DATABASE_URL), ("async", to_async_url(BENCH_DATABASE_URL))):
+        with serve_app(args.port, DATABASE_URL=url, PRODUCT_CACHE_ENABLED="false") as base_url:
+            metrics = asyncio.run(drive(base_url, args.concurrency, args.requests, args.products))
+        report("async_vs_sync", mode=mode, concurrency=args.concurrency, requests=args.requests, **metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# flake8: noqa: E501
+"""
+Measure per-request authentication overhead on GET /api/auth/me with the token and
+user caches disabled (JWT decode + user SELECT every time) and enabled.
+
+Runs the app in-process through an ASGI transport, so the numbers exclude network time.
+
+Usage:
+    python -m benchmarks.auth_overhead --requests 2000
+"""
+import argparse
+import asyncio
+import time
+import httpx  # type: ignore
+from app.core.cache import token_cache, user_cache
+from app.core.security import create_access_token
+from app.main import app
+from app.models import User
+from benchmarks.common import make_engine, make_session_factory, percentile, report, reset_schema
+
+
+async def measure(token: str, total: int) -> list[float]:
+    latencies = []
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for _ in range(total):
+            started = time.perf_counter()
+            response = await client.get("/api/auth/me", headers=headers)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    reset_schema(engine)
+    with make_session_factory(engine)() as db:
+        # The endpoint never verifies the password, so any string works as the stored hash
+        db.add(User(email="bench@example.com", username="bench", hashed_password="unused"))
+        db.commit()
+
+    token = create_access_token({"sub": "bench"})
+    for cached in (False, True):
+        token_cache.enabled = user_cache.enabled = cached
+        token_cache.clear()
+        user_cache.clear()
+        latencies = asyncio.run(measure(token, args.requests))
+        report(
+            "auth_overhead",
+            caches="enabled" if cached else "disabled",
+            requests=args.requests,
+            mean_us=round(sum(latencies) / len(latencies) * 1e6, 1),
+            p50_us=round(percentile(latencies, 50) * 1e6, 1),
+            p99_us=round(percentile(latencies, 99) * 1e6, 1),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# flake8: noqa: E501
+"""
+Measure bulk catalog import and export throughput over HTTP.
+
+Streams a synthetic supplier feed to POST /api/products/import (first as inserts,
+then again as updates of the same SKUs), then downloads GET /api/products/export,
+and reports rows/sec for each phase and format.
+
+Usage:
+    python -m benchmarks.bulk_transfer --rows 200000
+"""
+import argparse
+import csv
+import io
+import json
+import time
+from typing import Iterator
+import httpx  # type: ignore
+from app.core.security import get_password_hash
+from app.models import User
+from benchmarks.common import ADJECTIVES, CATEGORIES, NOUNS, make_engine, make_session_factory, report, reset_schema, serve_app
+
+PASSWORD = "password123"
+FIELDS = ["sku", "name", "description", "price", "stock", "category"]
+
+
+def feed_rows(rows: int, revision: int) -> Iterator[dict]:
+    for i in range(rows):
+        yield {
+            "sku": f"SKU-{i:08d}",
+            "name": f"{NOUNS[i % 10]} {ADJECTIVES[(i // 10) % 10]} {i}",
+            "description": f"High-quality {NOUNS[i % 10]} (feed revision {revision})",
+            "price": 1000 + (i % 100) * 100 + revision,
+            "stock": 100,
+            "category": CATEGORIES[i % len(CATEGORIES)],
+        }
+
+
+def encode_feed(fmt: str, rows: int, revision: int, chunk_rows: int = 1000) -> Iterator[bytes]:
+    """Generate the request body lazily so the client does not hold the whole feed either."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS, lineterminator="\n")
+    if fmt == "csv":
+        writer.writeheader()
+    for i, row in enumerate(feed_rows(rows, revision), start=1):
+        if fmt == "csv":
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(row) + "\n")
+        if i % chunk_rows == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    reset_schema(engine)
+    with make_session_factory(engine)() as db:
+        db.add(User(email="admin@example.com", username="admin", hashed_password=get_password_hash(PASSWORD), is_superuser=True))
+        db.commit()
+
+    with serve_app(args.port) as base_url, httpx.Client(base_url=base_url, timeout=None) as client:
+        token = client.post("/api/auth/login", json={"username": "admin", "password": PASSWORD}).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        for revision, (phase, fmt) in enumerate((("insert", "ndjson"), ("update", "ndjson"), ("update", "csv"))):
+            started = time.perf_counter()
+            response = client.post("/api/products/import", params={"format": fmt}, content=encode_feed(fmt, args.rows, revision))
+            elapsed = time.perf_counter() - started
+            response.raise_for_status()
+            result = response.json()
+            report("bulk_import", phase=phase, format=fmt, rows=args.rows, upserted=result["upserted"], failed=result["failed"], seconds=round(elapsed, 2), rows_per_sec=round(args.rows / elapsed))
+
+        for fmt in ("ndjson", "csv"):
+            started = time.perf_counter()
+            lines = size = 0
+            with client.stream("GET", "/api/products/export", params={"format": fmt}) as response:
+                response.raise_for_status()
+                for chunk in response.iter_bytes():
+                    lines += chunk.count(b"\n")
+                    size += len(chunk)
+            elapsed = time.perf_counter() - started
+            exported = lines - 1 if fmt == "csv" else lines
+            report("bulk_export", format=fmt, rows=exported, megabytes=round(size / 1e6, 1), seconds=round(elapsed, 2), rows_per_sec=round(exported / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# flake8: noqa: E501
+"""
+Measure checkout latency while the payment gateway is healthy, slow, flaky, hanging or down.
+
+Each scenario starts benchmarks.fake_gateway with different latency/error settings, points
+the API at it with PAYMENT_GATEWAY_URL and places orders from concurrent clients. Reports
+latency percentiles per scenario, response status counts, how many authorizations the
+gateway actually received, and the client's retry and circuit breaker counters.
+
+Usage:
+    python -m benchmarks.checkout_latency --duration 10 --concurrency 50
+"""
+import argparse
+import asyncio
+import random
+import time
+import httpx  # type: ignore
+from app.core.security import get_password_hash
+from app.models import User
+from benchmarks.common import make_engine, make_session_factory, percentile, report, reset_schema, seed_products, serve_app
+
+PASSWORD = "password123"
+
+SCENARIOS = {
+    "healthy": {"FAKE_GATEWAY_LATENCY_MS": "20"},
+    "slow": {"FAKE_GATEWAY_LATENCY_MS": "1000", "FAKE_GATEWAY_JITTER_MS": "200"},
+    "flaky": {"FAKE_GATEWAY_LATENCY_MS": "20", "FAKE_GATEWAY_ERROR_RATE": "0.3"},
+    "hanging": {"FAKE_GATEWAY_LATENCY_MS": "20", "FAKE_GATEWAY_HANG_RATE": "0.2"},
+    "down": {"FAKE_GATEWAY_LATENCY_MS": "20", "FAKE_GATEWAY_ERROR_RATE": "1"},
+}
+
+
+async def place_orders(base_url: str, duration: float, concurrency: int, products: int) -> tuple[list[float], dict[int, int]]:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    deadline = time.monotonic() + duration
+    async with httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=concurrency), timeout=60) as client:
+
+        async def customer() -> None:
+            while time.monotonic() < deadline:
+                order = {"user_id": "bench", "items": [{"product_id": random.randint(1, products), "quantity": 1}]}
+                started = time.perf_counter()
+                response = await client.post("/api/orders", json=order)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        await asyncio.gather(*(customer() for _ in range(concurrency)))
+    return latencies, statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--gateway-port", type=int, default=9100)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    for scenario in args.scenarios:
+        reset_schema(engine)
+        with make_session_factory(engine)() as db:
+            seed_products(db, args.products, stock=1_000_000)
+            db.add(User(email="admin@example.com", username="admin", hashed_password=get_password_hash(PASSWORD), is_superuser=True))
+            db.commit()
+
+        gateway = serve_app(args.gateway_port, app="benchmarks.fake_gateway:app", ready_path="/stats", **SCENARIOS[scenario])
+        with gateway as gateway_url, serve_app(args.port, PAYMENT_GATEWAY_URL=gateway_url) as base_url:
+            latencies, statuses = asyncio.run(place_orders(base_url, args.duration, args.concurrency, args.products))
+
+            gateway_stats = httpx.get(f"{gateway_url}/stats").json()
+            token = httpx.post(f"{base_url}/api/auth/login", json={"username": "admin", "password": PASSWORD}).json()["access_token"]
+            client_stats = httpx.get(f"{base_url}/api/system/payment-gateway", headers={"Authorization": f"Bearer {token}"}).json()
+
+        report(
+            "checkout_latency",
+            scenario=scenario,
+            concurrency=args.concurrency,
+            orders_per_sec=round(len(latencies) / args.duration, 1),
+            p50_ms=round(percentile(latencies, 50) * 1000, 1),
+            p99_ms=round(percentile(latencies, 99) * 1000, 1),
+            max_ms=round(max(latencies, default=0) * 1000, 1),
+            statuses=statuses,
+            gateway_authorized=gateway_stats["authorized"],
+            gateway_requests=gateway_stats["requests"],
+            client_retries=client_stats["retries"],
+            breaker_opened=client_stats["breaker"]["opened"],
+            breaker_rejected=client_stats["breaker"]["rejected"],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# flake8: noqa: E501
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against BENCH_DATABASE_URL (a local SQLite file by default).
+The schema is dropped and recreated on every run, so point it at a scratch database.
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+import httpx  # type: ignore
+from sqlalchemy import create_engine, insert  # type: ignore
+from sqlalchemy.engine import Engine, make_url  # type: ignore
+from sqlalchemy.orm import Session, sessionmaker  # type: ignore
+from app.db.base import Base
+from app.models import Order, OrderItem, Product, User
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench.db")
+
+ASYNC_DRIVER_FOR = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def to_async_url(url: str) -> str:
+    """The same database through the async driver the API uses in async mode."""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVER_FOR[parsed.get_backend_name()]).render_as_string(hide_password=False)
+
+
+def make_engine(url: str = BENCH_DATABASE_URL, **kwargs: Any) -> Engine:
+    """Create an engine suitable for multi-threaded benchmarking."""
+    if url.startswith("sqlite"):
+        kwargs.setdefault("connect_args", {"check_same_thread": False, "timeout": 30})
+    return create_engine(url, **kwargs)
+
+
+def reset_schema(engine: Engine) -> None:
+    """Drop and recreate every table."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+
+def make_session_factory(engine: Engine) -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+NOUNS = ["Laptop", "Mouse", "Keyboard", "Monitor", "Webcam", "Headphones", "Speaker", "Tablet", "Phone", "Watch"]
+ADJECTIVES = ["Pro", "Ultra", "Premium", "Deluxe", "Advanced", "Smart", "Wireless", "Portable", "Compact", "Professional"]
+CATEGORIES = ["Electronics", "Home", "Furniture", "Accessories", "Stationery", "Sports", "Books", "Toys"]
+
+
+def seed_products(db: Session, count: int, stock: int = 100, batch_size: int = 10000) -> None:
+    """Insert `count` synthetic products in batches, named like the init.sql sample data."""
+    for start in range(0, count, batch_size):
+        rows = [
+            {
+                "name": f"{NOUNS[i % 10]} {ADJECTIVES[(i // 10) % 10]} {i}",
+                "description": f"High-quality {NOUNS[i % 10]} with advanced features and {ADJECTIVES[(i // 10) % 10]} design",
+                "price": 1000 + (i % 100) * 100,
+                "stock": stock,
+                "image_url": "/product~image.png",
+                "category": CATEGORIES[i % len(CATEGORIES)],
+            }
+            for i in range(start, min(start + batch_size, count))
+        ]
+        db.execute(insert(Product), rows)
+    db.commit()
+
+
+def product_price(product_id: int) -> int:
+    """Price seed_products gives the product with this ID (IDs start at 1 on a fresh schema)."""
+    return 1000 + ((product_id - 1) % 100) * 100
+
+
+def seed_users(db: Session, count: int, hashed_password: str, batch_size: int = 10000) -> None:
+    """Insert users user0..user{count-1} sharing one password hash, so seeding does not pay bcrypt per user."""
+    for start in range(0, count, batch_size):
+        rows = [{"email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": hashed_password, "is_active": True} for i in range(start, min(start + batch_size, count))]
+        db.execute(insert(User), rows)
+    db.commit()
+
+
+def seed_orders(db: Session, count: int, items_per_order: int, products: int, users: int, days: int = 365, batch_size: int = 10000, seed: int = 0) -> None:
+    """
+    Insert `count` paid orders for users seeded by seed_users, each with `items_per_order`
+    lines on random products, spread over the last `days` days. Order IDs are assigned
+    here so order_items can be inserted in the same batches; the schema must be fresh.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for start in range(0, count, batch_size):
+        orders: list[dict[str, Any]] = []
+        items: list[dict[str, Any]] = []
+        for order_id in range(start + 1, min(start + batch_size, count) + 1):
+            total = 0
+            for product_id in rng.sample(range(1, products + 1), min(items_per_order, products)):
+                quantity = rng.randint(1, 3)
+                items.append({"order_id": order_id, "product_id": product_id, "quantity": quantity, "unit_price": product_price(product_id)})
+                total += quantity * product_price(product_id)
+            created_at = now - timedelta(seconds=rng.randrange(days * 86400))
+            orders.append({"id": order_id, "user_id": f"user{rng.randrange(users)}", "total_amount": total, "status": "paid", "created_at": created_at})
+        db.execute(insert(Order), orders)
+        db.execute(insert(OrderItem), items)
+        db.commit()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def report(name: str, **metrics: Any) -> dict[str, Any]:
+    """Print benchmark results as a single JSON line and return them."""
+    result = {"benchmark": name, **metrics}
+    print(json.dumps(result, default=str))
+    return result
+
+
+@contextmanager
+def serve_app(port: int, app: str = "app.main:app", ready_path: str = "/api/products?page_size=1", **env: str) -> Iterator[str]:
+    """
+    Run an ASGI app (the API by default) under uvicorn in a subprocess and yield its base URL
+    once ready_path answers. Extra keyword arguments are passed to the server as environment variables.
+    """
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}{ready_path}")
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError(f"server at {base_url} did not start")
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        server.terminate()
+        try:
+            # uvicorn waits for in-flight requests on shutdown, which may never finish
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
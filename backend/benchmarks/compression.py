@@ -0,0 +1,72 @@
+# flake8: noqa: E501
+"""
+Measure response compression for product listing pages at several page sizes and levels.
+
+For each encoding and level: compressed size, ratio, and the time to compress the page once,
+which is what every request would pay without the precompressed cache. precompressed_hit is
+the cost of serving an already compressed page from product_cache, paid once per request
+after the first for each catalog version.
+
+Usage:
+    python -m benchmarks.compression --page-sizes 20 50 100 --iterations 200
+"""
+import argparse
+import gzip
+import time
+import brotli  # type: ignore
+from app.core.cache import LRUCache
+from app.services.product_service import ProductService
+from benchmarks.common import make_engine, make_session_factory, report, reset_schema, seed_products
+
+LEVELS = {
+    "gzip": (lambda body, level: gzip.compress(body, compresslevel=level, mtime=0), [1, 6, 9]),
+    "br": (lambda body, level: brotli.compress(body, quality=level), [1, 5, 11]),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[20, 50, 100])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    reset_schema(engine)
+    db = make_session_factory(engine)()
+    seed_products(db, max(args.page_sizes))
+    cache = LRUCache(max_entries=100, ttl_seconds=3600)
+
+    for page_size in args.page_sizes:
+        payload = ProductService(db).list_products(page=1, page_size=page_size).to_json()
+        for encoding, (compress, levels) in LEVELS.items():
+            for level in levels:
+                compressed = compress(payload, level)
+                started = time.perf_counter()
+                for _ in range(args.iterations):
+                    compress(payload, level)
+                compress_us = (time.perf_counter() - started) / args.iterations * 1e6
+
+                key = ("compressed", page_size, encoding, level)
+                cache.set(key, compressed)
+                started = time.perf_counter()
+                for _ in range(args.iterations):
+                    cache.get(key)
+                hit_us = (time.perf_counter() - started) / args.iterations * 1e6
+
+                report(
+                    "compression",
+                    page_size=page_size,
+                    encoding=encoding,
+                    level=level,
+                    raw_bytes=len(payload),
+                    compressed_bytes=len(compressed),
+                    ratio=round(len(payload) / len(compressed), 2),
+                    compress_us=round(compress_us, 1),
+                    precompressed_hit_us=round(hit_us, 2),
+                )
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# flake8: noqa: E501
+"""
+Local fake payment gateway for exercising HTTPPaymentGateway.
+
+Behaviour is configured through environment variables:
+    FAKE_GATEWAY_LATENCY_MS       mean response latency (default 20)
+    FAKE_GATEWAY_JITTER_MS        uniform +/- jitter on the latency (default 5)
+    FAKE_GATEWAY_ERROR_RATE       fraction of requests answered with 503 (default 0)
+    FAKE_GATEWAY_HANG_RATE        fraction of requests that stall instead of answering (default 0)
+    FAKE_GATEWAY_HANG_SECONDS     how long a stalled request takes (default 30)
+    FAKE_GATEWAY_DECLINE_RATE     fraction of authorizations declined with 402 (default 0)
+
+Authorizations are deduplicated by Idempotency-Key, so retried requests are charged once.
+POST /authorizations/{key}/void voids the authorization made with a key and refuses later
+authorizations with it, so a void racing an in-flight authorize never leaves a hold.
+
+Usage:
+    FAKE_GATEWAY_LATENCY_MS=500 uvicorn benchmarks.fake_gateway:app --port 9100
+    PAYMENT_GATEWAY_URL=http://127.0.0.1:9100 uvicorn app.main:app
+"""
+import asyncio
+import os
+import random
+import uuid
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException  # type: ignore
+from pydantic import BaseModel  # type: ignore
+
+LATENCY_MS = float(os.getenv("FAKE_GATEWAY_LATENCY_MS", "20"))
+JITTER_MS = float(os.getenv("FAKE_GATEWAY_JITTER_MS", "5"))
+ERROR_RATE = float(os.getenv("FAKE_GATEWAY_ERROR_RATE", "0"))
+HANG_RATE = float(os.getenv("FAKE_GATEWAY_HANG_RATE", "0"))
+HANG_SECONDS = float(os.getenv("FAKE_GATEWAY_HANG_SECONDS", "30"))
+DECLINE_RATE = float(os.getenv("FAKE_GATEWAY_DECLINE_RATE", "0"))
+
+app = FastAPI(title="Fake Payment Gateway")
+
+authorizations: dict[str, dict[str, str]] = {}
+voided_keys: set[str] = set()
+counters = {"requests": 0, "authorized": 0, "declined": 0, "errors": 0, "hung": 0, "voided": 0}
+
+
+class AuthorizeRequest(BaseModel):
+    amount: int
+
+
+async def simulate_gateway() -> None:
+    counters["requests"] += 1
+    if random.random() < HANG_RATE:
+        counters["hung"] += 1
+        await asyncio.sleep(HANG_SECONDS)
+    await asyncio.sleep(max(0.0, LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS)) / 1000)
+    if random.random() < ERROR_RATE:
+        counters["errors"] += 1
+        raise HTTPException(status_code=503, detail="gateway overloaded")
+
+
+@app.post("/authorize")
+async def authorize(request: AuthorizeRequest, idempotency_key: Optional[str] = Header(None)) -> dict[str, str]:
+    await simulate_gateway()
+    if idempotency_key in voided_keys:
+        raise HTTPException(status_code=409, detail="idempotency key was voided")
+    if idempotency_key in authorizations:
+        return authorizations[idempotency_key]
+
+    if random.random() < DECLINE_RATE:
+        counters["declined"] += 1
+        raise HTTPException(status_code=402, detail="card declined")
+
+    counters["authorized"] += 1
+    result = {"status": "authorized", "transaction_id": f"fake-{uuid.uuid4()}"}
+    if idempotency_key is not None:
+        authorizations[idempotency_key] = result
+    return result
+
+
+@app.post("/transactions/{transaction_id}/void")
+async def void(transaction_id: str) -> dict[str, str]:
+    await simulate_gateway()
+    counters["voided"] += 1
+    return {"status": "voided", "transaction_id": transaction_id}
+
+
+@app.post("/authorizations/{idempotency_key}/void")
+async def void_by_key(idempotency_key: str) -> dict[str, str]:
+    await simulate_gateway()
+    voided_keys.add(idempotency_key)
+    authorization = authorizations.get(idempotency_key)
+    if authorization is None:
+        raise HTTPException(status_code=404, detail="no authorization for this idempotency key")
+    counters["voided"] += 1
+    return {"status": "voided", "transaction_id": authorization["transaction_id"]}
+
+
+@app.get("/stats")
+async def stats() -> dict[str, int]:
+    return counters
@@ -0,0 +1,295 @@
+# flake8: noqa: E501
+"""
+End-to-end load test: seed a synthetic shop, drive mixed traffic against the API and
+compare the results with a stored baseline.
+
+Seeds users, products and orders at the requested volumes (e.g. --products 1000000
+--orders 2000000 --items-per-order 5 for 10M order items), then starts the API under
+uvicorn and runs virtual users that log in and pick weighted operations:
+
+    browse    GET /api/products (random page, sort and filters)
+    product   GET /api/products/{id}
+    search    GET /api/products?q=...
+    login     POST /api/auth/login
+    checkout  POST /api/orders
+    history   GET /api/orders/history/summary
+
+Reports requests, throughput and p50/p95/p99 latency per operation, writes them to
+--output as JSON and, with --baseline, flags operations whose p95/p99 latency grew or
+whose throughput or success rate dropped by more than --tolerance. Exits with status 1
+when a regression is found and 2 when the baseline was recorded with another configuration.
+
+Seeding the large volumes takes a while; --reuse runs against the data a previous run left behind.
+
+Usage:
+    python -m benchmarks.load_test --products 100000 --orders 200000 --duration 60 --concurrency 50
+    python -m benchmarks.load_test --reuse --baseline load_test_baseline.json
+    python -m benchmarks.load_test --reuse --baseline load_test_baseline.json --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+import httpx  # type: ignore
+from sqlalchemy import func, select  # type: ignore
+from sqlalchemy.engine import make_url  # type: ignore
+from app.core.security import get_password_hash
+from app.models import Order, Product, User
+from app.services.sales_rollup_service import SalesRollupService
+from benchmarks.common import (
+    ADJECTIVES,
+    BENCH_DATABASE_URL,
+    CATEGORIES,
+    NOUNS,
+    make_engine,
+    make_session_factory,
+    percentile,
+    report,
+    reset_schema,
+    seed_orders,
+    seed_products,
+    seed_users,
+    serve_app,
+    to_async_url,
+)
+
+PASSWORD = "password123"
+
+DEFAULT_MIX = {"browse": 35, "product": 25, "search": 15, "login": 5, "checkout": 10, "history": 10}
+
+# Settings that change what a run measures; a baseline only applies to runs with the same values.
+# The order count is left out because every run's checkouts add to it.
+COMPARABLE_CONFIG = ("database", "mode", "users", "products", "items_per_order", "concurrency", "mix", "product_cache")
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    """Parse "browse=35,search=15,..." into operation weights."""
+    mix: dict[str, int] = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation {name.strip()!r}; expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+class VirtualUser:
+    """One logged-in shopper issuing weighted operations over a shared client."""
+
+    def __init__(self, client: httpx.AsyncClient, index: int, args: argparse.Namespace, rng: random.Random) -> None:
+        self.client = client
+        self.username = f"user{index}"
+        self.args = args
+        self.rng = rng
+        self.headers: dict[str, str] = {}
+        self.operations: dict[str, Callable[[], Awaitable[httpx.Response]]] = {
+            "browse": self.browse,
+            "product": self.product,
+            "search": self.search,
+            "login": self.login,
+            "checkout": self.checkout,
+            "history": self.history,
+        }
+
+    async def login(self) -> httpx.Response:
+        response = await self.client.post("/api/auth/login", json={"username": self.username, "password": PASSWORD})
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response
+
+    async def browse(self) -> httpx.Response:
+        params: dict[str, Any] = {"page": self.rng.randint(1, 5), "page_size": 20, "sort": self.rng.choice(("created_at", "price"))}
+        if self.rng.random() < 0.3:
+            params["category"] = self.rng.choice(CATEGORIES)
+            params["facets"] = "true"
+        if self.rng.random() < 0.2:
+            params["in_stock"] = "true"
+        return await self.client.get("/api/products", params=params)
+
+    async def product(self) -> httpx.Response:
+        return await self.client.get(f"/api/products/{self.rng.randint(1, self.args.products)}")
+
+    async def search(self) -> httpx.Response:
+        terms = [self.rng.choice(NOUNS)] + ([self.rng.choice(ADJECTIVES)] if self.rng.random() < 0.5 else [])
+        return await self.client.get("/api/products", params={"q": " ".join(terms), "page_size": 20})
+
+    async def checkout(self) -> httpx.Response:
+        product_ids = self.rng.sample(range(1, self.args.products + 1), min(self.rng.randint(1, 3), self.args.products))
+        order = {"user_id": self.username, "items": [{"product_id": product_id, "quantity": 1} for product_id in product_ids]}
+        return await self.client.post("/api/orders", json=order, headers=self.headers)
+
+    async def history(self) -> httpx.Response:
+        return await self.client.get("/api/orders/history/summary", params={"limit": 20}, headers=self.headers)
+
+
+async def drive(base_url: str, args: argparse.Namespace) -> tuple[dict[str, list[float]], dict[str, dict[int, int]]]:
+    """Run the virtual users and return per-operation latencies and status counts measured after the warmup."""
+    latencies: dict[str, list[float]] = {name: [] for name in args.mix}
+    statuses: dict[str, dict[int, int]] = {name: {} for name in args.mix}
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    measure_from = time.monotonic() + args.warmup
+    deadline = measure_from + args.duration
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def run_user(index: int) -> None:
+            rng = random.Random(args.seed + index)
+            user = VirtualUser(client, rng.randrange(args.users), args, rng)
+            await user.login()
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                response = await user.operations[name]()
+                if time.monotonic() >= measure_from:
+                    latencies[name].append(time.perf_counter() - started)
+                    statuses[name][response.status_code] = statuses[name].get(response.status_code, 0) + 1
+
+        await asyncio.gather(*(run_user(index) for index in range(args.concurrency)))
+
+    return latencies, statuses
+
+
+def summarize(latencies: list[float], statuses: dict[int, int], duration: float) -> dict[str, Any]:
+    succeeded = sum(count for status, count in statuses.items() if status < 400)
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / duration, 1),
+        "success_rate": round(succeeded / len(latencies), 4) if latencies else 1.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def find_regressions(results: dict[str, Any], baseline: dict[str, Any], tolerance: float, min_requests: int) -> list[str]:
+    """Operations that got slower, slower to serve, or less successful than the baseline by more than the tolerance."""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        # Too few samples make tail percentiles noise
+        if previous is None or min(current["requests"], previous["requests"]) < min_requests:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]}")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput_rps {previous['throughput_rps']} -> {current['throughput_rps']}")
+        if current["success_rate"] < previous["success_rate"] - 0.01:
+            regressions.append(f"{name}: success_rate {previous['success_rate']} -> {current['success_rate']}")
+    return regressions
+
+
+def prepare_data(args: argparse.Namespace) -> None:
+    """Seed a fresh schema, or with --reuse read the volumes of the existing one."""
+    engine = make_engine(args.database_url)
+    session_factory = make_session_factory(engine)
+    if args.reuse:
+        with session_factory() as db:
+            args.users = db.scalar(select(func.count()).select_from(User))
+            args.products = db.scalar(select(func.max(Product.id))) or 0
+            args.orders = db.scalar(select(func.count()).select_from(Order))
+        if not args.users or not args.products:
+            raise SystemExit("--reuse needs a database seeded by a previous run")
+    else:
+        reset_schema(engine)
+        started = time.perf_counter()
+        with session_factory() as db:
+            seed_users(db, args.users, get_password_hash(PASSWORD))
+            # Enough stock that checkouts never run out during the run
+            seed_products(db, args.products, stock=1_000_000_000)
+            seed_orders(db, args.orders, args.items_per_order, args.products, args.users, seed=args.seed)
+            SalesRollupService(db).rebuild()
+        print(f"Seeded {args.users} users, {args.products} products, {args.orders} orders in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=BENCH_DATABASE_URL, help="sync URL of a scratch database (default: BENCH_DATABASE_URL)")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync", help="serve the API with the sync or the async driver")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--items-per-order", type=int, default=5)
+    parser.add_argument("--reuse", action="store_true", help="skip seeding and use the existing data")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of traffic before measuring")
+    parser.add_argument("--concurrency", type=int, default=50, help="virtual users")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="operation weights, e.g. browse=35,product=25,search=15,login=5,checkout=10,history=10")
+    parser.add_argument("--no-product-cache", dest="product_cache", action="store_false", help="serve catalog reads from the database")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_test_results.json")
+    parser.add_argument("--baseline", help="baseline results JSON to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="write this run's results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative change before flagging a regression")
+    parser.add_argument("--min-requests", type=int, default=50, help="operations with fewer samples are not compared")
+    parser.add_argument("--port", type=int, default=8770)
+    args = parser.parse_args()
+
+    prepare_data(args)
+
+    server_url = to_async_url(args.database_url) if args.mode == "async" else args.database_url
+    env = {"DATABASE_URL": server_url, "PRODUCT_CACHE_ENABLED": str(args.product_cache).lower()}
+    # Every virtual user connects from the same address, so per-client rate limits would throttle the whole run
+    env.update({"ADMISSION_AUTH_RATE": "0", "ADMISSION_CHECKOUT_RATE": "0"})
+    with serve_app(args.port, **env) as base_url:
+        latencies, statuses = asyncio.run(drive(base_url, args))
+
+    config = {
+        "database": make_url(args.database_url).get_backend_name(),
+        "mode": args.mode,
+        "users": args.users,
+        "products": args.products,
+        "orders": args.orders,
+        "items_per_order": args.items_per_order,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "product_cache": args.product_cache,
+        "duration": args.duration,
+    }
+    all_latencies = [sample for samples in latencies.values() for sample in samples]
+    all_statuses: dict[int, int] = {}
+    for counts in statuses.values():
+        for status, count in counts.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    results = {
+        "benchmark": "load_test",
+        "config": config,
+        "endpoints": {name: summarize(latencies[name], statuses[name], args.duration) for name in args.mix},
+        "total": summarize(all_latencies, all_statuses, args.duration),
+    }
+    for name, summary in results["endpoints"].items():
+        report("load_test", operation=name, **summary)
+    report("load_test", operation="total", **results["total"])
+
+    exit_code = 0
+    baseline_path = Path(args.baseline) if args.baseline else None
+    if baseline_path is not None and baseline_path.exists() and not args.update_baseline:
+        baseline = json.loads(baseline_path.read_text())
+        mismatched = [key for key in COMPARABLE_CONFIG if baseline["config"].get(key) != config[key]]
+        if mismatched:
+            results["baseline_mismatch"] = mismatched
+            print(f"Baseline {baseline_path} was recorded with different {', '.join(mismatched)}; not compared", file=sys.stderr)
+            exit_code = 2
+        else:
+            results["regressions"] = find_regressions(results, baseline, args.tolerance, args.min_requests)
+            for regression in results["regressions"]:
+                print(f"REGRESSION {regression}", file=sys.stderr)
+            exit_code = 1 if results["regressions"] else 0
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    if baseline_path is not None and (args.update_baseline or not baseline_path.exists()):
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"Baseline written to {baseline_path}", file=sys.stderr)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# flake8: noqa: E501
+"""
+Show that catalog latency stays flat while a burst of logins is in flight.
+
+Runs catalog readers alone, then together with concurrent login clients, and reports
+catalog p50/p99 for both phases plus login throughput and 503 (backpressure) counts.
+
+Usage:
+    python -m benchmarks.login_storm --duration 10 --readers 20 --logins 50
+"""
+import argparse
+import asyncio
+import random
+import time
+import httpx  # type: ignore
+from app.core.security import get_password_hash
+from app.models import User
+from benchmarks.common import make_engine, make_session_factory, percentile, report, reset_schema, seed_products, serve_app
+
+PASSWORD = "password123"
+
+
+async def run_phase(base_url: str, duration: float, readers: int, logins: int, users: int, products: int) -> dict:
+    catalog_latencies: list[float] = []
+    login_status: dict[int, int] = {}
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=readers + logins)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def reader() -> None:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                await client.get(f"/api/products/{random.randint(1, products)}")
+                catalog_latencies.append(time.perf_counter() - started)
+
+        async def login() -> None:
+            while time.monotonic() < deadline:
+                response = await client.post("/api/auth/login", json={"username": f"user{random.randrange(users)}", "password": PASSWORD})
+                login_status[response.status_code] = login_status.get(response.status_code, 0) + 1
+
+        await asyncio.gather(*(reader() for _ in range(readers)), *(login() for _ in range(logins)))
+
+    return {
+        "catalog_requests": len(catalog_latencies),
+        "catalog_p50_ms": round(percentile(catalog_latencies, 50) * 1000, 2),
+        "catalog_p99_ms": round(percentile(catalog_latencies, 99) * 1000, 2),
+        "logins_ok_per_sec": round(login_status.get(200, 0) / duration, 1),
+        "logins_rejected_503": login_status.get(503, 0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    reset_schema(engine)
+    with make_session_factory(engine)() as db:
+        seed_products(db, args.products)
+        hashed_password = get_password_hash(PASSWORD)
+        db.add_all([User(email=f"user{i}@example.com", username=f"user{i}", hashed_password=hashed_password) for i in range(args.users)])
+        db.commit()
+
+    # Disable the product cache so catalog reads exercise the database
+    with serve_app(args.port, PRODUCT_CACHE_ENABLED="false") as base_url:
+        for phase, logins in (("catalog_only", 0), ("login_storm", args.logins)):
+            metrics = asyncio.run(run_phase(base_url, args.duration, args.readers, logins, args.users, args.products))
+            report("login_storm", phase=phase, readers=args.readers, logins=logins, **metrics)
+
+
+if __name__ == "__main__":
+    main()
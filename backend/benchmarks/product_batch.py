@@ -0,0 +1,117 @@
+# flake8: noqa: E501
+"""
+Compare rendering a cart with one GET /api/products/{id} per line against one batch lookup.
+
+For each cart size, every strategy fetches the same random carts:
+fanout_sequential: one request after another (a client without HTTP/2 or parallelism)
+fanout_parallel:   all per-id requests in flight at once
+batch_get:         GET /api/products/batch?ids=...
+batch_post:        POST /api/products/batch with the ids in the body
+Runs once with the product cache disabled (every id hits the database) and once enabled with the carts already cached.
+Reports latency per cart and the database queries per cart taken from Server-Timing.
+
+Usage:
+    python -m benchmarks.product_batch --cart-sizes 5 20 50 100 --carts 200
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+from typing import Awaitable, Callable
+import httpx  # type: ignore
+from benchmarks.common import BENCH_DATABASE_URL, make_engine, make_session_factory, percentile, report, reset_schema, seed_products, serve_app
+
+QUERIES_PATTERN = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def queries(response: httpx.Response) -> int:
+    match = QUERIES_PATTERN.search(response.headers.get("server-timing", ""))
+    return int(match.group(1)) if match else 0
+
+
+def strategies(client: httpx.AsyncClient, base_url: str) -> dict[str, Callable[[list[int]], Awaitable[int]]]:
+    """Each strategy fetches one cart, checks every product was returned and returns the DB queries it cost."""
+
+    async def fanout_sequential(ids: list[int]) -> int:
+        total = 0
+        for product_id in ids:
+            response = await client.get(f"{base_url}/api/products/{product_id}")
+            response.raise_for_status()
+            total += queries(response)
+        return total
+
+    async def fanout_parallel(ids: list[int]) -> int:
+        responses = await asyncio.gather(*(client.get(f"{base_url}/api/products/{product_id}") for product_id in ids))
+        for response in responses:
+            response.raise_for_status()
+        return sum(queries(response) for response in responses)
+
+    async def batch_get(ids: list[int]) -> int:
+        response = await client.get(f"{base_url}/api/products/batch", params={"ids": ",".join(map(str, ids))})
+        response.raise_for_status()
+        assert not response.json()["not_found"]
+        return queries(response)
+
+    async def batch_post(ids: list[int]) -> int:
+        response = await client.post(f"{base_url}/api/products/batch", json={"ids": ids})
+        response.raise_for_status()
+        assert not response.json()["not_found"]
+        return queries(response)
+
+    return {"fanout_sequential": fanout_sequential, "fanout_parallel": fanout_parallel, "batch_get": batch_get, "batch_post": batch_post}
+
+
+async def run(base_url: str, cache_enabled: bool, cart_sizes: list[int], carts: int, products: int) -> None:
+    limits = httpx.Limits(max_connections=max(cart_sizes), max_keepalive_connections=max(cart_sizes))
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        for cart_size in cart_sizes:
+            rng = random.Random(cart_size)
+            cart_list = [rng.sample(range(1, products + 1), cart_size) for _ in range(carts)]
+            fetchers = strategies(client, base_url)
+            if cache_enabled:
+                # Measure warm carts, so no strategy pays the misses for the ones after it
+                for ids in cart_list:
+                    await fetchers["batch_post"](ids)
+            for name, fetch in fetchers.items():
+                latencies: list[float] = []
+                total_queries = 0
+                for ids in cart_list:
+                    started = time.perf_counter()
+                    total_queries += await fetch(ids)
+                    latencies.append(time.perf_counter() - started)
+                report(
+                    "product_batch",
+                    strategy=name,
+                    cache_enabled=cache_enabled,
+                    cart_size=cart_size,
+                    carts=carts,
+                    p50_ms=round(percentile(latencies, 50) * 1000, 2),
+                    p99_ms=round(percentile(latencies, 99) * 1000, 2),
+                    queries_per_cart=round(total_queries / carts, 1),
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cart-sizes", type=int, nargs="+", default=[5, 20, 50, 100])
+    parser.add_argument("--carts", type=int, default=200)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    reset_schema(engine)
+    with make_session_factory(engine)() as db:
+        seed_products(db, args.products)
+    engine.dispose()
+
+    # The catalog class would queue a parallel fan-out behind its own concurrency limit; measure the requests themselves
+    env = {"DATABASE_URL": BENCH_DATABASE_URL, "ADMISSION_ENABLED": "false", "PRODUCT_BATCH_MAX_IDS": str(max(args.cart_sizes))}
+    for cache_enabled in (False, True):
+        with serve_app(args.port, PRODUCT_CACHE_ENABLED=str(cache_enabled).lower(), **env) as base_url:
+            asyncio.run(run(base_url, cache_enabled, args.cart_sizes, args.carts, args.products))
+
+
+if __name__ == "__main__":
+    main()
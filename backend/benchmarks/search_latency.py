@@ -0,0 +1,62 @@
+# flake8: noqa: E501
+"""
+Measure product search latency against catalog size, comparing the indexed search
+(tsvector/pg_trgm on Postgres, FTS5 on SQLite) with the old ILIKE '%q%' scan.
+
+Usage:
+    python -m benchmarks.search_latency --sizes 1000 10000 100000 --queries 200
+"""
+import argparse
+import random
+import time
+from app.models import Product
+from app.services.search_service import ProductSearchService
+from benchmarks.common import ADJECTIVES, NOUNS, make_engine, make_session_factory, percentile, report, reset_schema, seed_products
+
+TERMS = [noun.lower() for noun in NOUNS] + [adjective.lower() for adjective in ADJECTIVES] + ["wireless keyboard", "smart watch", "laptp", "headphone"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    SessionLocal = make_session_factory(engine)
+
+    for size in args.sizes:
+        reset_schema(engine)
+        with SessionLocal() as db:
+            seed_products(db, size)
+
+        with SessionLocal() as db:
+            service = ProductSearchService(db)
+            timings: dict[str, list[float]] = {"indexed": [], "ilike": []}
+            for _ in range(args.queries):
+                term = random.choice(TERMS)
+
+                started = time.perf_counter()
+                service.search_rows(term, page_size=args.page_size)
+                timings["indexed"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                query = db.query(Product).filter(Product.name.ilike(f"%{term}%"))
+                query.count()
+                query.limit(args.page_size).all()
+                timings["ilike"].append(time.perf_counter() - started)
+
+        for method, samples in timings.items():
+            report(
+                "search_latency",
+                dialect=engine.dialect.name,
+                catalog_size=size,
+                method=method,
+                p50_ms=round(percentile(samples, 50) * 1000, 2),
+                p95_ms=round(percentile(samples, 95) * 1000, 2),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# flake8: noqa: E501
+"""
+Microbenchmark the product response serialization paths at several page sizes.
+
+legacy_*: the previous path. Rows (miss) or cached JSON (hit) are validated into
+ProductListResponse, then FastAPI re-validates them against response_model and encodes
+with the stdlib json module.
+fast_*: ORM rows are encoded straight to bytes with orjson (miss) and the cached bytes
+are sent as-is (hit).
+
+Usage:
+    python -m benchmarks.serialization --page-sizes 1 20 50 100 --iterations 2000
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Callable
+import orjson  # type: ignore
+from fastapi.responses import JSONResponse  # type: ignore
+from fastapi.routing import serialize_response  # type: ignore
+from fastapi.utils import create_response_field  # type: ignore
+from app.core.responses import RawJSONResponse
+from app.models import Product
+from app.schemas.product import ProductListResponse, ProductResponse
+from app.services.product_service import ProductService, product_to_dict
+from benchmarks.common import make_engine, make_session_factory, report, reset_schema, seed_products
+
+
+def time_per_call(fn: Callable[[], Any], iterations: int) -> float:
+    """Mean microseconds per call after a short warm-up."""
+    for _ in range(min(100, iterations)):
+        fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[1, 20, 50, 100])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    reset_schema(engine)
+    db = make_session_factory(engine)()
+    seed_products(db, max(args.page_sizes))
+    loop = asyncio.new_event_loop()
+
+    def fastapi_encode(field: Any, content: Any) -> bytes:
+        # What FastAPI does with a model returned from a route with response_model
+        return JSONResponse(loop.run_until_complete(serialize_response(field=field, response_content=content))).body
+
+    for page_size in args.page_sizes:
+        if page_size == 1:
+            # Detail endpoint: a single ProductResponse
+            product = db.query(Product).first()
+            field = create_response_field(name="product", type_=ProductResponse)
+            cached = orjson.dumps(product_to_dict(product))
+            paths = {
+                "legacy_miss": lambda: fastapi_encode(field, ProductResponse.model_validate(product)),
+                "legacy_hit": lambda: fastapi_encode(field, ProductResponse.model_validate_json(cached)),
+                "fast_miss": lambda: orjson.dumps(product_to_dict(product)),
+                "fast_hit": lambda: RawJSONResponse(cached).body,
+            }
+            endpoint = "detail"
+        else:
+            page = ProductService(db).list_products(page_size=page_size, count="none")
+            field = create_response_field(name="listing", type_=ProductListResponse)
+            cached = page.to_json()
+            paths = {
+                "legacy_miss": lambda: fastapi_encode(field, page.to_response()),
+                "legacy_hit": lambda: fastapi_encode(field, ProductListResponse.model_validate_json(cached)),
+                "fast_miss": page.to_json,
+                "fast_hit": lambda: RawJSONResponse(cached).body,
+            }
+            endpoint = "list"
+
+        timings = {name: round(time_per_call(fn, args.iterations), 1) for name, fn in paths.items()}
+        report(
+            "serialization",
+            endpoint=endpoint,
+            page_size=page_size,
+            **{f"{name}_us": value for name, value in timings.items()},
+            miss_speedup=round(timings["legacy_miss"] / timings["fast_miss"], 1),
+            hit_speedup=round(timings["legacy_hit"] / timings["fast_hit"], 1),
+        )
+
+    db.close()
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# flake8: noqa: E501
+"""
+Hammer one hot SKU from many workers and verify the reservation layer never oversells.
+
+Usage:
+    python -m benchmarks.stock_contention --workers 32 --stock 500 --attempts 2000
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.models import Product
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.services.order_service import AsyncOrderService
+from app.services.stock_service import InsufficientStockError
+from benchmarks.common import make_engine, make_session_factory, report, reset_schema, seed_products
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--stock", type=int, default=500)
+    parser.add_argument("--attempts", type=int, default=2000)
+    parser.add_argument("--quantity", type=int, default=1)
+    args = parser.parse_args()
+
+    engine = make_engine(pool_size=args.workers, max_overflow=0)
+    reset_schema(engine)
+    SessionLocal = make_session_factory(engine)
+    with SessionLocal() as db:
+        seed_products(db, 1, stock=args.stock)
+        product_id = db.query(Product.id).scalar()
+
+    counts = {"succeeded": 0, "rejected": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def place_order(_: int) -> None:
+        order = OrderCreate(user_id="bench", items=[OrderItemCreate(product_id=product_id, quantity=args.quantity)])
+        with SessionLocal() as db:
+            try:
+                asyncio.run(AsyncOrderService(db).create_order(order))
+                outcome = "succeeded"
+            except InsufficientStockError:
+                outcome = "rejected"
+            except Exception:
+                outcome = "errors"
+        with lock:
+            counts[outcome] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(place_order, range(args.attempts)))
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        final_stock = db.query(Product.stock).filter(Product.id == product_id).scalar()
+
+    sold = counts["succeeded"] * args.quantity
+    oversell = max(0, sold - args.stock) + max(0, -final_stock)
+    report(
+        "stock_contention",
+        workers=args.workers,
+        attempts=args.attempts,
+        elapsed_s=round(elapsed, 3),
+        orders_per_sec=round(args.attempts / elapsed, 1),
+        final_stock=final_stock,
+        oversell=oversell,
+        **counts,
+    )
+    if oversell or final_stock != args.stock - sold:
+        raise SystemExit("oversell detected")
+
+
+if __name__ == "__main__":
+    main()
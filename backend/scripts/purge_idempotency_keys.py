@@ -0,0 +1,30 @@
+"""
+Delete Idempotency-Key records whose IDEMPOTENCY_TTL_SECONDS has passed.
+
+Expired keys are never replayed, but their rows stay in idempotency_keys until purged;
+run this periodically (e.g. hourly from cron) against DATABASE_URL.
+
+Usage:
+    python -m scripts.purge_idempotency_keys
+"""
+import argparse
+import asyncio
+from app.db.session import USE_ASYNC, SessionLocal, run_db
+from app.services.idempotency_service import IdempotencyService
+
+
+async def purge() -> int:
+    if USE_ASYNC:
+        async with SessionLocal() as db:
+            return await run_db(db, lambda session: IdempotencyService(session).purge_expired())
+    with SessionLocal() as db:
+        return IdempotencyService(db).purge_expired()
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    print(f"Purged {asyncio.run(purge())} expired idempotency keys")
+
+
+if __name__ == "__main__":
+    main()
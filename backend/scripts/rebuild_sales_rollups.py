@@ -0,0 +1,33 @@
+"""
+Recompute the sales analytics rollups (daily_sales, product_sales, category_sales)
+from the order history, e.g. after a backfill or a manual data fix.
+
+Runs against DATABASE_URL in one transaction. On PostgreSQL the rollup tables are
+locked meanwhile, so orders placed during the rebuild wait and are not lost.
+
+Usage:
+    python -m scripts.rebuild_sales_rollups
+"""
+import argparse
+import asyncio
+from app.db.session import USE_ASYNC, SessionLocal, run_db
+from app.schemas.analytics import SalesRollupRebuildResponse
+from app.services.sales_rollup_service import SalesRollupService
+
+
+async def rebuild() -> SalesRollupRebuildResponse:
+    if USE_ASYNC:
+        async with SessionLocal() as db:
+            return await run_db(db, lambda session: SalesRollupService(session).rebuild())
+    with SessionLocal() as db:
+        return SalesRollupService(db).rebuild()
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    counts = asyncio.run(rebuild())
+    print(f"Rebuilt sales rollups: {counts.days} days, {counts.products} products, {counts.categories} categories")
+
+
+if __name__ == "__main__":
+    main()
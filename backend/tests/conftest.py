@@ -0,0 +1,89 @@
+# flake8: noqa: E501
+"""
+Shared fixtures. The app reads DATABASE_URL at import time, so a scratch SQLite file is
+configured before anything from app is imported; every test starts from an empty schema
+and empty caches.
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='ec-mock-tests-'), 'test.db')}"
+os.environ.setdefault("PASSWORD_HASH_EXECUTOR", "thread")
+# A repeated statement fingerprint fails the request instead of only being logged
+os.environ.setdefault("QUERY_DIAGNOSTICS_STRICT", "true")
+
+from contextlib import contextmanager  # noqa: E402
+from typing import Any, Iterator  # noqa: E402
+import pytest  # type: ignore  # noqa: E402
+from fastapi.testclient import TestClient  # type: ignore  # noqa: E402
+from sqlalchemy import event, insert  # type: ignore  # noqa: E402
+from app.core.admission import admission_controller  # noqa: E402
+from app.core.cache import idempotency_store, product_cache, token_cache, user_cache  # noqa: E402
+from app.core.security import get_password_hash  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Product, User  # noqa: E402
+
+PASSWORD = "password123"
+
+
+@pytest.fixture(autouse=True)
+def database() -> Iterator[None]:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    for cache in (product_cache, token_cache, user_cache, idempotency_store):
+        cache.clear()
+    for admission in admission_controller.classes.values():
+        if admission.buckets is not None:
+            admission.buckets.clear()
+    yield
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db() -> Iterator[Any]:
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def seed_products(db: Any, count: int, stock: int = 1000) -> list[int]:
+    db.execute(insert(Product), [{"name": f"Product {i}", "description": "desc", "price": 100 + i, "stock": stock, "category": f"cat-{i % 3}"} for i in range(count)])
+    db.commit()
+    return [product_id for (product_id,) in db.query(Product.id).order_by(Product.id)]
+
+
+def create_user(db: Any, username: str = "alice", is_superuser: bool = False) -> User:
+    user = User(email=f"{username}@example.com", username=username, hashed_password=get_password_hash(PASSWORD), is_superuser=is_superuser)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def login(client: TestClient, username: str = "alice") -> dict[str, str]:
+    response = client.post("/api/auth/login", json={"username": username, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@contextmanager
+def count_statements() -> Iterator[list[str]]:
+    """Collect every SQL statement executed on the application engine inside the block."""
+    statements: list[str] = []
+
+    def before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
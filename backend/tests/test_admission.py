@@ -0,0 +1,63 @@
+# flake8: noqa: E501
+"""Per-client rate limits key on the authenticated user, or on the address a trusted proxy forwarded."""
+import asyncio
+from typing import Any
+from app.core.admission import AdmissionControlMiddleware, client_key
+from tests.conftest import create_user, login
+
+
+def scope(peer: str, headers: dict[str, str]) -> dict[str, Any]:
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/auth/login",
+        "client": (peer, 50000),
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()],
+    }
+
+
+def test_forwarded_address_is_believed_only_from_a_trusted_proxy():
+    assert client_key(scope("127.0.0.1", {"X-Forwarded-For": "10.0.0.1"})) == "client:10.0.0.1"
+    # Entries left of the hop count were written by the client itself
+    assert client_key(scope("127.0.0.1", {"X-Forwarded-For": "1.2.3.4, 10.0.0.1"})) == "client:10.0.0.1"
+    assert client_key(scope("127.0.0.1", {})) == "client:127.0.0.1"
+    assert client_key(scope("203.0.113.9", {"X-Forwarded-For": "10.0.0.1"})) == "client:203.0.113.9"
+
+
+def test_throttles_one_forwarded_client_but_not_another():
+    async def ok(scope: dict[str, Any], receive: Any, send: Any) -> None:
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = AdmissionControlMiddleware(ok)
+
+    async def status(forwarded_for: str) -> int:
+        statuses = []
+
+        async def send(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        async def receive() -> dict[str, Any]:
+            return {"type": "http.request", "body": b""}
+
+        await middleware(scope("127.0.0.1", {"X-Forwarded-For": forwarded_for}), receive, send)
+        return statuses[0]
+
+    async def run() -> tuple[list[int], int]:
+        noisy = [await status("10.0.0.1") for _ in range(11)]
+        return noisy, await status("10.0.0.2")
+
+    noisy, quiet = asyncio.run(run())
+    assert noisy == [200] * 10 + [429]
+    assert quiet == 200
+
+
+def test_throttles_one_user_but_not_another(client, db):
+    create_user(db, "alice")
+    create_user(db, "bob")
+    alice, bob = login(client, "alice"), login(client, "bob")
+
+    statuses = [client.post("/api/payments/checkout", json={"amount": 1000}, headers=alice).status_code for _ in range(11)]
+    assert statuses == [200] * 10 + [429]
+    assert client.post("/api/payments/checkout", json={"amount": 1000}, headers=bob).status_code == 200
@@ -0,0 +1,38 @@
+# flake8: noqa: E501
+"""The listing validators change with every catalog write, without counting the products table."""
+from datetime import datetime, timedelta
+from app.models import Product
+from tests.conftest import count_statements, create_user, login, seed_products
+
+
+def test_deleting_an_older_product_invalidates_listing_validators(client, db):
+    product_ids = seed_products(db, 5)
+    # HTTP dates have second precision; keep the delete clearly after the newest update
+    db.query(Product).update({"updated_at": datetime.utcnow() - timedelta(hours=1)})
+    db.commit()
+    create_user(db, "admin", is_superuser=True)
+    headers = login(client, "admin")
+
+    first = client.get("/api/products")
+    assert first.status_code == 200
+    assert client.get("/api/products", headers={"If-Modified-Since": first.headers["last-modified"]}).status_code == 304
+
+    # The oldest product is not the one that determines max(updated_at)
+    assert client.delete(f"/api/products/{product_ids[0]}", headers=headers).status_code in (200, 204)
+
+    second = client.get("/api/products", headers={"If-Modified-Since": first.headers["last-modified"], "If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert client.get("/api/products", headers={"If-Modified-Since": first.headers["last-modified"]}).status_code == 200
+    assert db.query(Product).count() == 4
+
+
+def test_catalog_version_does_not_count_products(client, db):
+    seed_products(db, 5)
+
+    with count_statements() as statements:
+        assert client.get("/api/products").status_code == 200
+
+    version = [statement for statement in statements if "max(products.updated_at)" in statement]
+    assert len(version) == 1
+    assert "count(" not in version[0]
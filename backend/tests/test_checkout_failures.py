@@ -0,0 +1,85 @@
+# flake8: noqa: E501
+"""Reserved stock is returned whenever a checkout does not end in a saved order."""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+import pytest  # type: ignore
+from fastapi.testclient import TestClient  # type: ignore
+from app.main import app
+from app.models import Order, Product, StockReservation
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.services.order_service import OrderService, reservation_reaper
+from app.services.payment_gateway import PaymentGatewayUnavailable, payment_gateway
+from tests.conftest import create_user, seed_products
+
+
+class RecordingGateway:
+    """Stands in for payment_gateway authorize/void_by_key, failing every authorization with error."""
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+        self.authorized: list[Optional[str]] = []
+        self.voided_keys: list[str] = []
+
+    async def authorize(self, amount: int, idempotency_key: Optional[str] = None) -> dict[str, str]:
+        self.authorized.append(idempotency_key)
+        raise self.error
+
+    async def void_by_key(self, idempotency_key: str) -> None:
+        self.voided_keys.append(idempotency_key)
+
+
+def stock(db, product_ids: list[int]) -> list[int]:
+    db.expire_all()
+    return [stock for (stock,) in db.query(Product.stock).filter(Product.id.in_(product_ids)).order_by(Product.id)]
+
+
+@pytest.mark.parametrize(
+    "error, status, voided",
+    [
+        (RuntimeError("gateway client bug"), 500, True),
+        (PaymentGatewayUnavailable("timed out", outcome_unknown=True), 503, True),
+        (PaymentGatewayUnavailable("circuit open"), 503, False),
+    ],
+)
+def test_payment_failure_releases_stock(db, monkeypatch, error, status, voided):
+    product_ids = seed_products(db, 2, stock=5)
+    create_user(db)
+    gateway = RecordingGateway(error)
+    monkeypatch.setattr(payment_gateway, "authorize", gateway.authorize)
+    monkeypatch.setattr(payment_gateway, "void_by_key", gateway.void_by_key)
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        response = client.post("/api/orders", json={"user_id": "alice", "items": [{"product_id": product_id, "quantity": 2} for product_id in product_ids]})
+
+    assert response.status_code == status
+
+    assert stock(db, product_ids) == [5, 5]
+    assert db.query(StockReservation).count() == 0
+    assert db.query(Order).count() == 0
+    # Compensation voids by the authorization's key and never authorizes again
+    assert len(gateway.authorized) == 1
+    assert gateway.voided_keys == (gateway.authorized if voided else [])
+
+
+def test_reaper_releases_expired_reservations_once(client, db):
+    product_ids = seed_products(db, 2, stock=5)
+    order = OrderCreate(user_id="alice", items=[OrderItemCreate(product_id=product_ids[0], quantity=2), OrderItemCreate(product_id=product_ids[0], quantity=1), OrderItemCreate(product_id=product_ids[1], quantity=4)])
+    reservation = OrderService(db).reserve_order(order)
+    assert stock(db, product_ids) == [2, 1]
+
+    # Not expired yet
+    assert asyncio.run(reservation_reaper.reap()) == []
+    db.query(StockReservation).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+    assert asyncio.run(reservation_reaper.reap()) == product_ids
+    assert asyncio.run(reservation_reaper.reap()) == []
+    assert stock(db, product_ids) == [5, 5]
+
+    # The checkout that outlived its reservation cannot save the order or release the stock again
+    with pytest.raises(ValueError, match="expired"):
+        OrderService(db).complete_order(order, reservation)
+    assert OrderService(db).release_reservation(reservation.reservation_id, order.items) is False
+    assert stock(db, product_ids) == [5, 5]
+    assert db.query(Order).count() == 0
@@ -0,0 +1,100 @@
+# flake8: noqa: E501
+"""Idempotency-Key replays survive the in-process store and never cross callers."""
+import hashlib
+from datetime import datetime
+from app.core import admission
+from app.core.cache import idempotency_store
+from app.models import IdempotencyKey, Order, Product
+from app.schemas.order import OrderCreate
+from app.services.idempotency_service import IdempotencyService
+from tests.conftest import create_user, login, seed_products
+
+
+def order_body(product_id: int, quantity: int = 1) -> dict:
+    return {"user_id": "alice", "items": [{"product_id": product_id, "quantity": quantity}]}
+
+
+def test_retry_is_replayed_from_the_database(client, db):
+    product_ids = seed_products(db, 1)
+    create_user(db)
+    headers = {"Idempotency-Key": "order-1"}
+
+    first = client.post("/api/orders", json=order_body(product_ids[0]), headers=headers)
+    assert first.status_code == 200, first.text
+    assert "idempotent-replayed" not in first.headers
+
+    # A retry landing on another worker has nothing in its in-process store
+    idempotency_store.clear()
+    second = client.post("/api/orders", json=order_body(product_ids[0]), headers=headers)
+    assert second.status_code == 200
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+    assert db.query(Order).count() == 1
+
+    reused = client.post("/api/orders", json=order_body(product_ids[0], quantity=2), headers=headers)
+    assert reused.status_code == 422
+
+
+def test_keys_are_scoped_to_the_caller(client, db):
+    create_user(db, "alice")
+    create_user(db, "bob")
+    body = {"amount": 1000}
+
+    alice = client.post("/api/payments/checkout", json=body, headers={"Idempotency-Key": "pay-1", **login(client, "alice")})
+    bob = client.post("/api/payments/checkout", json=body, headers={"Idempotency-Key": "pay-1", **login(client, "bob")})
+    alice_retry = client.post("/api/payments/checkout", json=body, headers={"Idempotency-Key": "pay-1", **login(client, "alice")})
+
+    assert alice.status_code == bob.status_code == 200
+    assert "idempotent-replayed" not in bob.headers
+    assert bob.json()["transaction_id"] != alice.json()["transaction_id"]
+    assert alice_retry.json()["transaction_id"] == alice.json()["transaction_id"]
+    assert {principal for (principal,) in db.query(IdempotencyKey.principal)} == {"user:alice", "user:bob"}
+
+
+def test_keys_are_scoped_to_the_forwarded_client(client, db, monkeypatch):
+    # The test client connects as "testclient"; treat it as the trusted frontend server
+    monkeypatch.setattr(admission, "_is_trusted_proxy", lambda address: address == "testclient")
+    product_ids = seed_products(db, 1)
+    create_user(db)
+    body = order_body(product_ids[0])
+
+    first = client.post("/api/orders", json=body, headers={"Idempotency-Key": "order-1", "X-Forwarded-For": "10.0.0.1"})
+    second = client.post("/api/orders", json=body, headers={"Idempotency-Key": "order-1", "X-Forwarded-For": "10.0.0.2"})
+    first_retry = client.post("/api/orders", json=body, headers={"Idempotency-Key": "order-1", "X-Forwarded-For": "10.0.0.1"})
+
+    assert first.status_code == second.status_code == 200
+    assert "idempotent-replayed" not in second.headers
+    assert second.json()["id"] != first.json()["id"]
+    assert first_retry.headers["idempotent-replayed"] == "true"
+    assert first_retry.json() == first.json()
+    assert db.query(Order).count() == 2
+    assert {principal for (principal,) in db.query(IdempotencyKey.principal)} == {"client:10.0.0.1", "client:10.0.0.2"}
+
+
+def test_failed_request_frees_its_key(client, db):
+    product_ids = seed_products(db, 1, stock=1)
+    create_user(db)
+    headers = {"Idempotency-Key": "order-2"}
+
+    assert client.post("/api/orders", json=order_body(product_ids[0], quantity=2), headers=headers).status_code == 400
+    assert db.query(IdempotencyKey).count() == 0
+
+    db.query(Product).update({"stock": 5})
+    db.commit()
+    retry = client.post("/api/orders", json=order_body(product_ids[0], quantity=2), headers=headers)
+    assert retry.status_code == 200, retry.text
+    assert "idempotent-replayed" not in retry.headers
+
+
+def test_key_in_progress_on_another_worker_is_rejected(client, db):
+    product_ids = seed_products(db, 1)
+    create_user(db)
+    body = order_body(product_ids[0])
+    fingerprint = hashlib.blake2b(OrderCreate(**body).model_dump_json().encode(), digest_size=16).hexdigest()
+
+    # Claim the key as if another worker had just started the same request
+    assert IdempotencyService(db).claim("orders", "client:testclient", "order-3", fingerprint, datetime.utcnow()) is None
+
+    response = client.post("/api/orders", json=body, headers={"Idempotency-Key": "order-3"})
+    assert response.status_code == 409
+    assert response.headers["retry-after"] == "1"
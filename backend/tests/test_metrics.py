@@ -0,0 +1,26 @@
+# flake8: noqa: E501
+"""Request metrics stay exact when one request's work runs on several threads."""
+from concurrent.futures import ThreadPoolExecutor
+from app.core.metrics import RequestMetrics
+
+
+def test_concurrent_updates_from_worker_threads_are_not_lost():
+    metrics = RequestMetrics()
+    per_thread = 20000
+
+    def work() -> None:
+        for _ in range(per_thread):
+            metrics.add_statement(0.001, 1)
+            metrics.add_rows(1)
+            metrics.add_phase("payment", 0.001)
+            metrics.count_fingerprint("SELECT products.id FROM products")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for future in [pool.submit(work) for _ in range(8)]:
+            future.result()
+
+    db_seconds, statements, rows, phases, fingerprints = metrics.snapshot()
+    assert statements == 8 * per_thread
+    assert rows == 2 * 8 * per_thread
+    assert fingerprints == {"SELECT products.id FROM products": 8 * per_thread}
+    assert round(db_seconds, 6) == round(phases["payment"], 6) == round(8 * per_thread * 0.001, 6)
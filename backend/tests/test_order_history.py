@@ -0,0 +1,72 @@
+# flake8: noqa: E501
+"""Order history loads a page and all of its items with a fixed number of statements, and its cursor pages without gaps."""
+from datetime import datetime, timedelta
+import pytest  # type: ignore
+from sqlalchemy import insert  # type: ignore
+from app.models import Order, OrderItem
+from tests.conftest import count_statements, create_user, login, seed_products
+
+
+def seed_orders(db, count: int, items_per_order: int, username: str = "alice") -> list[int]:
+    """Insert orders spaced one minute apart (oldest first) and return their ids, newest first."""
+    product_ids = seed_products(db, items_per_order)
+    started = datetime(2024, 1, 1)
+    db.execute(insert(Order), [{"id": i + 1, "user_id": username, "total_amount": 100 * items_per_order, "status": "paid", "created_at": started + timedelta(minutes=i)} for i in range(count)])
+    db.execute(insert(OrderItem), [{"order_id": i + 1, "product_id": product_id, "quantity": 1, "unit_price": 100} for i in range(count) for product_id in product_ids])
+    db.commit()
+    return list(range(count, 0, -1))
+
+
+@pytest.mark.parametrize("orders,items_per_order,limit", [(5, 1, 50), (60, 3, 50), (200, 10, 200)])
+def test_history_statement_count_is_constant(client, db, orders, items_per_order, limit):
+    create_user(db)
+    seed_orders(db, orders, items_per_order)
+    headers = login(client)
+    # Warm the authenticated-user cache so only the history queries are counted
+    client.get("/api/orders/history/summary?limit=1", headers=headers).raise_for_status()
+
+    with count_statements() as statements:
+        response = client.get(f"/api/orders/history?limit={limit}", headers=headers)
+
+    assert response.status_code == 200, response.text
+    page = response.json()
+    assert len(page) == min(orders, limit)
+    assert all(len(order["items"]) == items_per_order for order in page)
+    # One query for the page of orders, one IN query for all of their items
+    assert len(statements) == 2, statements
+
+    with count_statements() as statements:
+        client.get(f"/api/orders/history/summary?limit={limit}", headers=headers).raise_for_status()
+    assert len(statements) == 1, statements
+
+
+@pytest.mark.parametrize("path", ["/api/orders/history", "/api/orders/history/summary"])
+def test_history_cursor_round_trip(client, db, path):
+    create_user(db)
+    expected = seed_orders(db, 23, 2)
+    # Another user's orders never appear in the page
+    create_user(db, "bob")
+    db.execute(insert(Order), [{"user_id": "bob", "total_amount": 1, "status": "paid", "created_at": datetime(2024, 1, 1, 0, 30)}])
+    db.commit()
+    headers = login(client)
+
+    seen: list[int] = []
+    cursor = None
+    pages = 0
+    while True:
+        response = client.get(path, params={"limit": 7, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200, response.text
+        seen.extend(order["id"] for order in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert pages == 4
+
+
+def test_history_rejects_malformed_cursor(client, db):
+    create_user(db)
+    headers = login(client)
+    assert client.get("/api/orders/history", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
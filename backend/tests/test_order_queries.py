@@ -0,0 +1,23 @@
+# flake8: noqa: E501
+"""Checkout issues the same number of statements whatever the cart size."""
+import pytest  # type: ignore
+from tests.conftest import count_statements, create_user, seed_products
+
+# Products fetch, stock lock + guarded decrement, reservation insert/delete, order + items,
+# three rollup upserts, and the order/items reload for the response
+CHECKOUT_STATEMENTS = 12
+
+
+@pytest.mark.parametrize("lines", [1, 5, 30])
+def test_checkout_statement_count_is_constant(client, db, lines):
+    product_ids = seed_products(db, 30)
+    create_user(db)
+
+    with count_statements() as statements:
+        response = client.post("/api/orders", json={"user_id": "alice", "items": [{"product_id": product_id, "quantity": 1} for product_id in product_ids[:lines]]})
+
+    assert response.status_code == 200, response.text
+    assert len(statements) == CHECKOUT_STATEMENTS, statements
+    # Stock is decremented with one set-based UPDATE and products are fetched with one IN query, never one per line
+    assert sum(1 for statement in statements if statement.startswith("UPDATE products")) == 1
+    assert sum(1 for statement in statements if statement.startswith("SELECT products.id AS products_id")) == 1
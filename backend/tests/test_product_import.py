@@ -0,0 +1,24 @@
+# flake8: noqa: E501
+"""Bulk import counts: every processed line is either upserted or reported as failed."""
+import json
+from app.models import Product
+from tests.conftest import create_user, login
+
+
+def test_duplicate_sku_in_a_batch_is_reported_not_counted(client, db):
+    create_user(db, "admin", is_superuser=True)
+    rows = [
+        {"sku": "A-1", "name": "First", "price": 100, "stock": 1},
+        {"sku": "B-1", "name": "Other", "price": 200, "stock": 2},
+        {"sku": "A-1", "name": "Second", "price": 150, "stock": 3},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows).encode()
+
+    response = client.post("/api/products/import?format=ndjson", content=body, headers=login(client, "admin"))
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["processed"], result["upserted"], result["failed"]) == (3, 2, 1)
+    assert [(error["line"], error["sku"]) for error in result["errors"]] == [(1, "A-1")]
+    assert db.query(Product).count() == 2
+    assert db.query(Product.name).filter(Product.sku == "A-1").scalar() == "Second"
@@ -0,0 +1,70 @@
+# flake8: noqa: E501
+"""Which writes keep reads on the primary, that the pins reach the other workers, and that cache fills skip lagging replicas."""
+import os
+import tempfile
+from app.db.base import Base
+from app.db.cache_bus import cache_bus
+from app.db.replicas import CATALOG_PIN, PINS_TOPIC, Replica, primary_pins, replica_set, user_pin
+from app.models import Product
+from app.services.product_service import PRODUCTS_TOPIC, invalidate_product_cache
+from tests.conftest import create_user, login, seed_products
+
+
+def record_events(monkeypatch) -> list[tuple[str, dict]]:
+    events: list[tuple[str, dict]] = []
+    monkeypatch.setattr(primary_pins, "_expires", {})
+    monkeypatch.setattr(cache_bus, "publish", lambda topic, **fields: events.append((topic, fields)))
+    return events
+
+
+def test_checkout_pins_the_user_everywhere_but_not_the_catalog(client, db, monkeypatch):
+    product_ids = seed_products(db, 3)
+    create_user(db)
+    events = record_events(monkeypatch)
+
+    response = client.post("/api/orders", json={"user_id": "alice", "items": [{"product_id": product_ids[0], "quantity": 1}]})
+
+    assert response.status_code == 200, response.text
+    assert primary_pins.is_pinned(user_pin("alice"))
+    assert not primary_pins.is_pinned(CATALOG_PIN)
+    assert (PINS_TOPIC, {"keys": [user_pin("alice")]}) in events
+    assert all(not fields["pin"] for topic, fields in events if topic == PRODUCTS_TOPIC)
+
+
+def test_admin_product_write_pins_the_catalog(client, db, monkeypatch):
+    product_ids = seed_products(db, 3)
+    create_user(db, "admin", is_superuser=True)
+    headers = login(client, "admin")
+    events = record_events(monkeypatch)
+
+    response = client.put(f"/api/products/{product_ids[0]}", json={"stock": 5}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert primary_pins.is_pinned(CATALOG_PIN)
+    assert [fields["pin"] for topic, fields in events if topic == PRODUCTS_TOPIC] == [True]
+
+
+def test_cache_is_refilled_from_the_primary_while_replicas_may_lag(client, db, monkeypatch):
+    # A replica that never received the price change
+    replica = Replica(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='ec-mock-replica-'), 'replica.db')}")
+    Base.metadata.create_all(replica.engine)
+    with replica.session_factory() as replica_db:
+        seed_products(replica_db, 1)
+    product_id = seed_products(db, 1)[0]
+    monkeypatch.setattr(replica_set, "replicas", [replica])
+    record_events(monkeypatch)
+
+    db.query(Product).filter(Product.id == product_id).update({"price": 999})
+    db.commit()
+    # Checkout-style invalidation: catalog reads stay on the replica
+    invalidate_product_cache([product_id], stock_changed=True, pin_catalog=False)
+
+    assert client.get(f"/api/products/{product_id}").json()["price"] == 999
+    assert replica_set.primary_fills >= 1
+
+    # Once the fill pin lapses, misses are filled from the replica again
+    monkeypatch.setattr(primary_pins, "_expires", {})
+    invalidate_product_cache([product_id], pin_catalog=False)
+    monkeypatch.setattr(primary_pins, "_expires", {})
+    assert client.get(f"/api/products/{product_id}").json()["price"] == 100
+    replica.engine.dispose()
@@ -0,0 +1,43 @@
+# flake8: noqa: E501
+"""Stock is reserved and released with a fixed number of statements, reporting every oversold line."""
+import pytest  # type: ignore
+from app.models import Product
+from app.schemas.order import OrderItemCreate
+from app.services.stock_service import InsufficientStockError, OversoldLine, StockService
+from tests.conftest import count_statements, seed_products
+
+
+def stock(db, product_ids: list[int]) -> list[int]:
+    db.expire_all()
+    return [stock for (stock,) in db.query(Product.stock).filter(Product.id.in_(product_ids)).order_by(Product.id)]
+
+
+@pytest.mark.parametrize("lines", [1, 10, 50])
+def test_reserve_and_release_use_two_statements_each(db, lines):
+    product_ids = seed_products(db, lines, stock=10)
+    # A repeated product is merged into one line
+    items = [OrderItemCreate(product_id=product_id, quantity=2) for product_id in product_ids] + [OrderItemCreate(product_id=product_ids[0], quantity=1)]
+
+    with count_statements() as reserve_statements:
+        StockService(db).reserve(items)
+    db.commit()
+    assert len(reserve_statements) == 2
+    assert stock(db, product_ids) == [7] + [8] * (lines - 1)
+
+    with count_statements() as release_statements:
+        StockService(db).release(items)
+    db.commit()
+    assert len(release_statements) == 2
+    assert stock(db, product_ids) == [10] * lines
+
+
+def test_reserve_reports_every_oversold_line(db):
+    product_ids = seed_products(db, 3, stock=2)
+    items = [OrderItemCreate(product_id=product_ids[0], quantity=3), OrderItemCreate(product_id=product_ids[1], quantity=1), OrderItemCreate(product_id=product_ids[2], quantity=5)]
+
+    with pytest.raises(InsufficientStockError) as error:
+        StockService(db).reserve(items)
+    db.rollback()
+
+    assert error.value.lines == [OversoldLine(product_id=product_ids[0], requested=3, available=2), OversoldLine(product_id=product_ids[2], requested=5, available=2)]
+    assert stock(db, product_ids) == [2, 2, 2]
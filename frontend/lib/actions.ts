@@ -1,5 +1,6 @@
 'use server'
 
+import { headers } from 'next/headers';
 import { Product, OrderCreateRequest } from './types';
 
 // Type declaration for Node.js process in Next.js server context
@@ -16,6 +17,13 @@ function getBackendUrl(): string {
   return process.env.BACKEND_URL || 'http://localhost:8000';
 }
 
+// Relay the shopper's address so the backend rate-limits each shopper instead of this server
+// (the backend believes it only from addresses listed in its TRUSTED_PROXIES)
+function forwardedHeaders(): Record<string, string> {
+  const forwardedFor = headers().get('x-forwarded-for');
+  return forwardedFor ? { 'X-Forwarded-For': forwardedFor } : {};
+}
+
 /**
  * Server Action to fetch paginated products from the backend API
  * @param page - Page number (default: 1)
@@ -114,6 +122,7 @@ export async function createOrder(orderData: OrderCreateRequest) {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          ...forwardedHeaders(),
         },
         body: JSON.stringify(orderData),
         cache: 'no-store',
@@ -26,6 +26,7 @@ INSERT INTO users (email, username, hashed_password, full_name, is_superuser) VA
 -- Create products table
 CREATE TABLE products (
     id SERIAL PRIMARY KEY,
+    sku VARCHAR(64) UNIQUE,
     name VARCHAR(255) NOT NULL,
     description TEXT,
     price INTEGER NOT NULL,
@@ -37,8 +38,29 @@ CREATE TABLE products (
 );
 
 -- Create indexes for products table
-CREATE INDEX idx_products_category ON products(category);
 CREATE INDEX idx_products_name ON products(name);
+CREATE INDEX idx_products_created_at_id ON products(created_at, id);
+CREATE INDEX idx_products_price_id ON products(price, id);
+CREATE INDEX idx_products_category_created_at_id ON products(category, created_at, id);
+CREATE INDEX idx_products_updated_at ON products(updated_at);
+
+-- Full-text search: weighted tsvector over name/category/description plus trigram index for typo tolerance
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'C')
+) STORED;
+CREATE INDEX idx_products_search_vector ON products USING GIN (search_vector);
+CREATE INDEX idx_products_name_trgm ON products USING GIN (name gin_trgm_ops);
+
+-- Bumped by the API whenever products are added or removed; versions the catalog for conditional GET
+CREATE TABLE catalog_version (
+    id INTEGER PRIMARY KEY,
+    revision BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC')
+);
+INSERT INTO catalog_version (id, revision) VALUES (1, 0);
 
 -- Create orders table
 CREATE TABLE orders (
@@ -50,7 +72,7 @@ CREATE TABLE orders (
 );
 
 -- Create indexes for orders table
-CREATE INDEX idx_orders_user_id ON orders(user_id);
+CREATE INDEX idx_orders_user_id_created_at ON orders(user_id, created_at DESC, id DESC);
 CREATE INDEX idx_orders_created_at ON orders(created_at DESC);
 
 -- Create order_items table
@@ -65,6 +87,54 @@ CREATE TABLE order_items (
 -- Create index for order_items table
 CREATE INDEX idx_order_items_order_id ON order_items(order_id);
 
+-- Stock held for checkouts awaiting payment; expired rows are released by the API's reservation reaper
+CREATE TABLE stock_reservations (
+    id SERIAL PRIMARY KEY,
+    lines JSON NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+CREATE INDEX idx_stock_reservations_expires_at ON stock_reservations(expires_at);
+
+-- Responses of non-idempotent POSTs per Idempotency-Key, shared by every API worker
+-- (purge expired rows: python -m scripts.purge_idempotency_keys)
+CREATE TABLE idempotency_keys (
+    id SERIAL PRIMARY KEY,
+    scope VARCHAR(64) NOT NULL,
+    principal VARCHAR(255) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    fingerprint VARCHAR(32) NOT NULL,
+    response BYTEA,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC'),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    CONSTRAINT uq_idempotency_keys_scope_principal_key UNIQUE (scope, principal, key)
+);
+CREATE INDEX idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
+
+-- Sales analytics rollups, maintained in the order transaction (rebuild: python -m scripts.rebuild_sales_rollups)
+CREATE TABLE daily_sales (
+    day DATE PRIMARY KEY,
+    orders INTEGER NOT NULL DEFAULT 0,
+    units INTEGER NOT NULL DEFAULT 0,
+    revenue BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE product_sales (
+    product_id INTEGER PRIMARY KEY,
+    orders INTEGER NOT NULL DEFAULT 0,
+    units INTEGER NOT NULL DEFAULT 0,
+    revenue BIGINT NOT NULL DEFAULT 0,
+    last_sold_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX idx_product_sales_units ON product_sales(units, product_id);
+CREATE INDEX idx_product_sales_revenue ON product_sales(revenue, product_id);
+
+CREATE TABLE category_sales (
+    category VARCHAR(100) PRIMARY KEY,
+    units INTEGER NOT NULL DEFAULT 0,
+    revenue BIGINT NOT NULL DEFAULT 0
+);
+
 -- Insert sample products (300 items for pagination testing)
 DO $$
 DECLARE
@@ -112,6 +182,22 @@ INSERT INTO order_items (order_id, product_id, quantity, unit_price) VALUES
 (3, 7, 1, 3500),
 (3, 8, 1, 1500);
 
+-- Sales rollups for the sample orders
+INSERT INTO daily_sales (day, orders, units, revenue)
+SELECT date(o.created_at), count(DISTINCT o.id), sum(oi.quantity), sum(oi.quantity * oi.unit_price)
+FROM orders o JOIN order_items oi ON oi.order_id = o.id
+GROUP BY date(o.created_at);
+
+INSERT INTO product_sales (product_id, orders, units, revenue, last_sold_at)
+SELECT oi.product_id, count(DISTINCT oi.order_id), sum(oi.quantity), sum(oi.quantity * oi.unit_price), max(o.created_at)
+FROM order_items oi JOIN orders o ON o.id = oi.order_id
+GROUP BY oi.product_id;
+
+INSERT INTO category_sales (category, units, revenue)
+SELECT coalesce(p.category, ''), sum(oi.quantity), sum(oi.quantity * oi.unit_price)
+FROM order_items oi JOIN products p ON p.id = oi.product_id
+GROUP BY coalesce(p.category, '');
+
 -- Update all product images to use the fixed product image
 UPDATE products SET image_url = '/product~image.png';
 